@@ -0,0 +1,148 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter
+from chemistryIO.config_handler import config
+from utils.logger import Logger
+
+
+def find_inputs(pattern):
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, f"*.{config.output_fmt}")
+    return sorted(path for path in glob.glob(pattern) if os.path.isfile(path))
+
+
+def run_batch_job(job):
+    from generator import create_generator
+    from chemistryIO.generator_io import GeneratorIO
+
+    path = job["path"]
+    result = {"input": path, "status": "error", "output_file": None}
+    start_time = time.perf_counter()
+    try:
+        generatorIO = GeneratorIO(input_file=path, output_file=job["output"], debug=job["debug"], debug_output_type=job["output_type"])
+        with open(path, 'r') as file:
+            parsed_data = generatorIO.parse_lines(file)
+        parse_time = time.perf_counter()
+
+        generated_data = create_generator(parsed_data, job["seed"], legacy_random=job["legacy_random"]).run_generation()
+        generation_time = time.perf_counter()
+
+        generatorIO.write_data(generated_data)
+        write_time = time.perf_counter()
+    except BaseException as e:
+        # a failing input is only reported, the other jobs keep going
+        result["message"] = str(e) or type(e).__name__
+        result["duration"] = round(time.perf_counter() - start_time, 4)
+        return result
+
+    result.update({
+        "status": "done",
+        "output_file": generatorIO.output_file,
+        "seed": generated_data["seed"],
+        "n_species": len(generated_data["species"]),
+        "n_catalyzers": len(generated_data["catalyzers"]),
+        "n_cond_reactions": len(generated_data["cond_reactions"]),
+        "n_cll_reactions": len(generated_data["cll_reactions"]),
+        "parse_time": round(parse_time - start_time, 4),
+        "generation_time": round(generation_time - parse_time, 4),
+        "write_time": round(write_time - generation_time, 4),
+        "duration": round(write_time - start_time, 4),
+    })
+    return result
+
+
+def output_names(paths):
+    # The name of the input file, or its path from the common directory when several inputs share that name
+    names = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    counts = Counter(names)
+    if len(counts) < len(names):
+        base = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in paths])
+        names = [os.path.splitext(os.path.relpath(os.path.abspath(path), base))[0].replace(os.sep, "-") if counts[name] > 1 else name
+                 for path, name in zip(paths, names)]
+    duplicates = sorted(name for name, count in Counter(names).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Several inputs would be written to the same output: {', '.join(duplicates)}.")
+    return names
+
+
+def run_batch(paths, workers=None, seed=None, debug=False, output_type="txt", legacy_random=False):
+    jobs = [{
+        "path": path,
+        "output": output,
+        "seed": seed,
+        "legacy_random": legacy_random,
+        "debug": debug,
+        "output_type": output_type,
+    } for path, output in zip(paths, output_names(paths))]
+    if not jobs:
+        return []
+
+    results = []
+    with multiprocessing.Pool(processes=min(workers or os.cpu_count() or 1, len(jobs))) as pool:
+        for result in pool.imap_unordered(run_batch_job, jobs):
+            if result["status"] == "done":
+                Logger.info(f"{result['input']}: {result['n_species']} species, {result['n_cond_reactions']} cond and "
+                            f"{result['n_cll_reactions']} cll reactions in {result['duration']}s")
+            else:
+                Logger.error(f"{result['input']}: {result['message']}")
+            results.append(result)
+
+    results.sort(key=lambda result: result["input"])
+    return results
+
+
+def write_summary(results, summary_file, total_time):
+    failures = [result for result in results if result["status"] != "done"]
+    summary = {
+        "n_inputs": len(results),
+        "n_done": len(results) - len(failures),
+        "n_failed": len(failures),
+        "total_time": round(total_time, 4),
+        "jobs": results,
+    }
+    with open(summary_file, 'w') as file:
+        json.dump(summary, file, indent=2)
+
+    Logger.flush()
+    print(f"\n{'Input':<40} {'Status':<8} {'Species':<10} {'Cond':<10} {'Cll':<10} {'Time (s)':<10}")
+    for result in results:
+        if result["status"] == "done":
+            print(f"{os.path.basename(result['input']):<40} {result['status']:<8} {result['n_species']:<10} "
+                  f"{result['n_cond_reactions']:<10} {result['n_cll_reactions']:<10} {result['duration']:<10}")
+        else:
+            print(f"{os.path.basename(result['input']):<40} {result['status']:<8} {result['message']}")
+    print()
+    Logger.info(f"{summary['n_done']}/{summary['n_inputs']} inputs generated in {summary['total_time']}s, summary written to {summary_file}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate species and reactions for a whole directory of input chemistries.")
+    parser.add_argument("inputs", help="A directory of input files or a glob pattern, i.e. 'test/input/*.txt'.")
+    parser.add_argument("-w", "--workers", type=int, help="Number of worker processes (default: number of CPUs).")
+    parser.add_argument("-s", "--seed", type=int, help="Seed for random generation, used for every input.")
+    parser.add_argument("--legacy-random", action="store_true", help="Draw every random decision from the global stream seeded once, as older versions did.", default=False)
+    parser.add_argument("-debug", action="store_true", help="Enable debug mode.", default=False)
+    parser.add_argument("-ot", "--output-type", choices=["txt", "txt-verbose", "excel"], default="txt", help="Specify the output type. Choices are 'txt', 'txt-verbose', or 'excel'.")
+    parser.add_argument("--summary", default=f"{config.output_dir}/batch_summary.json", help="Where to write the JSON summary.")
+    args = parser.parse_args()
+
+    paths = find_inputs(args.inputs)
+    if not paths:
+        Logger.error(f"No input files found for '{args.inputs}'.")
+        sys.exit(1)
+
+    start_time = time.perf_counter()
+    try:
+        results = run_batch(paths, workers=args.workers, seed=args.seed, debug=args.debug, output_type=args.output_type, legacy_random=args.legacy_random)
+    except ValueError as e:
+        Logger.error(str(e))
+        sys.exit(1)
+    summary = write_summary(results, args.summary, time.perf_counter() - start_time)
+    if summary["n_failed"]:
+        sys.exit(1)
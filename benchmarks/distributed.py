@@ -0,0 +1,67 @@
+import os
+import time
+import filecmp
+import argparse
+import tempfile
+from .synthetic import synthetic_chemistry
+from .pipeline import SIZE_LADDER
+from generator import create_generator
+from chemistryIO.generator_io import GeneratorIO
+from utils.logger import Logger
+from utils.metrics import Metrics
+from distributed import ClosureCoordinator
+
+DEFAULT_WORKERS = [1, 2, 4]
+
+
+def _generate(params, seed, output_file, coordinator=None):
+    # Every run parses its own copy: the generator mutates the species and the reaction classes
+    generatorIO = GeneratorIO(input_file="bench", output_file="bench")
+    parsed_data = generatorIO.parse_lines(synthetic_chemistry(seed=seed, **params).splitlines())
+    metrics = Metrics()
+    start_time = time.perf_counter()
+    data = create_generator(parsed_data, seed, metrics, matcher=coordinator).run_generation()
+    elapsed = time.perf_counter() - start_time
+    generatorIO.output_file = output_file
+    generatorIO.write_data(data)
+    # Time spent in the enumerations, matching and replay included
+    phases = [metrics.phases] + [iteration["phases"] for iteration in metrics.iterations]
+    enumeration = sum(seconds for scope in phases for name, seconds in scope.items() if name.endswith(("condensation", "cleavage")))
+    return {"generation": elapsed, "enumeration": enumeration, "n_species": len(data["species"])}
+
+
+def benchmark_distributed(params, seed=0, workers=DEFAULT_WORKERS):
+    Logger.set_debug_mode(False)
+    results = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        reference = os.path.join(output_dir, "single.txt")
+        results["single"] = _generate(params, seed, reference)
+        for n_workers in workers:
+            output_file = os.path.join(output_dir, f"workers{n_workers}.txt")
+            with ClosureCoordinator(workers=n_workers) as coordinator:
+                results[n_workers] = _generate(params, seed, output_file, coordinator)
+                results[n_workers]["rounds"] = coordinator.round
+            results[n_workers]["identical"] = filecmp.cmp(reference, output_file, shallow=False)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the distributed closure with local workers and check that its output is the single process one.")
+    parser.add_argument("-r", "--rungs", nargs="+", choices=list(SIZE_LADDER), default=["xs", "s", "m"], help="Rungs of the size ladder to run.")
+    parser.add_argument("-w", "--workers", nargs="+", type=int, default=DEFAULT_WORKERS, help="Numbers of local workers to try (default: %(default)s).")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the synthetic chemistries and of the generation.")
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.rungs:
+        results = benchmark_distributed(SIZE_LADDER[name], seed=args.seed, workers=args.workers)
+        single = results["single"]
+        print(f"Rung '{name}': {single['n_species']} species")
+        print(f"\tsingle process {single['generation']:8.3f} s (enumerations {single['enumeration']:.3f} s)")
+        for n_workers in args.workers:
+            result = results[n_workers]
+            failed |= not result["identical"]
+            print(f"\t{n_workers:>2} workers     {result['generation']:8.3f} s (enumerations {result['enumeration']:.3f} s, {result['rounds']} rounds)  "
+                  f"{'identical' if result['identical'] else 'DIFFERENT'} output")
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,67 @@
+import os
+import sys
+import argparse
+import subprocess
+import multiprocessing
+from utils.logger import Logger
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# An exception in an at-fork hook (i.e. Logger._after_fork) is only printed, the child then goes on: it is recorded
+# here, inherited by the children, to fail the check
+unraisable = []
+
+
+def _record_unraisable(hook_args):
+    unraisable.append(hook_args.exc_value)
+    sys.__unraisablehook__(hook_args)
+
+
+def _log_in_child(i):
+    # The logger is reconfigured without its listener thread after the fork, see Logger._after_fork
+    Logger.info(f"forked worker {i} can log")
+    return i if not unraisable else None
+
+
+def check_fork():
+    Logger.info("parent logs before forking")
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if _log_in_child(0) == 0 else 1)
+        except BaseException:
+            os._exit(1)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status) == 0
+
+
+def check_pool(workers):
+    with multiprocessing.get_context("fork").Pool(processes=workers) as pool:
+        return pool.map(_log_in_child, range(workers)) == list(range(workers))
+
+
+def check_distributed(file_path, workers):
+    result = subprocess.run([sys.executable, "generator.py", file_path, "-s", "1", "-o", "fork_smoke", "--workers", str(workers)],
+                            cwd=ROOT_DIR, capture_output=True, text=True)
+    for name in os.listdir(os.path.join(ROOT_DIR, "test", "output")):
+        if name.startswith("fork_smoke."):
+            os.remove(os.path.join(ROOT_DIR, "test", "output", name))
+    return result.returncode == 0 and "Exception ignored" not in result.stderr
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that logging and the multi-process features still work in forked children.")
+    parser.add_argument("-i", "--input", default="00_chimica_test", help="Input of the distributed generation run.")
+    parser.add_argument("-w", "--workers", type=int, default=2, help="Number of forked workers (default: %(default)s).")
+    args = parser.parse_args()
+    sys.unraisablehook = _record_unraisable
+
+    checks = {
+        "os.fork": check_fork(),
+        "fork pool": check_pool(args.workers),
+        "generator --workers": check_distributed(args.input, args.workers),
+    }
+    Logger.flush()
+    for name, passed in checks.items():
+        print(f"{name:<20} {'OK' if passed else 'FAILED'}")
+    if not all(checks.values()):
+        raise SystemExit(1)
@@ -0,0 +1,87 @@
+import time
+import random
+import argparse
+from .synthetic import synthetic_chemistry
+from .pipeline import SIZE_LADDER
+from generator import create_generator
+from chemistryIO.config_handler import config
+from chemistryIO.generator_io import GeneratorIO
+from utils.logger import Logger
+from utils.gillespie import compile_channels, simulate_stochastic, propensity
+
+DEFAULT_EVENTS = 20000
+DEFAULT_DIRECT_EVENTS = 2000
+# Far beyond any simulated time: the runs are stopped by their number of events
+UNBOUNDED_TIME = 1e300
+
+
+def direct_method(network, counts, n_events, seed=0):
+    # Reference SSA (Gillespie direct method): every propensity is recomputed after each event and the firing channel
+    # is found by a linear search on their cumulative sum
+    rng = random.Random(seed)
+    factors, rates, changes = network["factors"], network["rates"], network["changes"]
+    counts = list(counts)
+    t = 0.0
+    for _ in range(n_events):
+        propensities = [propensity(rate, channel_factors, counts) for rate, channel_factors in zip(rates, factors)]
+        total = sum(propensities)
+        if total <= 0:
+            break
+        t += rng.expovariate(total)
+        target = rng.random() * total
+        for channel, a in enumerate(propensities):
+            target -= a
+            if target < 0:
+                break
+        for species_id, change in changes[channel]:
+            counts[species_id] += change
+    return counts, t
+
+
+def benchmark_gillespie(params, seed=0, n_events=DEFAULT_EVENTS, n_direct_events=DEFAULT_DIRECT_EVENTS):
+    Logger.set_debug_mode(False)
+    generatorIO = GeneratorIO(input_file="bench", output_file="bench")
+    data = create_generator(generatorIO.parse_lines(synthetic_chemistry(seed=seed, **params).splitlines()), seed).run_generation()
+
+    start_time = time.perf_counter()
+    # One molecule per unit of concentration, so that the counts below are also the concentrations
+    network = compile_channels(data, copies=config.default_concentration)
+    results = {"counts": {"n_species": len(network["species"]), "n_reactions": network["n_reactions"], "n_channels": len(network["factors"])},
+               "compile": time.perf_counter() - start_time}
+
+    # The generated concentrations barely react, both methods start from the same random copy numbers
+    rng = random.Random(seed)
+    initial = [rng.randint(50, 150) for _ in network["species"]]
+
+    start_time = time.perf_counter()
+    result = simulate_stochastic(network, UNBOUNDED_TIME, 2, seed=seed, initial=initial, max_events=n_events)
+    elapsed = time.perf_counter() - start_time
+    results["next_reaction"] = {"events": result["n_events"], "seconds": elapsed, "events_per_second": result["n_events"] / elapsed,
+                                "updates_per_event": result["n_propensity_updates"] / max(result["n_events"], 1)}
+    results["reproducible"] = simulate_stochastic(network, UNBOUNDED_TIME, 2, seed=seed, initial=initial, max_events=n_events)["final"] == result["final"]
+
+    start_time = time.perf_counter()
+    direct_method(network, initial, n_direct_events, seed=seed)
+    elapsed = time.perf_counter() - start_time
+    results["direct"] = {"events": n_direct_events, "seconds": elapsed, "events_per_second": n_direct_events / elapsed}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Events per second of the next reaction SSA against a direct method that recomputes every propensity.")
+    parser.add_argument("-r", "--rungs", nargs="+", choices=list(SIZE_LADDER), default=list(SIZE_LADDER), help="Rungs of the size ladder to run.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the synthetic chemistries, of the generation and of the simulations.")
+    parser.add_argument("-e", "--events", type=int, default=DEFAULT_EVENTS, help="Events simulated with the next reaction method (default: %(default)s).")
+    parser.add_argument("-d", "--direct-events", type=int, default=DEFAULT_DIRECT_EVENTS, help="Events simulated with the direct method (default: %(default)s).")
+    args = parser.parse_args()
+
+    for name in args.rungs:
+        result = benchmark_gillespie(SIZE_LADDER[name], seed=args.seed, n_events=args.events, n_direct_events=args.direct_events)
+        counts, next_reaction, direct = result["counts"], result["next_reaction"], result["direct"]
+        print(f"Rung '{name}': {counts['n_species']} species, {counts['n_reactions']} reactions, {counts['n_channels']} channels "
+              f"(compiled in {result['compile']:.3f} s)")
+        print(f"\tnext reaction {next_reaction['events_per_second']:>10.0f} events/s ({next_reaction['events']} events, "
+              f"{next_reaction['updates_per_event']:.1f} propensity updates per event, "
+              f"{'reproducible' if result['reproducible'] else 'NOT reproducible'} with the same seed)")
+        print(f"\tdirect        {direct['events_per_second']:>10.0f} events/s ({direct['events']} events)  "
+              f"{next_reaction['events_per_second'] / direct['events_per_second']:.1f}x")
@@ -0,0 +1,55 @@
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup budget (ms) for importing the generator entry point, excluding interpreter boot
+DEFAULT_BUDGET_MS = 100
+DEFAULT_MODULES = ["generator", "main"]
+
+
+def measure_import(module, python=sys.executable):
+    # -X importtime writes "import time: <self us> | <cumulative us> | <module>" lines on stderr
+    result = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    total_us = next((cumulative for name, _, cumulative in timings if name == module), 0)
+    return total_us, timings
+
+
+def run_benchmark(modules, repeat, budget_ms, top):
+    over_budget = False
+    for module in modules:
+        runs = [measure_import(module) for _ in range(repeat)]
+        totals_ms = [total / 1000 for total, _ in runs]
+        best_ms = min(totals_ms)
+        status = "OK" if best_ms <= budget_ms else "OVER BUDGET"
+        over_budget |= best_ms > budget_ms
+
+        print(f"{module}: best {best_ms:.1f} ms, median {statistics.median(totals_ms):.1f} ms "
+              f"over {repeat} runs (budget {budget_ms} ms) -> {status}")
+
+        _, timings = min(runs, key=lambda run: run[0])
+        for name, self_us, cumulative_us in sorted(timings, key=lambda t: t[1], reverse=True)[:top]:
+            print(f"\t{self_us / 1000:>8.2f} ms self {cumulative_us / 1000:>8.2f} ms cumulative  {name}")
+    return over_budget
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the import time of the tool entry points with -X importtime.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import.")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of fresh interpreters per module.")
+    parser.add_argument("-b", "--budget", type=float, default=DEFAULT_BUDGET_MS, help="Startup budget in milliseconds.")
+    parser.add_argument("-t", "--top", type=int, default=10, help="Number of slowest modules to show.")
+    args = parser.parse_args()
+
+    if run_benchmark(args.modules, args.repeat, args.budget, args.top):
+        sys.exit(1)
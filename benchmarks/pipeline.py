@@ -0,0 +1,189 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from .synthetic import synthetic_chemistry
+from generator import create_generator
+from chemistryIO.generator_io import GeneratorIO
+from utils.metrics import Metrics
+
+# Each rung roughly doubles the number of species in the closure (about 27, 51, 194 and 336 with seed 0)
+SIZE_LADDER = {
+    "xs": dict(alphabet_size=2, n_species=6, max_length=3, n_cond_classes=2, n_cll_classes=2, ML=3),
+    "s": dict(alphabet_size=2, n_species=8, max_length=4, n_cond_classes=3, n_cll_classes=2, ML=3),
+    "m": dict(alphabet_size=2, n_species=12, max_length=4, n_cond_classes=3, n_cll_classes=2, ML=4),
+    "l": dict(alphabet_size=3, n_species=16, max_length=4, n_cond_classes=6, n_cll_classes=3, ML=4),
+}
+
+WRITERS = {
+    "write_data": lambda generatorIO, data: generatorIO.write_data(data),
+    "write_debug_info": lambda generatorIO, data: generatorIO.write_debug_info(data),
+    "write_debug_info_verbose": lambda generatorIO, data: generatorIO.write_debug_info_verbose(data),
+    "write_debug_info_excel": lambda generatorIO, data: generatorIO.write_debug_info_excel(data),
+}
+
+DEFAULT_THRESHOLD = 0.2
+# Timings below this (seconds) are too noisy to be flagged as regressions
+MIN_TIME = 0.01
+
+
+def _new_io(output_dir, name):
+    generatorIO = GeneratorIO(input_file=name, output_file=name)
+    generatorIO.output_file = os.path.join(output_dir, f"{name}.txt")
+    generatorIO.debug_file = os.path.join(output_dir, f"{name}.debug.txt")
+    return generatorIO
+
+
+def _run_pipeline(content, output_dir, seed, writers):
+    # One full pass: parse, generate, then every output writer; returns (stage timings, metrics, generated data)
+    stages = {}
+    generatorIO = _new_io(output_dir, "bench")
+
+    start_time = time.perf_counter()
+    parsed_data = generatorIO.parse_lines(content.splitlines())
+    stages["parse"] = time.perf_counter() - start_time
+
+    metrics = Metrics()
+    generator = create_generator(parsed_data, seed, metrics)
+    start_time = time.perf_counter()
+    generated_data = generator.run_generation()
+    stages["generation"] = time.perf_counter() - start_time
+
+    for name in writers:
+        if name == "write_debug_info_excel":
+            generatorIO.debug_file = os.path.join(output_dir, "bench.debug.xls")
+        start_time = time.perf_counter()
+        WRITERS[name](generatorIO, generated_data)
+        stages[name] = time.perf_counter() - start_time
+    return stages, metrics, generated_data
+
+
+def _measure_memory(content, output_dir, seed, writers):
+    # Separate pass, tracemalloc slows everything down too much to be used while timing
+    peaks = {}
+    generatorIO = _new_io(output_dir, "bench")
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        parsed_data = generatorIO.parse_lines(content.splitlines())
+        peaks["parse"] = tracemalloc.get_traced_memory()[1]
+
+        tracemalloc.reset_peak()
+        memory_metrics = Metrics(track_memory=True)
+        with memory_metrics.phase("generation"):
+            generated_data = create_generator(parsed_data, seed, memory_metrics).run_generation()
+        peaks["generation"] = memory_metrics.memory["generation"]["peak"]
+
+        for name in writers:
+            if name == "write_debug_info_excel":
+                generatorIO.debug_file = os.path.join(output_dir, "bench.debug.xls")
+            tracemalloc.reset_peak()
+            WRITERS[name](generatorIO, generated_data)
+            peaks[name] = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return peaks, memory_metrics
+
+
+def benchmark_rung(name, params, repeat=3, seed=0, writers=tuple(WRITERS)):
+    content = synthetic_chemistry(seed=seed, **params)
+    with tempfile.TemporaryDirectory() as output_dir:
+        runs = []
+        for _ in range(repeat):
+            random.seed(seed)
+            runs.append(_run_pipeline(content, output_dir, seed, writers))
+        peaks, memory_metrics = _measure_memory(content, output_dir, seed, writers)
+
+    stages = {stage: min(run[0][stage] for run in runs) for stage in runs[0][0]}
+    # Phase and iteration details are taken from the fastest run
+    _, metrics, generated_data = min(runs, key=lambda run: run[0]["generation"])
+    return {
+        "params": params,
+        "counts": {
+            "n_species": len(generated_data["species"]),
+            "n_catalyzers": len(generated_data["catalyzers"]),
+            "n_cond_reactions": len(generated_data["cond_reactions"]),
+            "n_cll_reactions": len(generated_data["cll_reactions"]),
+        },
+        "stages": {stage: {"time": stages[stage], "peak_memory": peaks[stage]} for stage in stages},
+        "phases": metrics.phases,
+        "iterations": [{"duration": iteration["duration"], "phases": iteration["phases"],
+                        "peak_memory": memory_iteration["memory"]["iteration"]["peak"], "sizes": memory_iteration["sizes"]}
+                       for iteration, memory_iteration in zip(metrics.iterations, memory_metrics.iterations)],
+    }
+
+
+def run_benchmarks(rungs, repeat=3, seed=0, writers=tuple(WRITERS)):
+    if "write_debug_info_excel" in writers:
+        # the excel writer imports openpyxl on first use, keep that out of the first rung timings
+        import openpyxl
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "repeat": repeat,
+        "rungs": {},
+    }
+    for name in rungs:
+        print(f"Running rung '{name}'...", flush=True)
+        result = benchmark_rung(name, SIZE_LADDER[name], repeat=repeat, seed=seed, writers=writers)
+        results["rungs"][name] = result
+        counts = result["counts"]
+        print(f"\t{counts['n_species']} species, {counts['n_cond_reactions']} cond and {counts['n_cll_reactions']} cll reactions, "
+              f"{len(result['iterations'])} iterations")
+        for stage, values in result["stages"].items():
+            print(f"\t{stage:<26} {values['time']:>10.4f} s {values['peak_memory'] / 2**20:>10.2f} MiB peak")
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, min_time=MIN_TIME):
+    # A regression is a stage (time or peak memory) more than threshold slower/larger than in the baseline
+    regressions = []
+    for name, rung in results["rungs"].items():
+        baseline_rung = baseline.get("rungs", {}).get(name)
+        if baseline_rung is None:
+            continue
+        for stage, values in rung["stages"].items():
+            baseline_values = baseline_rung["stages"].get(stage)
+            if baseline_values is None:
+                continue
+            for key in ("time", "peak_memory"):
+                if key == "time" and values[key] < min_time:
+                    continue
+                if baseline_values[key] > 0 and values[key] > baseline_values[key] * (1 + threshold):
+                    regressions.append((name, stage, key, baseline_values[key], values[key]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the generator pipeline on a ladder of synthetic chemistries.")
+    parser.add_argument("-r", "--rungs", nargs="+", choices=list(SIZE_LADDER), default=list(SIZE_LADDER), help="Rungs of the size ladder to run.")
+    parser.add_argument("-n", "--repeat", type=int, default=3, help="Timed runs per rung (the fastest one is kept).")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the synthetic chemistries and of the generation.")
+    parser.add_argument("-w", "--writers", nargs="+", choices=list(WRITERS), default=list(WRITERS), help="Output writers to benchmark.")
+    parser.add_argument("-o", "--output", help="Write the results as JSON to this file (i.e. to save a new baseline).")
+    parser.add_argument("-b", "--baseline", help="Compare the results with this baseline JSON file.")
+    parser.add_argument("-t", "--threshold", type=float, default=DEFAULT_THRESHOLD, help="Relative slowdown flagged as a regression (default: %(default)s).")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="Stages faster than this many seconds are never flagged (default: %(default)s).")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.rungs, repeat=args.repeat, seed=args.seed, writers=tuple(args.writers))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold, args.min_time)
+        for name, stage, key, old, new in regressions:
+            print(f"REGRESSION {name}/{stage} {key}: {old:.4g} -> {new:.4g} ({(new / old - 1) * 100:+.1f}%)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression above {args.threshold * 100:.0f}% against {args.baseline}")
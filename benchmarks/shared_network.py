@@ -0,0 +1,162 @@
+import os
+import time
+import pickle
+import filecmp
+import argparse
+import tempfile
+import multiprocessing
+from collections import Counter
+from .synthetic import synthetic_chemistry
+from .pipeline import SIZE_LADDER
+from generator import create_generator
+from chemistryIO.generator_io import GeneratorIO
+from utils.logger import Logger
+from utils.shared_network import SharedNetwork
+
+
+def _write(data, output_file):
+    generatorIO = GeneratorIO(input_file="bench", output_file="bench")
+    generatorIO.output_file = output_file
+    generatorIO.write_data(data)
+
+
+def _write_pickled(job):
+    payload, output_file = job
+    start_time = time.perf_counter()
+    data = pickle.loads(payload)
+    load_time = time.perf_counter() - start_time
+    _write(data, output_file)
+    return load_time, time.perf_counter() - start_time - load_time
+
+
+def _write_shared(job):
+    name, output_file = job
+    start_time = time.perf_counter()
+    network = SharedNetwork.attach(name)
+    load_time = time.perf_counter() - start_time
+    try:
+        _write(network.data(), output_file)
+    finally:
+        network.close()
+    return load_time, time.perf_counter() - start_time - load_time
+
+
+def _catalysis_counts(data):
+    # Reaction lines of every catalyzer, read through the objects (or the views)
+    counts = Counter()
+    for reaction in (*data["cond_reactions"], *data["cll_reactions"]):
+        for catalyzer in reaction.reaction_class.catalyzers:
+            counts[str(catalyzer.species)] += 1
+    return dict(counts)
+
+
+def _catalysis_counts_arrays(network):
+    # The same counts from the typed arrays of a shared network, without building any view
+    arrays = network.arrays
+    indptr, class_catalyzers = arrays["class_catalyzers_indptr"], arrays["class_catalyzers"]
+    reactions_per_class = Counter(arrays["cond_class"])
+    reactions_per_class.update(arrays["cll_class"])
+    counts = Counter()
+    for reaction_class, n_reactions in reactions_per_class.items():
+        for catalyzer in class_catalyzers[indptr[reaction_class]:indptr[reaction_class + 1]]:
+            counts[network.text(arrays["catalyzer_species"][catalyzer])] += n_reactions
+    return dict(counts)
+
+
+def _count_pickled(payload):
+    start_time = time.perf_counter()
+    data = pickle.loads(payload)
+    load_time = time.perf_counter() - start_time
+    return load_time, time.perf_counter() - start_time - load_time, _catalysis_counts(data)
+
+
+def _count_shared(name):
+    start_time = time.perf_counter()
+    network = SharedNetwork.attach(name)
+    load_time = time.perf_counter() - start_time
+    try:
+        counts = _catalysis_counts_arrays(network)
+    finally:
+        network.close()
+    return load_time, time.perf_counter() - start_time - load_time, counts
+
+
+def _slowest(timings):
+    return {"load": max(load for load, _ in timings), "write": max(write for _, write in timings)}
+
+
+def benchmark_shared_network(params, workers=4, seed=0):
+    # Totals include pickling or freezing the network. Every worker writes the output of the same network, handed over pickled or attached by name
+    Logger.set_debug_mode(False)
+    parsed_data = GeneratorIO(input_file="bench", output_file="bench").parse_lines(synthetic_chemistry(seed=seed, **params).splitlines())
+    data = create_generator(parsed_data, seed).run_generation()
+
+    with tempfile.TemporaryDirectory() as output_dir, multiprocessing.Pool(workers) as pool:
+        reference = os.path.join(output_dir, "reference.txt")
+        _write(data, reference)
+
+        start_time = time.perf_counter()
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        pickled = _slowest(pool.map(_write_pickled, [(payload, os.path.join(output_dir, f"pickled{i}.txt")) for i in range(workers)]))
+        pickled["total"] = time.perf_counter() - start_time
+        pickled["size"] = len(payload)
+
+        start_time = time.perf_counter()
+        with SharedNetwork.freeze(data) as network:
+            shared = _slowest(pool.map(_write_shared, [(network.name, os.path.join(output_dir, f"shared{i}.txt")) for i in range(workers)]))
+            shared["total"] = time.perf_counter() - start_time
+            shared["size"] = network.memory.size
+
+        # A consumer that only reads the network: counts from the unpickled objects against counts from the raw arrays
+        start_time = time.perf_counter()
+        payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        results = pool.map(_count_pickled, [payload] * workers)
+        pickled_arrays = _slowest([timing[:2] for timing in results])
+        pickled_arrays["total"] = time.perf_counter() - start_time
+        expected = results[0][2]
+
+        start_time = time.perf_counter()
+        with SharedNetwork.freeze(data) as network:
+            results = pool.map(_count_shared, [network.name] * workers)
+            shared_arrays = _slowest([timing[:2] for timing in results])
+            shared_arrays["total"] = time.perf_counter() - start_time
+        same_counts = all(counts == expected for _, _, counts in results)
+
+        identical = all(filecmp.cmp(reference, os.path.join(output_dir, f"{kind}{i}.txt"), shallow=False)
+                        for kind in ("pickled", "shared") for i in range(workers))
+
+    return {
+        "counts": {"n_species": len(data["species"]), "n_cond_reactions": len(data["cond_reactions"]),
+                   "n_cll_reactions": len(data["cll_reactions"])},
+        "pickled": pickled,
+        "shared": shared,
+        "identical": identical,
+        "pickled_read": pickled_arrays,
+        "shared_read": shared_arrays,
+        "same_counts": same_counts,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare handing a generated network to worker processes pickled or in shared memory.")
+    parser.add_argument("-r", "--rungs", nargs="+", choices=list(SIZE_LADDER), default=list(SIZE_LADDER), help="Rungs of the size ladder to run.")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="Worker processes, each one writes the output.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the synthetic chemistries and of the generation.")
+    args = parser.parse_args()
+
+    for name in args.rungs:
+        result = benchmark_shared_network(SIZE_LADDER[name], workers=args.workers, seed=args.seed)
+        counts = result["counts"]
+        print(f"Rung '{name}': {counts['n_species']} species, {counts['n_cond_reactions']} cond and {counts['n_cll_reactions']} cll reactions")
+        for kind in ("pickled", "shared"):
+            values = result[kind]
+            print(f"\t{kind:<8} {values['size'] / 2**20:>8.2f} MiB   load {values['load']:.4f} s   write {values['write']:.4f} s   "
+                  f"total {values['total']:.4f} s")
+        for kind in ("pickled", "shared"):
+            values = result[f"{kind}_read"]
+            print(f"\t{kind:<8} read only, {'objects' if kind == 'pickled' else 'arrays':<7}   load {values['load']:.4f} s   "
+                  f"count {values['write']:.4f} s   total {values['total']:.4f} s")
+        if not result["identical"]:
+            print("\tThe outputs written from the shared network differ from the original output")
+        if not result["same_counts"]:
+            print("\tThe counts read from the shared arrays differ from the original network")
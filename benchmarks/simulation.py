@@ -0,0 +1,140 @@
+import os
+import time
+import random
+import argparse
+import tempfile
+from .synthetic import synthetic_chemistry
+from .pipeline import SIZE_LADDER
+from generator import create_generator
+from chemistryIO.generator_io import GeneratorIO
+from utils.logger import Logger
+from utils.mass_action import compile_network, simulate, MassActionSystem
+
+DEFAULT_T_END = 1.0
+DEFAULT_STEPS = 200
+RHS_REPEAT = 50
+
+
+def read_reference_network(path):
+    # The reference integrator reads the output line by line: species, membrane lines, then reaction lines
+    species, membrane, reactions = [], [], []
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                break
+            name, concentration, _ = line.split()
+            species.append((name, float(concentration)))
+        for line in file:
+            if not line.strip():
+                continue
+            left, right = line.rstrip("\n").split(" > ")
+            right, speed = right.split(" ; ")
+            try:
+                membrane.append((right, float(left), float(speed)))
+            except ValueError:
+                reactions.append((left.split(" + "), right.split(" + "), float(speed)))
+    return species, membrane, reactions
+
+
+def reference_derivatives(x, membrane, reactions):
+    dx = dict.fromkeys(x, 0.0)
+    for name, external, diffusion in membrane:
+        dx[name] += diffusion * (external - x[name])
+    for reactants, products, speed in reactions:
+        rate = speed
+        for name in reactants:
+            rate *= x[name]
+        for name in reactants:
+            dx[name] -= rate
+        for name in products:
+            dx[name] += rate
+    return dx
+
+
+def reference_integrate(x, membrane, reactions, t_end, steps):
+    # Fixed step RK4 on dicts of concentrations
+    h = t_end / steps
+    for _ in range(steps):
+        k1 = reference_derivatives(x, membrane, reactions)
+        k2 = reference_derivatives({n: x[n] + h / 2 * k1[n] for n in x}, membrane, reactions)
+        k3 = reference_derivatives({n: x[n] + h / 2 * k2[n] for n in x}, membrane, reactions)
+        k4 = reference_derivatives({n: x[n] + h * k3[n] for n in x}, membrane, reactions)
+        x = {n: x[n] + h / 6 * (k1[n] + 2 * k2[n] + 2 * k3[n] + k4[n]) for n in x}
+    return x
+
+
+def benchmark_simulation(params, seed=0, t_end=DEFAULT_T_END, steps=DEFAULT_STEPS, methods=("BDF",)):
+    # numpy is only needed by the simulator, it is imported with it
+    import numpy as np
+    Logger.set_debug_mode(False)
+    generatorIO = GeneratorIO(input_file="bench", output_file="bench")
+    data = create_generator(generatorIO.parse_lines(synthetic_chemistry(seed=seed, **params).splitlines()), seed).run_generation()
+    results = {"counts": {"n_species": len(data["species"])}}
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        generatorIO.output_file = os.path.join(output_dir, "bench.txt")
+        generatorIO.write_data(data)
+        start_time = time.perf_counter()
+        species, membrane, reactions = read_reference_network(generatorIO.output_file)
+        results["reference"] = {"load": time.perf_counter() - start_time}
+
+    start_time = time.perf_counter()
+    network = compile_network(data)
+    system = MassActionSystem(network)
+    results["vectorized"] = {"load": time.perf_counter() - start_time}
+    results["counts"]["n_reactions"] = len(network["speeds"])
+
+    # The generated concentrations barely react in a second, both sides start from the same random state
+    rng = random.Random(seed)
+    initial = np.array([rng.uniform(0.5, 1.5) for _ in network["species"]])
+    x = dict(zip(network["species"], initial))
+
+    start_time = time.perf_counter()
+    for _ in range(RHS_REPEAT):
+        reference = reference_derivatives(x, membrane, reactions)
+    results["reference"]["rhs"] = (time.perf_counter() - start_time) / RHS_REPEAT
+    start_time = time.perf_counter()
+    for _ in range(RHS_REPEAT):
+        vectorized = system.derivatives(0.0, initial)
+    results["vectorized"]["rhs"] = (time.perf_counter() - start_time) / RHS_REPEAT
+    reference = np.array([reference[name] for name, _ in species])
+    results["rhs_error"] = float(np.max(np.abs(vectorized - reference)) / (np.max(np.abs(reference)) or 1.0))
+
+    start_time = time.perf_counter()
+    with np.errstate(all="ignore"):
+        final = reference_integrate(x, membrane, reactions, t_end, steps)
+    results["reference"]["integrate"] = time.perf_counter() - start_time
+    final = np.array([final[name] for name, _ in species])
+    # A fixed step explicit integrator blows up on a stiff network, there is nothing to compare with then
+    results["reference"]["diverged"] = not np.all(np.isfinite(final))
+    for method in methods:
+        start_time = time.perf_counter()
+        result = simulate(network, t_end, 2, method=method, initial=initial, rtol=1e-6, atol=1e-9)
+        results[method] = {"integrate": time.perf_counter() - start_time, "n_derivatives": result["n_derivatives"],
+                           "error": None if results["reference"]["diverged"] else
+                           float(np.max(np.abs(result["concentrations"][-1] - final) / np.abs(final)))}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the vectorized mass-action simulator with a line-by-line pure Python integrator.")
+    parser.add_argument("-r", "--rungs", nargs="+", choices=list(SIZE_LADDER), default=list(SIZE_LADDER), help="Rungs of the size ladder to run.")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="Seed of the synthetic chemistries, of the generation and of the initial state.")
+    parser.add_argument("-t", "--t-end", type=float, default=DEFAULT_T_END, help="Integrated time (default: %(default)s).")
+    parser.add_argument("--steps", type=int, default=DEFAULT_STEPS, help="RK4 steps of the reference integrator (default: %(default)s).")
+    parser.add_argument("-m", "--methods", nargs="+", default=["BDF"], help="Integrators of the simulator to time (the numpy-only 'builtin' one is much slower on large networks).")
+    args = parser.parse_args()
+
+    for name in args.rungs:
+        result = benchmark_simulation(SIZE_LADDER[name], seed=args.seed, t_end=args.t_end, steps=args.steps, methods=args.methods)
+        reference, vectorized = result["reference"], result["vectorized"]
+        print(f"Rung '{name}': {result['counts']['n_species']} species, {result['counts']['n_reactions']} reactions")
+        print(f"\tload       reference {reference['load']:.4f} s   vectorized {vectorized['load']:.4f} s")
+        print(f"\tderivative reference {reference['rhs'] * 1e3:.3f} ms  vectorized {vectorized['rhs'] * 1e3:.3f} ms  "
+              f"({reference['rhs'] / vectorized['rhs']:.1f}x, max relative difference {result['rhs_error']:.1e})")
+        print(f"\tintegrate  reference RK4 {reference['integrate']:.4f} s ({4 * args.steps} derivatives"
+              f"{', diverged: the step is too large for this stiff network' if reference['diverged'] else ''})")
+        for method in args.methods:
+            values = result[method]
+            difference = "" if values["error"] is None else f", max relative difference {values['error']:.1e}"
+            print(f"\t           {method:<13} {values['integrate']:.4f} s ({values['n_derivatives']} derivatives{difference})")
@@ -0,0 +1,108 @@
+import random
+import string
+import argparse
+
+LENGTH_DISTRIBUTIONS = ["uniform", "geometric"]
+
+
+def _random_length(rng, min_length, max_length, length_distribution):
+    if length_distribution == "geometric":
+        # every extra character is half as likely as the previous one
+        length = min_length
+        while length < max_length and rng.random() < 0.5:
+            length += 1
+        return length
+    return rng.randint(min_length, max_length)
+
+
+def _random_name(rng, alphabet, length):
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def synthetic_chemistry(alphabet_size=2, n_species=10, min_length=1, max_length=4, length_distribution="uniform",
+                        n_cond_classes=2, n_cll_classes=2, ML=4, cll_ml_active="OFF",
+                        catalyzer_lengths=(2, 4), n_cond_catalyzers=2, n_cll_catalyzers=1, both_on="OFF", seed=0):
+    if not 1 <= alphabet_size <= len(string.ascii_uppercase):
+        raise ValueError(f"alphabet_size must be between 1 and {len(string.ascii_uppercase)}")
+    if length_distribution not in LENGTH_DISTRIBUTIONS:
+        raise ValueError(f"length_distribution must be one of {LENGTH_DISTRIBUTIONS}")
+
+    rng = random.Random(seed)
+    alphabet = string.ascii_uppercase[:alphabet_size]
+
+    # The monomers are always present, the rest of the seed species follow the length distribution
+    names = list(alphabet[:n_species])
+    seen = set(names)
+    max_attempts = 100 * n_species
+    while len(names) < n_species and max_attempts:
+        max_attempts -= 1
+        name = _random_name(rng, alphabet, _random_length(rng, max(min_length, 1), max_length, length_distribution))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+
+    # The catalyzer length range must contain at least one seed species
+    if not any(catalyzer_lengths[0] <= len(name) <= catalyzer_lengths[1] for name in names):
+        names.append(_random_name(rng, alphabet, catalyzer_lengths[0]))
+
+    lines = ["SYSTEM", f"ML {ML}", f"CLL_ML_ACTIVE {cll_ml_active}", "", "SPECIES", "Cont 1.35E-16 0 F"]
+    for name in names:
+        if len(name) <= 2:
+            lines.append(f"{name} 1.00E-15 0. T 10 1.00E-18")
+        else:
+            lines.append(f"{name} 1.00E-15 0. F")
+
+    # Every length a species can reach in the closure gets a length class
+    longest = max(2 * ML, max_length)
+    lines += ["", "LEN_CLASSES"]
+    lines.append(f"{','.join(str(length) for length in range(1, longest + 1))} 0.3 0.3 2")
+
+    lines += ["", "CATALYZER_PARAMS", f"{catalyzer_lengths[0]},{catalyzer_lengths[1]}",
+              str(n_cond_catalyzers), str(n_cll_catalyzers), both_on]
+
+    lines += ["", "REACTIONS"]
+    classes = set()
+    while len(classes) < n_cond_classes:
+        classes.add((_random_name(rng, alphabet, rng.randint(1, 2)), _random_name(rng, alphabet, rng.randint(1, 2))))
+    for reactant_1, reactant_2 in sorted(classes):
+        lines.append(f"R-{reactant_1} {reactant_2}-R {round(rng.uniform(0.1, 1.0), 2)}")
+
+    classes = set()
+    while len(classes) < n_cll_classes:
+        pattern = _random_name(rng, alphabet, rng.randint(2, 3))
+        classes.add((pattern, rng.randint(1, len(pattern) - 1)))
+    for pattern, n_split in sorted(classes):
+        lines.append(f"R-{pattern}-R {n_split} {round(rng.uniform(0.1, 1.0), 2)}")
+
+    return "\n".join(lines) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic input chemistry for the generator.")
+    parser.add_argument("output", help="Path of the input file to write.")
+    parser.add_argument("--alphabet-size", type=int, default=2)
+    parser.add_argument("--n-species", type=int, default=10)
+    parser.add_argument("--min-length", type=int, default=1)
+    parser.add_argument("--max-length", type=int, default=4)
+    parser.add_argument("--length-distribution", choices=LENGTH_DISTRIBUTIONS, default="uniform")
+    parser.add_argument("--n-cond-classes", type=int, default=2)
+    parser.add_argument("--n-cll-classes", type=int, default=2)
+    parser.add_argument("--ml", type=int, default=4)
+    parser.add_argument("--cll-ml-active", choices=["ON", "OFF"], default="OFF")
+    parser.add_argument("--catalyzer-lengths", type=int, nargs=2, default=[2, 4])
+    parser.add_argument("--n-cond-catalyzers", type=int, default=2)
+    parser.add_argument("--n-cll-catalyzers", type=int, default=1)
+    parser.add_argument("--both-on", choices=["ON", "OFF"], default="OFF")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    content = synthetic_chemistry(alphabet_size=args.alphabet_size, n_species=args.n_species,
+                                  min_length=args.min_length, max_length=args.max_length,
+                                  length_distribution=args.length_distribution,
+                                  n_cond_classes=args.n_cond_classes, n_cll_classes=args.n_cll_classes,
+                                  ML=args.ml, cll_ml_active=args.cll_ml_active,
+                                  catalyzer_lengths=tuple(args.catalyzer_lengths),
+                                  n_cond_catalyzers=args.n_cond_catalyzers, n_cll_catalyzers=args.n_cll_catalyzers,
+                                  both_on=args.both_on, seed=args.seed)
+    with open(args.output, 'w') as file:
+        file.write(content)
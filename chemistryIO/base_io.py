@@ -1,33 +1,21 @@
 import sys
 from .parsers import parse_species, parse_catalyzer_param, parse_system_param, parse_reactions, parse_len_classes
 from classes import SystemParameters
-from .config_handler import config_handler
+from .config_handler import config
 from utils.constants import *
 from utils.logger import Logger
 
 class BaseIO:
+    required_sections = [SPECIES_SECTION, CATALYZER_PARAMS_SECTION, REACTIONS_SECTION, SYSTEM_SECTION, LEN_CLASSES_SECTION]
+
     def __init__(self, input_file, output_file=None):
-        self.input_file = f"{config_handler.input_dir}/{input_file}.{config_handler.output_fmt}"
-        self.output_file = f"{config_handler.output_dir}/{output_file if output_file is not None else DEFAULT_OUTPUT_FILE}.{config_handler.output_fmt}"
+        self.input_file = f"{config.input_dir}/{input_file}.{config.output_fmt}"
+        self.output_file = f"{config.output_dir}/{output_file if output_file is not None else DEFAULT_OUTPUT_FILE}.{config.output_fmt}"
 
     def parse_data(self):
-        data = {}
-        current_section = None
-        catalyzer_params_counter = 0
         try:
             with open(self.input_file, 'r') as file:
-                for line in file:
-                    line = line.strip()
-                    if not line or line.startswith('#'):
-                        continue
-                    data, current_section, catalyzer_params_counter = self._process_line(line, data, current_section, catalyzer_params_counter)
-
-            required_sections = [SPECIES_SECTION, CATALYZER_PARAMS_SECTION, REACTIONS_SECTION, SYSTEM_SECTION, LEN_CLASSES_SECTION]
-            for section in required_sections:
-                if section not in data:
-                    raise Exception(f"Error: Missing section '{section}' in input file.")
-
-            data['system'].validate()
+                data = self.parse_lines(file)
         except FileNotFoundError:
             Logger.error("Error: File not found.")
             sys.exit(1)
@@ -36,6 +24,26 @@ class BaseIO:
             sys.exit(1)
         return data
 
+    def parse_lines(self, lines):
+        data = {}
+        current_section = None
+        catalyzer_params_counter = 0
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            data, current_section, catalyzer_params_counter = self._process_line(line, data, current_section, catalyzer_params_counter)
+
+        for section in self.required_sections:
+            if section not in data:
+                raise Exception(f"Error: Missing section '{section}' in input file.")
+
+        self._validate(data)
+        return data
+
+    def _validate(self, data):
+        data['system'].validate()
+
     def _process_line(self, line, data, current_section, catalyzer_params_counter):
         if line.startswith(SPECIES):
             current_section = SPECIES_SECTION
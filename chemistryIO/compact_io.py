@@ -0,0 +1,67 @@
+COMPACT_HEADER = "CHEMICAL-GENERATOR COMPACT 1"
+CATALYZER_SETS = "CATALYZER SETS"
+CONDENSATIONS = "CONDENSATIONS"
+CLEAVAGES = "CLEAVAGES"
+
+# The compact output has the species and membrane lines of the expanded one, then every catalyzer set once
+# ("<id> <catalyzer> <catalyzer> ...") and every generated reaction once ("<reactants> > <products> ; <speed> ; <set id>"),
+# condensations then cleavages. Each reaction stands for one expanded line per catalyzer of its set, in set order:
+# "<reactants> + <catalyzer> > <products> + <catalyzer> ; <speed>".
+
+
+def catalyzer_sets(reaction_classes):
+    # Ids of the distinct catalyzer sets of the classes, in order of first use
+    sets = {}
+    class_sets = {}
+    for reaction_class in reaction_classes:
+        if reaction_class in class_sets:
+            continue
+        key = tuple(str(catalyzer.species) for catalyzer in reaction_class.catalyzers)
+        class_sets[reaction_class] = sets.setdefault(key, len(sets))
+    return sets, class_sets
+
+
+def expand_line(line, sets):
+    reaction, speed, set_id = line.split(" ; ")
+    reactants, products = reaction.split(" > ")
+    return [f"{reactants} + {catalyzer} > {products} + {catalyzer} ; {speed}\n" for catalyzer in sets[int(set_id)]]
+
+
+def expand_compact(compact_file, output_file):
+    # Streams the compact output back to the expanded format, only the catalyzer sets are kept in memory
+    counts = {"cond": 0, "cll": 0}
+    with open(compact_file, 'r', encoding="utf-8") as compact, open(output_file, 'w', encoding="utf-8") as output:
+        if compact.readline().rstrip("\n") != COMPACT_HEADER:
+            raise ValueError(f"{compact_file} is not a compact generator output.")
+
+        # species and membrane lines are copied as they are
+        for line in compact:
+            if line.rstrip("\n") == CATALYZER_SETS:
+                break
+            output.write(line)
+        else:
+            raise ValueError(f"{compact_file} has no {CATALYZER_SETS} section.")
+
+        sets = {}
+        for line in compact:
+            line = line.rstrip("\n")
+            if line == CONDENSATIONS:
+                break
+            set_id, *catalyzers = line.split(" ")
+            sets[int(set_id)] = catalyzers
+        else:
+            raise ValueError(f"{compact_file} has no {CONDENSATIONS} section.")
+
+        section = "cond"
+        for line in compact:
+            line = line.rstrip("\n")
+            if line == CLEAVAGES:
+                output.write("\n")
+                section = "cll"
+                continue
+            expanded = expand_line(line, sets)
+            output.writelines(expanded)
+            counts[section] += len(expanded)
+        if section != "cll":
+            raise ValueError(f"{compact_file} has no {CLEAVAGES} section.")
+    return counts
@@ -1,6 +1,48 @@
 import configparser
 from utils.constants import CONFIG_FILE
 
+
+class ConfigSnapshot:
+    # Read-only: every property is resolved once, in snapshot()
+    __slots__ = ("input_dir", "output_dir", "output_fmt",
+                 "print_function_time", "print_species_involved", "print_species_info", "print_catalyzer_info", "print_reaction_info",
+                 "external_concentration", "diffusion_constant", "catalyzer_selection_probability", "default_concentration", "default_contribution")
+
+    def __init__(self,
+                 # DEFAULT
+                 input_dir: str | None = None,
+                 output_dir: str | None = None,
+                 output_fmt: str | None = None,
+                 # DEBUG
+                 print_function_time: bool = False,
+                 print_species_involved: bool = False,
+                 print_species_info: bool = False,
+                 print_catalyzer_info: bool = False,
+                 print_reaction_info: bool = False,
+                 # CHEMISTRY
+                 external_concentration: float | None = None,
+                 diffusion_constant: float | None = None,
+                 catalyzer_selection_probability: float | None = None,
+                 default_concentration: float | None = None,
+                 default_contribution: float | None = None):
+        values = locals()
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"ConfigSnapshot is read-only, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"ConfigSnapshot is read-only, cannot delete '{name}'")
+
+    def __reduce__(self):
+        # Pickled through __init__, the default protocol would call __setattr__
+        return ConfigSnapshot, tuple(getattr(self, name) for name in self.__slots__)
+
+    def __repr__(self):
+        return f"ConfigSnapshot({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+
 class ConfigHandler:
     _instance = None
 
@@ -49,4 +91,15 @@ class ConfigHandler:
         
         raise AttributeError(f"ConfigHandler has no property '{name}'")
 
+    def snapshot(self):
+        # Resolve and convert every known property once, missing ones keep their default
+        values = {}
+        for name in ConfigSnapshot.__slots__:
+            try:
+                values[name] = getattr(self, name)
+            except AttributeError:
+                continue
+        return ConfigSnapshot(**values)
+
 config_handler = ConfigHandler(CONFIG_FILE)
+config = config_handler.snapshot()
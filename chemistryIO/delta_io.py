@@ -0,0 +1,259 @@
+import hashlib
+from array import array
+from collections import deque
+from itertools import islice
+from utils.logger import Logger
+
+PATCH_HEADER = "CHEMICAL-GENERATOR PATCH 1"
+# A new line matching an old one further ahead only skips the old lines in between if the next ones match too
+CONFIRM_LINES = 4
+READ_CHUNK = 1 << 20
+
+# The output is split in two sections: the species lines, padded to the longest name and concentration, and the
+# body (membrane lines and reactions) from the first empty line on. Species lines are compared without their
+# padding, the body line by line. A patch lists, for each section, runs of old lines to keep (= n) or to drop
+# (- n) and the new lines to insert (+ line), so it is applied in one pass over the old output.
+
+
+def _items(path):
+    # Lines without their newline, the last one may not have it
+    with open(path, 'r', encoding="utf-8", newline="") as file:
+        for line in file:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def _ends_with_newline(path):
+    with open(path, 'rb') as file:
+        file.seek(0, 2)
+        if not file.tell():
+            return True
+        file.seek(-1, 2)
+        return file.read(1) == b"\n"
+
+
+class _Sections:
+    def __init__(self, items):
+        self.items = iter(items)
+        self.separator = None
+
+    def species(self):
+        for item in self.items:
+            if item == "":
+                self.separator = item
+                return
+            yield item
+
+    def body(self):
+        if self.separator is not None:
+            yield self.separator
+        yield from self.items
+
+
+def _species_record(line):
+    return " ".join(line.split())
+
+
+def _render_species(record, widths):
+    name, concentration, contrib = record.split(" ")
+    return f"{name.ljust(widths[0])} {concentration.ljust(widths[1])} {contrib}"
+
+
+def species_widths(path):
+    # Padding of the new species lines as write_data computes it, None when they are not in that format
+    records = [line.split() for line in _Sections(_items(path)).species()]
+    if not records or any(len(record) != 3 for record in records):
+        return None
+    widths = (max(len(record[0]) for record in records) + 2, max(len(record[1]) for record in records) + 2)
+    for line in _Sections(_items(path)).species():
+        if _render_species(_species_record(line), widths) != line:
+            return None
+    return widths
+
+
+class _OldIndex:
+    # Hashes of the old lines by position, and positions by hash: the old output is never held in memory
+    def __init__(self, hashes):
+        self.hashes = array('q', hashes)
+        self.first = {}
+        self.more = {}
+        for position, line_hash in enumerate(self.hashes):
+            if line_hash in self.first:
+                self.more.setdefault(line_hash, deque()).append(position)
+            else:
+                self.first[line_hash] = position
+
+    def next_position(self, line_hash, pointer):
+        position = self.first.get(line_hash)
+        while position is not None and position < pointer:
+            more = self.more.get(line_hash)
+            position = more.popleft() if more else None
+            self.first[line_hash] = position
+        return position
+
+
+class _PatchWriter:
+    def __init__(self, file):
+        self.file = file
+        self.op = None
+        self.count = 0
+        self.stats = {"kept": 0, "removed": 0, "added": 0}
+
+    def run(self, op, count):
+        if op != self.op:
+            self.flush()
+            self.op = op
+        self.count += count
+        self.stats["kept" if op == "=" else "removed"] += count
+
+    def insert(self, line):
+        self.flush()
+        self.file.write(f"+ {line}\n")
+        self.stats["added"] += 1
+
+    def flush(self):
+        if self.count:
+            self.file.write(f"{self.op} {self.count}\n")
+        self.op = None
+        self.count = 0
+
+
+def _diff_section(writer, index, new_items):
+    # Greedy monotonic matching: a new line is kept when its hash is found at or after the current old line
+    pointer = 0
+    new_items = iter(new_items)
+    window = deque(islice(new_items, CONFIRM_LINES + 1))
+    while window:
+        line_hash, line = window.popleft()
+        next_item = next(new_items, None)
+        if next_item is not None:
+            window.append(next_item)
+
+        position = index.next_position(line_hash, pointer)
+        if position is not None and position > pointer:
+            following = list(islice(window, CONFIRM_LINES))
+            confirmed = all(position + i + 1 < len(index.hashes) and index.hashes[position + i + 1] == following_hash
+                            for i, (following_hash, _) in enumerate(following))
+            if not confirmed:
+                position = None
+        if position is None:
+            writer.insert(line)
+            continue
+        if position > pointer:
+            writer.run("-", position - pointer)
+        writer.run("=", 1)
+        pointer = position + 1
+
+    if pointer < len(index.hashes):
+        writer.run("-", len(index.hashes) - pointer)
+    writer.flush()
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(READ_CHUNK), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def write_delta(old_file, new_file, patch_file):
+    widths = species_widths(new_file)
+    digest, size = _file_digest(new_file)
+
+    # Only the hashes of the old lines are kept (hash() is consistent within the process, the patch is verified)
+    species_key = _species_record if widths else str
+    old_sections = _Sections(_items(old_file))
+    species_index = _OldIndex(hash(species_key(line)) for line in old_sections.species())
+    body_index = _OldIndex(hash(line) for line in old_sections.body())
+
+    with open(patch_file, 'w', encoding="utf-8", newline="") as file:
+        file.write(f"{PATCH_HEADER}\n")
+        file.write(f"SHA256 {digest} {size} {int(_ends_with_newline(new_file))}\n")
+        writer = _PatchWriter(file)
+        new_sections = _Sections(_items(new_file))
+
+        file.write(f"SPECIES {widths[0]} {widths[1]}\n" if widths else "SPECIES RAW\n")
+        _diff_section(writer, species_index, ((hash(species_key(line)), species_key(line)) for line in new_sections.species()))
+        file.write("BODY\n")
+        _diff_section(writer, body_index, ((hash(line), line) for line in new_sections.body()))
+        file.write("END\n")
+
+    # A hash collision would silently corrupt the patch: replay it and compare with the new output
+    if apply_delta(old_file, patch_file) != digest:
+        raise ValueError(f"The patch {patch_file} does not reproduce {new_file}.")
+    return {**writer.stats, "size": size}
+
+
+def _patch_lines(patch_file):
+    with open(patch_file, 'r', encoding="utf-8", newline="") as file:
+        for line in file:
+            yield line[:-1] if line.endswith("\n") else line
+
+
+def _apply_section(patch, old_items, render, end_marker):
+    # New lines of a section, the patch iterator stops after the marker of the next section
+    old_items = iter(old_items)
+    for op in patch:
+        if op == end_marker:
+            break
+        kind, value = op[0], op[2:]
+        if kind == "=":
+            for old_line in islice(old_items, int(value)):
+                yield render(old_line)
+        elif kind == "-":
+            for _ in islice(old_items, int(value)):
+                pass
+        elif kind == "+":
+            yield value
+        else:
+            raise ValueError(f"Unknown patch operation: {op}")
+    for _ in old_items:
+        pass
+
+
+def apply_delta(old_file, patch_file, output_file=None):
+    # Rebuild the new output from the old one, the SHA256 of the result is returned (and checked when written)
+    patch = _patch_lines(patch_file)
+    if next(patch, None) != PATCH_HEADER:
+        raise ValueError(f"{patch_file} is not a patch of the generator output.")
+    _, expected_digest, expected_size, ends_with_newline = next(patch).split(" ")
+    species_header = next(patch).split(" ")
+
+    old_sections = _Sections(_items(old_file))
+    if species_header[1] == "RAW":
+        species = _apply_section(patch, old_sections.species(), str, "BODY")
+    else:
+        widths = (int(species_header[1]), int(species_header[2]))
+        species = (_render_species(record, widths) for record in
+                   _apply_section(patch, (_species_record(line) for line in old_sections.species()), str, "BODY"))
+
+    def new_lines():
+        yield from species
+        yield from _apply_section(patch, old_sections.body(), str, "END")
+
+    digest = hashlib.sha256()
+    file = open(output_file, 'w', encoding="utf-8", newline="") if output_file is not None else None
+    try:
+        previous = None
+        for line in new_lines():
+            if previous is not None:
+                chunk = previous + "\n"
+                digest.update(chunk.encode("utf-8"))
+                if file:
+                    file.write(chunk)
+            previous = line
+        if previous is not None:
+            chunk = previous + ("\n" if ends_with_newline == "1" else "")
+            digest.update(chunk.encode("utf-8"))
+            if file:
+                file.write(chunk)
+    finally:
+        if file:
+            file.close()
+
+    if output_file is not None and digest.hexdigest() != expected_digest:
+        Logger.error(f"{output_file} does not match the patched output (expected SHA256 {expected_digest}, {expected_size} bytes).")
+        raise ValueError(f"{patch_file} does not apply to {old_file}.")
+    return digest.hexdigest()
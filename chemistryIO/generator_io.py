@@ -1,10 +1,10 @@
-from openpyxl import Workbook
-
-from classes import CondReactionClass, CllReactionClass
+import json
 from .base_io import BaseIO
 from utils.constants import *
-from .config_handler import config_handler
+from .config_handler import config
 from utils.logger import Logger
+from utils.network_index import NetworkIndex
+from classes import CondReactionClass
 
 class GeneratorIO(BaseIO):
 
@@ -13,7 +13,7 @@ class GeneratorIO(BaseIO):
         Logger.set_debug_mode(debug)
         self.debug = debug
         self.debug_output_type = debug_output_type
-        self.debug_file = f"{config_handler.output_dir}/{output_file if output_file is not None else DEFAULT_OUTPUT_FILE}.debug."
+        self.debug_file = f"{config.output_dir}/{output_file if output_file is not None else DEFAULT_OUTPUT_FILE}.debug."
 
         self.debug_file = self.output_file.replace(".txt", "") + ".debug."
         if debug_output_type == 'txt-verbose':
@@ -22,31 +22,22 @@ class GeneratorIO(BaseIO):
             self.debug_file += "xls"
         else:
             self.debug_file += "txt"
-
+        self.metrics_file = self.output_file.replace(".txt", "") + ".metrics.json"
+        self.estimate_file = self.output_file.replace(".txt", "") + ".estimate.json"
+        self.raf_file = self.output_file.replace(".txt", "") + ".raf.txt"
+        self.matrices_dir = self.output_file.replace(".txt", "") + ".matrices"
+        self.sampling_file = self.output_file.replace(".txt", "") + ".sampling.json"
+        self.patch_file = self.output_file.replace(".txt", "") + ".patch"
+        self.compact_file = self.output_file.replace(".txt", "") + ".compact.txt"
+        self.simulation_file = self.output_file.replace(".txt", "") + ".simulation.tsv"
+        self.stochastic_file = self.output_file.replace(".txt", "") + ".ssa.tsv"
+        self.profile_file = self.output_file.replace(".txt", "") + ".pstats"
+        self.collapsed_file = self.output_file.replace(".txt", "") + ".collapsed.txt"
 
 
     def write_data(self, data):
         with open(self.output_file, 'w') as file:
-            max_name_length = max(len(str(species.name)) for species in data["species"])
-            max_concentration_length = max(len(str(species.concentration)) for species in data["species"])
-            membrane_cross_species = []
-            for species in data["species"]:
-                if species.can_cross_membrane:
-                    membrane_cross_species.append(species)
-                name_str = str(species.name).ljust(max_name_length + 2) 
-                concentration_str = str(species.concentration).ljust(max_concentration_length + 2) 
-                contrib_str = str(species.contrib) 
-
-                file.write(f"{name_str} {concentration_str} {contrib_str}\n")
-
-            file.write("\n") 
-
-            for species in membrane_cross_species:
-                    external_concentration = species.external_concentration or config_handler.external_concentration
-                    diffusion_constant = species.diffusion_constant or config_handler.diffusion_constant
-                    file.write(f"{external_concentration} > {species.name} ; {diffusion_constant:.2E}\n")
-
-            
+            self.write_species(file, data)
 
             self.counter_cond = 0
             for r in data["cond_reactions"]:  
@@ -62,18 +53,148 @@ class GeneratorIO(BaseIO):
                     file.write(r.reactants[0] + " + " + catalyzer.species + " > " + r.product[0].name + " + " + r.product[1].name + " + " + catalyzer.species + " ; " + str(r.reaction_class.reaction_speed) + "\n")
                     self.counter_cll += 1
 
-            if self.debug:
-                self.print_info(data)
-                if self.debug_output_type == 'txt-verbose':
-                    self.write_debug_info_verbose(data)
-                elif self.debug_output_type == 'excel':
-                    self.write_debug_info_excel(data)
-                else:
-                    self.write_debug_info(data)
-            
-            Logger.info(f'Seed {data["seed"]} has been used for the generation.')
+            self.write_debug_output(data)
+
+    def write_compact(self, data):
+        from .compact_io import COMPACT_HEADER, CATALYZER_SETS, CONDENSATIONS, CLEAVAGES, catalyzer_sets
+        sets, class_sets = catalyzer_sets(r.reaction_class for r in (*data["cond_reactions"], *data["cll_reactions"]))
+        set_sizes = {set_id: len(catalyzers) for catalyzers, set_id in sets.items()}
+        with open(self.compact_file, 'w') as file:
+            file.write(COMPACT_HEADER + "\n")
+            self.write_species(file, data)
+
+            file.write(CATALYZER_SETS + "\n")
+            for catalyzers, set_id in sets.items():
+                file.write(" ".join((str(set_id), *catalyzers)) + "\n")
+
+            file.write(CONDENSATIONS + "\n")
+            self.counter_cond = 0
+            for r in data["cond_reactions"]:
+                set_id = class_sets[r.reaction_class]
+                file.write(r.reactants[0] + " + " + r.reactants[1] + " > " + r.product[0].name + " ; " + str(r.reaction_class.reaction_speed) + " ; " + str(set_id) + "\n")
+                self.counter_cond += set_sizes[set_id]
+
+            file.write(CLEAVAGES + "\n")
+            self.counter_cll = 0
+            for r in data["cll_reactions"]:
+                set_id = class_sets[r.reaction_class]
+                file.write(r.reactants[0] + " > " + r.product[0].name + " + " + r.product[1].name + " ; " + str(r.reaction_class.reaction_speed) + " ; " + str(set_id) + "\n")
+                self.counter_cll += set_sizes[set_id]
+
+            self.write_debug_output(data)
+        Logger.info(f"Compact output ({len(sets)} catalyzer sets, {self.counter_cond + self.counter_cll} expanded reactions) written to {self.compact_file}")
+
+    def write_species(self, file, data):
+        max_name_length = max(len(str(species.name)) for species in data["species"])
+        max_concentration_length = max(len(str(species.concentration)) for species in data["species"])
+        membrane_cross_species = []
+        for species in data["species"]:
+            if species.can_cross_membrane:
+                membrane_cross_species.append(species)
+            name_str = str(species.name).ljust(max_name_length + 2) 
+            concentration_str = str(species.concentration).ljust(max_concentration_length + 2) 
+            contrib_str = str(species.contrib) 
+
+            file.write(f"{name_str} {concentration_str} {contrib_str}\n")
+
+        file.write("\n") 
+
+        default_external_concentration = config.external_concentration
+        default_diffusion_constant = config.diffusion_constant
+        for species in membrane_cross_species:
+                external_concentration = species.external_concentration or default_external_concentration
+                diffusion_constant = species.diffusion_constant or default_diffusion_constant
+                file.write(f"{external_concentration} > {species.name} ; {diffusion_constant:.2E}\n")
+
+    def write_debug_output(self, data):
+        if self.debug:
+            self.print_info(data)
+            if self.debug_output_type == 'txt-verbose':
+                self.write_debug_info_verbose(data)
+            elif self.debug_output_type == 'excel':
+                self.write_debug_info_excel(data)
+            else:
+                self.write_debug_info(data)
+        
+        Logger.info(f'Seed {data["seed"]} has been used for the generation.')
+
+    def write_metrics(self, metrics, data):
+        metrics.write(self.metrics_file,
+                      input_file=self.input_file,
+                      output_file=self.output_file,
+                      seed=data["seed"],
+                      n_species=len(data["species"]),
+                      n_catalyzers=len(data["catalyzers"]),
+                      n_cond_reactions=len(data["cond_reactions"]),
+                      n_cll_reactions=len(data["cll_reactions"]))
+        Logger.info(f"Metrics written to {self.metrics_file}")
+
+    def write_raf(self, raf):
+        with open(self.raf_file, 'w') as file:
+            file.write("MAX RAF\n")
+            file.write(f"Food set: {len(raf['food'])} species\n")
+            file.write(f"RAF set: {len(raf['reactions'])} reactions and {len(raf['species'])} species, found in {raf['rounds']} reduction round(s)\n")
+
+            file.write("\nSPECIES\n")
+            food = set(raf["food"])
+            for name in raf["species"]:
+                file.write(f"{name}{' (food)' if name in food else ''}\n")
+
+            # Same lines as the output, expanded only on the catalyzers that are produced by the RAF set itself
+            file.write("\nREACTIONS\n")
+            for r in raf["reactions"]:
+                for catalyzer in raf["catalysts"][r]:
+                    if isinstance(r.reaction_class, CondReactionClass):
+                        file.write(r.reactants[0] + " + " + r.reactants[1] + " + " + catalyzer + " > " + r.product[0].name + " + " + catalyzer + " ; " + str(r.reaction_class.reaction_speed) + "\n")
+                    else:
+                        file.write(r.reactants[0] + " + " + catalyzer + " > " + r.product[0].name + " + " + r.product[1].name + " + " + catalyzer + " ; " + str(r.reaction_class.reaction_speed) + "\n")
+        Logger.info(f"Max RAF set ({len(raf['reactions'])} reactions) written to {self.raf_file}")
+
+    def write_matrices(self, matrices):
+        from utils.matrices import write_network_matrices
+        write_network_matrices(matrices, self.matrices_dir)
+        Logger.info(f"Matrices ({len(matrices['species'])} species x {len(matrices['rates'])} reactions) written to {self.matrices_dir}")
+
+    def write_simulation(self, result):
+        from utils.mass_action import write_simulation
+        write_simulation(result, self.simulation_file)
+        Logger.info(f"Simulation ({result['method']}, {len(result['times'])} samples, {result['n_derivatives']} derivative evaluations) written to {self.simulation_file}")
+        if not result["success"]:
+            Logger.warning(f"The integration stopped early: {result['message']}")
+
+    def write_stochastic(self, result):
+        from utils.gillespie import write_trajectory
+        write_trajectory(result, self.stochastic_file)
+        Logger.info(f"Stochastic simulation (seed {result['seed']}, {result['n_events']} events, {len(result['times'])} samples) written to {self.stochastic_file}")
+        if result["stop_reason"]:
+            Logger.warning(result["stop_reason"])
+
+    def write_profile(self, profiler, top):
+        profiler.write_pstats(self.profile_file)
+        profiler.write_collapsed(self.collapsed_file)
+        Logger.info(profiler.report(top))
+        Logger.info(f"Profile written to {self.profile_file}, collapsed stacks to {self.collapsed_file}")
+
+    def write_sampling(self, sampling):
+        with open(self.sampling_file, 'w') as file:
+            json.dump({"input_file": self.input_file, "output_file": self.output_file, **sampling}, file)
+        Logger.info(f"Sampling weights (rate {sampling['rate']}) written to {self.sampling_file}")
+
+    def write_delta(self, previous_output):
+        from .delta_io import write_delta
+        stats = write_delta(previous_output, self.output_file, self.patch_file)
+        Logger.info(f"Patch against {previous_output} written to {self.patch_file}: {stats['kept']} lines kept, {stats['removed']} removed, {stats['added']} added")
+
+    def write_estimate(self, estimate):
+        with open(self.estimate_file, 'w') as file:
+            json.dump({"input_file": self.input_file, **estimate}, file, indent=2)
+        Logger.info(f"Size estimate written to {self.estimate_file}")
 
     def write_debug_info_excel(self, data):
+        # openpyxl is heavy to import, load it only when an excel debug file is requested
+        from openpyxl import Workbook
+
+        index = NetworkIndex(data)
         wb = Workbook()
         ws = wb.active
         ws.title = "Debug Info"
@@ -88,17 +209,13 @@ class GeneratorIO(BaseIO):
             name = catalyzer.species
             name_length = len(name)
             n_catalyzed_reactions = len(catalyzer.reactions)
-            catalyzed_cond_reactions = [r for r in catalyzer.reactions if isinstance(r, CondReactionClass)]
-            catalyzed_cll_reactions = [r for r in catalyzer.reactions if isinstance(r, CllReactionClass)]
+            catalyzed_cond_reactions = catalyzer.get_cond_reaction_classes()
+            catalyzed_cll_reactions = catalyzer.get_cll_reaction_classes()
             n_catalyzed_reactions_gen = catalyzer.get_n_catalyzed_reactions()
 
-            counter_cata_reactant = 0
-            for r in data["reaction_classes"]:
-                for gen_r in r.generated_reactions:
-                    if gen_r.is_species_in_reaction(name):
-                        counter_cata_reactant += 1
+            counter_cata_reactant = len(index.consuming(name))
 
-            ws.append([name, name_length, n_catalyzed_reactions, len(catalyzed_cond_reactions), len(catalyzed_cll_reactions),
+            ws.append([str(name), name_length, n_catalyzed_reactions, len(catalyzed_cond_reactions), len(catalyzed_cll_reactions),
                     n_catalyzed_reactions_gen['n_cata_gen_reactions'], n_catalyzed_reactions_gen['n_cata_gen_cond'],
                     n_catalyzed_reactions_gen['n_cata_gen_cll'], counter_cata_reactant])
 
@@ -113,12 +230,12 @@ class GeneratorIO(BaseIO):
             name = species.name
             name_length = len(name)
             species_generator_info = species.get_generator_reaction_info()
-            reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+            reactions_as_reactant = len(index.consuming(name))
             
             unique_catalyzers = [catalyzer.species for catalyzer in species_generator_info['list_unique_catalyzers']]
-            unique_catalyzers_str = ', '.join(unique_catalyzers) if unique_catalyzers else 'None'
+            unique_catalyzers_str = ', '.join(map(str, unique_catalyzers)) if unique_catalyzers else 'None'
 
-            ws.append([name, name_length, species_generator_info['n_generator_reaction'],
+            ws.append([str(name), name_length, species_generator_info['n_generator_reaction'],
                     species_generator_info['n_generator_cond_reaction'], species_generator_info['n_generator_cll_reaction'],
                     species_generator_info['n_catalyzers'], species_generator_info['n_cond_catalyzers'],
                     species_generator_info['n_cll_catalyzers'], reactions_as_reactant, unique_catalyzers_str])
@@ -133,14 +250,14 @@ class GeneratorIO(BaseIO):
         for catalyzer in data["catalyzers"]:
             name = catalyzer.species
             name_length = len(name)
-            species = next(s for s in data["species"] if s.name == name)
+            species = index.get_species(name)
             species_generator_info = species.get_generator_reaction_info()
-            reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+            reactions_as_reactant = len(index.consuming(name))
             
             unique_catalyzers = [catalyzer.species for catalyzer in species_generator_info['list_unique_catalyzers']]
-            unique_catalyzers_str = ', '.join(unique_catalyzers) if unique_catalyzers else 'None'
+            unique_catalyzers_str = ', '.join(map(str, unique_catalyzers)) if unique_catalyzers else 'None'
 
-            ws.append([name, name_length, species_generator_info['n_generator_reaction'],
+            ws.append([str(name), name_length, species_generator_info['n_generator_reaction'],
                     species_generator_info['n_generator_cond_reaction'], species_generator_info['n_generator_cll_reaction'],
                     species_generator_info['n_catalyzers'], species_generator_info['n_cond_catalyzers'],
                     species_generator_info['n_cll_catalyzers'], reactions_as_reactant, unique_catalyzers_str])
@@ -148,6 +265,7 @@ class GeneratorIO(BaseIO):
         wb.save(self.debug_file)
 
     def write_debug_info_verbose(self, data):
+        index = NetworkIndex(data)
         with open(self.debug_file, 'w') as file:
             file.write("CATALYZERS INFO\n\n")
             for catalyzer in data["catalyzers"]:
@@ -156,8 +274,8 @@ class GeneratorIO(BaseIO):
                 file.write(f"{name} (Length: {name_length} chars):\n")
                 n_catalyzed_reactions = len(catalyzer.reactions)
                 file.write(f"\t- Number of total catalyzed reactions: {n_catalyzed_reactions}\n")
-                catalyzed_cond_reactions = [r for r in catalyzer.reactions if isinstance(r, CondReactionClass)]
-                catalyzed_cll_reactions = [r for r in catalyzer.reactions if isinstance(r, CllReactionClass)]
+                catalyzed_cond_reactions = catalyzer.get_cond_reaction_classes()
+                catalyzed_cll_reactions = catalyzer.get_cll_reaction_classes()
                 file.write(f"\t- Number of catalyzed condensation reaction classes: {len(catalyzed_cond_reactions)}\n")
                 file.write(f"\t- Number of catalyzed cleavage reaction classes: {len(catalyzed_cll_reactions)}\n")
                 file.write(f"\t- Catalyzed condensation reaction classes:\n")
@@ -178,11 +296,7 @@ class GeneratorIO(BaseIO):
                 file.write(f"\t- Number of total catalyzed generated condensation reactions: {n_catalyzed_reactions['n_cata_gen_cond']}\n")
                 file.write(f"\t- Number of total catalyzed generated cleavage reactions: {n_catalyzed_reactions['n_cata_gen_cll']}\n")
                 
-                counter_cata_reactant = 0
-                for r in data["reaction_classes"]:
-                    for gen_r in r.generated_reactions:
-                        if gen_r.is_species_in_reaction(name):
-                            counter_cata_reactant += 1
+                counter_cata_reactant = len(index.consuming(name))
 
                 file.write(f"\t- The catalyzers species appears in {counter_cata_reactant} reactions.\n")
                 file.write("\n")
@@ -194,7 +308,7 @@ class GeneratorIO(BaseIO):
                 name_length = len(name)
                 file.write(f"{name} (Length: {name_length} chars):\n")
                 species_generator_info = species.get_generator_reaction_info()
-                reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+                reactions_as_reactant = len(index.consuming(name))
                 
                 file.write(f"\t- Number of reactions that generate the species: {species_generator_info['n_generator_reaction']}\n")
                 file.write(f"\t- Number of cond reactions that generate the species: {species_generator_info['n_generator_cond_reaction']}\n")
@@ -215,9 +329,9 @@ class GeneratorIO(BaseIO):
             for catalyzer in data["catalyzers"]:
                 name = catalyzer.species
                 name_length = len(name)
-                species = next(s for s in data["species"] if s.name == name)
+                species = index.get_species(name)
                 species_generator_info = species.get_generator_reaction_info()
-                reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+                reactions_as_reactant = len(index.consuming(name))
                 
                 file.write(f"{name} (Length: {name_length} chars):\n")
                 file.write(f"\t- Number of reactions that generate the species: {species_generator_info['n_generator_reaction']}\n")
@@ -235,6 +349,7 @@ class GeneratorIO(BaseIO):
                 file.write("\n")
 
     def write_debug_info(self, data):
+        index = NetworkIndex(data)
         with open(self.debug_file, 'w') as file:
             file.write("CATALYZERS\n")
             file.write(f"{'Name':<20} {'Length (chars)':<15} {'Reaction Class (total)':<25} {'Cond Reactions':<15} {'Cll Reactions':<15} "
@@ -245,15 +360,11 @@ class GeneratorIO(BaseIO):
                 name = catalyzer.species
                 name_length = len(name)
                 n_catalyzed_reactions = len(catalyzer.reactions)
-                catalyzed_cond_reactions = [r for r in catalyzer.reactions if isinstance(r, CondReactionClass)]
-                catalyzed_cll_reactions = [r for r in catalyzer.reactions if isinstance(r, CllReactionClass)]
+                catalyzed_cond_reactions = catalyzer.get_cond_reaction_classes()
+                catalyzed_cll_reactions = catalyzer.get_cll_reaction_classes()
                 n_catalyzed_reactions_gen = catalyzer.get_n_catalyzed_reactions()
                 
-                counter_cata_reactant = 0
-                for r in data["reaction_classes"]:
-                    for gen_r in r.generated_reactions:
-                        if gen_r.is_species_in_reaction(name):
-                            counter_cata_reactant += 1
+                counter_cata_reactant = len(index.consuming(name))
                 
                 file.write(f"{name:<20} {name_length:<15} {n_catalyzed_reactions:<25} {len(catalyzed_cond_reactions):<15} "
                         f"{len(catalyzed_cll_reactions):<15} {n_catalyzed_reactions_gen['n_cata_gen_reactions']:<22} "
@@ -274,10 +385,10 @@ class GeneratorIO(BaseIO):
                 
                 species_generator_info = species.get_generator_reaction_info()
                 
-                reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+                reactions_as_reactant = len(index.consuming(name))
                 
                 unique_catalyzers = [catalyzer.species for catalyzer in species_generator_info['list_unique_catalyzers']]
-                unique_catalyzers_str = ', '.join(unique_catalyzers) if unique_catalyzers else 'None'
+                unique_catalyzers_str = ', '.join(map(str, unique_catalyzers)) if unique_catalyzers else 'None'
                 
 
                 file.write(f"{name:<20} {name_length:<15} {species_generator_info['n_generator_reaction']:<22} "
@@ -300,12 +411,12 @@ class GeneratorIO(BaseIO):
             for catalyzer in data["catalyzers"]:
                 name = catalyzer.species
                 name_length = len(name)
-                species = next(s for s in data["species"] if s.name == name)
+                species = index.get_species(name)
                 species_generator_info = species.get_generator_reaction_info()
-                reactions_as_reactant = len([gen_r for r in data["reaction_classes"] for gen_r in r.generated_reactions if gen_r.is_species_consumed(species)])
+                reactions_as_reactant = len(index.consuming(name))
                 
                 unique_catalyzers = [catalyzer.species for catalyzer in species_generator_info['list_unique_catalyzers']]
-                unique_catalyzers_str = ', '.join(unique_catalyzers) if unique_catalyzers else 'None'
+                unique_catalyzers_str = ', '.join(map(str, unique_catalyzers)) if unique_catalyzers else 'None'
                 
                 file.write(f"{name:<20} {name_length:<15} {species_generator_info['n_generator_reaction']:<22} "
                         f"{species_generator_info['n_generator_cond_reaction']:<15} "
@@ -317,37 +428,41 @@ class GeneratorIO(BaseIO):
                 
     def print_info(self, data):
         
-        if config_handler.print_species_info:
+        if config.print_species_info:
+                Logger.flush()
                 print()
                 new_generated_species = [species for species in data["species"] if species.is_in_initial_set == False] 
-                Logger.debug(f"{len(new_generated_species)} new species have beeng generated:")        
-                Logger.debug(", ".join([species.name for species in new_generated_species]))
+                Logger.debug("%d new species have been generated:", len(new_generated_species))
+                Logger.debug("%s", Logger.summary(new_generated_species, "name"))
+                Logger.flush()
                 print()
 
-        if config_handler.print_reaction_info:
+        if config.print_reaction_info:
             counter_cond = sum(len(reaction.get_catalyzers()) for reaction in data['cond_reactions'])
             counter_cll = sum(len(reaction.get_catalyzers()) for reaction in data['cll_reactions'])
 
-            Logger.debug(f"{counter_cond} condensation reactions have been generated")
-            Logger.debug(f"{counter_cll} condensation reactions have been generated")
+            Logger.debug("%d condensation reactions have been generated", counter_cond)
+            Logger.debug("%d cleavage reactions have been generated", counter_cll)
+            Logger.flush()
             print()
 
 
 
-        if config_handler.print_catalyzer_info:
+        if config.print_catalyzer_info:
             Logger.debug("Condensation catalyzers for this chemical are: " )
-            Logger.debug(", ".join(catalyzer.species for catalyzer in data["catalyzers"] if catalyzer.is_cond_catalyzer()))
+            Logger.debug("%s", Logger.summary([catalyzer for catalyzer in data["catalyzers"] if catalyzer.is_cond_catalyzer()], "species"))
 
             Logger.debug("Cleavage catalyzers for this chemical are: " )
-            Logger.debug(", ".join(catalyzer.species for catalyzer in data["catalyzers"] if catalyzer.is_cll_catalyzer()))
+            Logger.debug("%s", Logger.summary([catalyzer for catalyzer in data["catalyzers"] if catalyzer.is_cll_catalyzer()], "species"))
 
             Logger.debug("Assigned reactions for each catalyzer:")
             for catalyzer in data["catalyzers"]:
-                Logger.debug(f"{catalyzer.species}:")
+                Logger.debug("%s:", catalyzer.species)
                 cond_classes = [f'[R-{reaction.generic_reactant_1} + {reaction.generic_reactant_2}-R]' for reaction in catalyzer.get_cond_reaction_classes()]
                 if cond_classes:
-                    Logger.debug(f" Cond: {', '.join(cond_classes)}")
+                    Logger.debug(" Cond: %s", ", ".join(cond_classes))
                 cll_classes = [f'[R-{reaction.generic_reactant}-R]' for reaction in catalyzer.get_cll_reaction_classes()]
                 if cll_classes:
-                    Logger.debug(f" Cll: {', '.join(cll_classes)}")
+                    Logger.debug(" Cll: %s", ", ".join(cll_classes))
+            Logger.flush()
             print()
\ No newline at end of file
@@ -1,9 +1,13 @@
 
 
-from classes import SystemParameters, Species, LengthClass, CondReactionClass, CllReactionClass
 from .base_io import BaseIO
+from .parsers import parse_catalyzer_param
 
 class GenToolIO(BaseIO):
+    required_sections = ['system', 'species', 'catalyzer_params', 'conds', 'clls']
+
+    def _validate(self, data):
+        pass
 
     def _process_line(self, line, data, current_section, catalyzer_params_counter):
         if line.startswith('SYSTEM'):
@@ -37,12 +41,30 @@ class GenToolIO(BaseIO):
             new_params = self._parse_len_classes(line)
             data[current_section].update(new_params)
         elif current_section == 'catalyzer_params':
-            data[current_section].append(self._parse_catalyzer_param(line, catalyzer_params_counter))
+            data[current_section].append(parse_catalyzer_param(line, catalyzer_params_counter))
             catalyzer_params_counter += 1
         elif current_section in ['conds', 'clls']:
             self._parse_conditions_or_cleavage(line, data, current_section)
         return data, catalyzer_params_counter
 
+    def _parse_system_param(self, line, system_data):
+        parts = line.split()
+        if len(parts) != 2:
+            raise ValueError(f"Invalid parameter format: {line}. Check the documentation to understand more about system parameters!")
+        system_data[parts[0]] = parts[1]
+
+    def _parse_species(self, line):
+        parts = line.split()
+        if len(parts) < 3:
+            raise ValueError("Error!\nSpecies correct form:\n<speciename> <concentration> <contribution>")
+        return parts
+
+    def _parse_len_classes(self, line):
+        parts = line.split()
+        if len(parts) != 4:
+            raise ValueError("Error!\nLEN_CLASSES correct form:\n<class lengths> <p_cata_cond> <p_cata_cll> <specificity>")
+        return {parts[0]: parts[1:]}
+
     def _parse_conditions_or_cleavage(self, line, data, current_section):
         parts = line.split()
         if current_section == 'conds' and len(parts) == 3:
@@ -76,10 +98,11 @@ class GenToolIO(BaseIO):
 
             file.write("\nREACTIONS\n")
 
-            for r in data["gen-conds"]["reactions"]:
-                file.write(f'R-{r[0]}\t{r[1]}-R\t{data["gen-conds"]["v"]}\n')
+            # The reaction templates are streamed straight from the generators, never held in a list
+            v = data["gen-conds"]["v"]
+            file.writelines(f'R-{r[0]}\t{r[1]}-R\t{v}\n' for r in data["gen-conds"]["reactions"])
             file.write("\n")
 
-            for r in data["gen-clls"]["reactions"]:
-                file.write(f'R-{r}-R\t{data["gen-clls"]["v"]}\t 1\n')
-            print(f"\nThe chemical {self.output_file} has been generated and is ready to be used as input to the actual chemical generator!\n")
\ No newline at end of file
+            v = data["gen-clls"]["v"]
+            file.writelines(f'R-{r}-R\t{v}\t 1\n' for r in data["gen-clls"]["reactions"])
+            print(f"\nThe chemical {self.output_file} has been generated and is ready to be used as input to the actual chemical generator!\n")
@@ -1,18 +1,25 @@
-import pkgutil
-import inspect
 import importlib
 
-# Walk through the packages in the current directory (__path__)
-for loader, module_name, is_pkg in pkgutil.walk_packages(__path__):
-    module = importlib.import_module(f"{__name__}.{module_name}")
-    
-    # Import all functions from the module
-    for name, obj in inspect.getmembers(module):
-        if inspect.isfunction(obj) and obj.__module__ == module.__name__:
-            globals()[name] = obj
+# Explicit exports, each parser module is only imported the first time one of its functions is accessed
+_EXPORTS = {
+    'parse_catalyzer_param': 'catalyzer_parser',
+    'parse_reactions': 'reaction_parser',
+    'parse_len_classes': 'reaction_parser',
+    'parse_species': 'species_parser',
+    'parse_system_param': 'system_parser',
+}
 
-# Create __all__ to contain only the function names
-__all__ = [name for name, obj in globals().items() if inspect.isfunction(obj) and obj.__module__.startswith(__name__)]
+__all__ = list(_EXPORTS)
 
-# Clean up the imported modules
-del pkgutil, inspect, importlib
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    module = importlib.import_module(f"{__name__}.{_EXPORTS[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -34,4 +34,4 @@ def parse_species(line):
             except ValueError:
                 raise ValueError(f"{SPECIES_INPUT_FORM[5]} (6 col) should be a float.")
 
-    return Species(name, concentration, contrib, can_cross_membrane, external_concentration, diffusion_constant)
+    return Species(name, concentration, contrib, can_cross_membrane, external_concentration, diffusion_constant, is_in_initial_set=True)
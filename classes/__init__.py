@@ -1,16 +1,30 @@
-import pkgutil
-import inspect
 import importlib
 
-# Import all modules in the current package
-for loader, module_name, is_pkg in pkgutil.walk_packages(__path__):
-    module = importlib.import_module(f"{__name__}.{module_name}")
-    for name, obj in inspect.getmembers(module):
-        if inspect.isclass(obj) and obj.__module__ == module.__name__:
-            globals()[name] = obj
+# Explicit exports, each submodule is only imported the first time one of its names is accessed
+_EXPORTS = {
+    'Catalyzer': 'catalyzer',
+    'GeneratedReaction': 'generated_reaction',
+    'LengthClass': 'length_class',
+    'ReactionClass': 'reaction_class',
+    'CondReactionClass': 'reaction_class',
+    'CllReactionClass': 'reaction_class',
+    'Species': 'species',
+    'SpeciesName': 'species_name',
+    'NameTable': 'species_name',
+    'SystemParameters': 'system_parameters',
+}
 
-# Define __all__ dynamically
-__all__ = [name for name, obj in globals().items() if inspect.isclass(obj) and obj.__module__.startswith(__name__)]
+__all__ = list(_EXPORTS)
 
-# Clean up the namespace
-del pkgutil, inspect, importlib
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+    module = importlib.import_module(f"{__name__}.{_EXPORTS[name]}")
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,14 +1,15 @@
 class ReactionClass:
     def __init__(self, reaction_speed):
         self.reaction_speed = reaction_speed
-        self.generated_reactions = [] # Reaction
-        self.catalyzers = []
+        # dicts used as insertion-ordered sets: O(1) membership, iteration in insertion order
+        self.generated_reactions = {} # GeneratedReaction
+        self.catalyzers = {} # Catalyzer
 
     def add_catalyzer(self, catalyzer):
-        self.catalyzers.append(catalyzer)
+        self.catalyzers[catalyzer] = None
 
     def add_generated_reaction(self, generated_reaction):
-            self.generated_reactions.append(generated_reaction)
+            self.generated_reactions[generated_reaction] = None
 
 class CondReactionClass (ReactionClass):
     def __init__(self, reactant1, reactant2, reaction_speed):
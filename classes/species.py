@@ -8,12 +8,22 @@ class Species:
         self.can_cross_membrane = can_cross_membrane
         self.external_concentration = external_concentration
         self.diffusion_constant = diffusion_constant
-        self.generator_reactions = []
+        # dicts used as insertion-ordered sets, the counters are updated as the reactions are added
+        self.generator_reactions = {} # GeneratedReaction
+        self.generator_reaction_classes = {} # ReactionClass of the generator reactions, in order of first appearance
+        self.n_generator_cond_reactions = 0
+        self.n_generator_cll_reactions = 0
         self.is_in_initial_set = is_in_initial_set
 
     def add_generator_reaction(self, reaction):
-        if reaction not in self.generator_reactions:
-            self.generator_reactions.append(reaction)
+        if reaction in self.generator_reactions:
+            return
+        self.generator_reactions[reaction] = None
+        self.generator_reaction_classes.setdefault(reaction.reaction_class)
+        if isinstance(reaction.reaction_class, CondReactionClass):
+            self.n_generator_cond_reactions += 1
+        if isinstance(reaction.reaction_class, CllReactionClass):
+            self.n_generator_cll_reactions += 1
 
     def get_generator_reaction_info(self):
         info = {
@@ -26,21 +36,22 @@ class Species:
             'list_unique_catalyzers': []
         }
         info["n_generator_reaction"] = len(self.generator_reactions)
-        info["n_generator_cond_reaction"] = len([r for r in self.generator_reactions if isinstance(r.reaction_class, CondReactionClass)])
-        info["n_generator_cll_reaction"] = len([r for r in self.generator_reactions if isinstance(r.reaction_class, CllReactionClass)])
-        
-        unique_catalyzers = set()
+        info["n_generator_cond_reaction"] = self.n_generator_cond_reactions
+        info["n_generator_cll_reaction"] = self.n_generator_cll_reactions
 
-        for r in self.generator_reactions:
-            for cata in r.reaction_class.catalyzers:
+        # Catalyzers are assigned to the classes, not to the single reactions: walking the classes in order of
+        # first appearance finds every catalyzer at the same reaction class as walking all the reactions would
+        unique_catalyzers = {}
+        for reaction_class in self.generator_reaction_classes:
+            for cata in reaction_class.catalyzers:
                 if cata not in unique_catalyzers:
-                    unique_catalyzers.add(cata)
+                    unique_catalyzers[cata] = None
                     info['n_catalyzers'] += 1
-                    if isinstance(r.reaction_class, CondReactionClass):
+                    if isinstance(reaction_class, CondReactionClass):
                         info['n_cond_catalyzers'] += 1
-                    if isinstance(r.reaction_class, CllReactionClass):
+                    if isinstance(reaction_class, CllReactionClass):
                         info['n_cll_catalyzers'] += 1
-                        
+
         info['list_unique_catalyzers'] = list(unique_catalyzers)
 
         return info
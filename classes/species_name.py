@@ -0,0 +1,251 @@
+from itertools import chain
+
+# Up to this length a name is a plain string, above it a concatenation of its two parents
+FLAT_NAME_LENGTH = 64
+# Polynomial hash modulo the Mersenne prime 2^61 - 1, with two bases: two different long names sharing a key is
+# unlikely, not impossible, so the names found under a key are compared character by character before one is reused
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASES = (1_000_003, 2_000_029)
+
+
+def _text_hash(text, base):
+    h = 0
+    for char in text:
+        h = (h * base + ord(char)) % HASH_MODULUS
+    return h
+
+
+def _same_text(chunks, other_chunks):
+    # Compares two texts given as chunk iterators, without joining them
+    chunk = other_chunk = ""
+    while True:
+        if not chunk:
+            chunk = next(chunks, None)
+        if not other_chunk:
+            other_chunk = next(other_chunks, None)
+        if chunk is None or other_chunk is None:
+            return chunk is None and other_chunk is None
+        width = min(len(chunk), len(other_chunk))
+        if chunk[:width] != other_chunk[:width]:
+            return False
+        chunk, other_chunk = chunk[width:], other_chunk[width:]
+
+
+class SpeciesName:
+    # Hash-consed name: every name is unique in its NameTable, so two names of a table are equal when they are the
+    # same object. A long name is a node of the concatenation DAG pointing to its parents, with its length, hashes
+    # and first/last characters cached, and it is only materialized by str() (i.e. when the output is written).
+    # A flat name equals its string and hashes like it. A long name hashes from its cached key, without joining it,
+    # so it is only equal to names: compare str(name) with a string.
+    __slots__ = ('text', 'left', 'right', 'length', 'h1', 'h2', 'prefix', 'suffix', 'table', 'hash_value')
+
+    def __len__(self):
+        return self.length
+
+    def __hash__(self):
+        return self.hash_value
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, SpeciesName):
+            # Only names of another table can be a different object with the same text
+            if self.table is other.table or self.length != other.length or (self.h1, self.h2) != (other.h1, other.h2):
+                return False
+            return self.text == other.text if self.text is not None else _same_text(self._chunks(), other._chunks())
+        if isinstance(other, str) and self.text is not None:
+            return self.text == other
+        return NotImplemented
+
+    def _chunks(self):
+        # Leaf strings from left to right, without recursion: the DAG can be as deep as the names are long
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.text is not None:
+                yield node.text
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+
+    def __str__(self):
+        if self.text is not None:
+            return self.text
+        return "".join(self._chunks())
+
+    def __repr__(self):
+        return repr(str(self))
+
+    def __format__(self, format_spec):
+        return format(str(self), format_spec)
+
+    def __iter__(self):
+        if self.text is not None:
+            return iter(self.text)
+        return (char for chunk in self._chunks() for char in chunk)
+
+    def __lt__(self, other):
+        if self.text is not None and other.text is not None:
+            return self.text < other.text
+        # The cached first characters decide most comparisons, otherwise character by character up to the first
+        # difference instead of materializing both names
+        head = self.head(self.table.boundary) if self.text is not None else self.prefix
+        other_head = other.head(other.table.boundary) if other.text is not None else other.prefix
+        width = min(len(head), len(other_head))
+        if head[:width] != other_head[:width]:
+            return head[:width] < other_head[:width]
+        for a, b in zip(self, other):
+            if a != b:
+                return a < b
+        return len(self) < len(other)
+
+    def __gt__(self, other):
+        return other < self
+
+    def __add__(self, other):
+        if isinstance(other, SpeciesName):
+            return self.table.concat(self, other)
+        return str(self) + other
+
+    def __radd__(self, other):
+        return other + str(self)
+
+    def head(self, n):
+        if self.text is not None:
+            return self.text[:n]
+        if n <= len(self.prefix):
+            return self.prefix[:n]
+        chunks = []
+        n_chars = 0
+        for chunk in self._chunks():
+            chunks.append(chunk)
+            n_chars += len(chunk)
+            if n_chars >= n:
+                break
+        return "".join(chunks)[:n]
+
+    def tail(self, n):
+        if self.text is not None:
+            return self.text[-n:] if n else ""
+        if n <= len(self.suffix):
+            return self.suffix[-n:] if n else ""
+        return str(self)[-n:] if n else ""
+
+    def startswith(self, prefix):
+        return self.head(len(prefix)) == prefix
+
+    def endswith(self, suffix):
+        return self.tail(len(suffix)) == suffix
+
+    def find(self, sub, start=0):
+        return str(self).find(sub, start)
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            return str(self)[key]
+        start, stop, _ = key.indices(self.length)
+        return self.table.substring(self, start, max(start, stop))
+
+
+class NameTable:
+    def __init__(self, boundary=0):
+        # Characters cached at both ends of a long name: enough for every reaction pattern to be matched on them
+        self.boundary = boundary
+        self.flat = {}
+        self.nodes = {}
+        self.powers = ({}, {})
+
+    def _power(self, which, length):
+        powers = self.powers[which]
+        power = powers.get(length)
+        if power is None:
+            power = powers[length] = pow(HASH_BASES[which], length, HASH_MODULUS)
+        return power
+
+    def atom(self, text):
+        text = str(text)
+        name = self.flat.get(text)
+        if name is None and len(text) > FLAT_NAME_LENGTH:
+            # A long input name is split in half, so it is a node like the generated ones
+            middle = len(text) // 2
+            return self.concat(self.atom(text[:middle]), self.atom(text[middle:]))
+        if name is None:
+            name = SpeciesName()
+            name.text = text
+            name.left = name.right = name.prefix = name.suffix = None
+            name.length = len(text)
+            name.h1 = _text_hash(text, HASH_BASES[0])
+            name.h2 = _text_hash(text, HASH_BASES[1])
+            name.hash_value = hash(text)
+            name.table = self
+            self.flat[text] = name
+        return name
+
+    def concat(self, left, right):
+        length = left.length + right.length
+        if length <= FLAT_NAME_LENGTH:
+            return self.atom(str(left) + str(right))
+        h1 = (left.h1 * self._power(0, right.length) + right.h1) % HASH_MODULUS
+        h2 = (left.h2 * self._power(1, right.length) + right.h2) % HASH_MODULUS
+        key = (length, h1, h2)
+        candidates = self.nodes.setdefault(key, [])
+        for name in candidates:
+            # Almost always the same parents; otherwise the same text split elsewhere, or a collision of the key
+            if (name.left is left and name.right is right) or _same_text(name._chunks(), chain(left._chunks(), right._chunks())):
+                return name
+        name = SpeciesName()
+        name.text = None
+        name.left = left
+        name.right = right
+        name.length = length
+        name.h1 = h1
+        name.h2 = h2
+        boundary = min(self.boundary, length)
+        name.prefix = left.head(boundary) if left.length >= boundary else str(left) + right.head(boundary - left.length)
+        name.suffix = right.tail(boundary) if right.length >= boundary else left.tail(boundary - right.length) + str(right)
+        name.hash_value = hash(key)
+        name.table = self
+        candidates.append(name)
+        return name
+
+    def substring(self, name, start, stop):
+        if start == 0 and stop == name.length:
+            return name
+        if stop - start <= FLAT_NAME_LENGTH:
+            if name.text is not None:
+                return self.atom(name.text[start:stop])
+            return self.atom(self._slice(name, start, stop))
+        # Largest parents fully inside the slice, from left to right, joined back: the slice shares them
+        pieces = []
+        stack = [(name, start, stop)]
+        while stack:
+            node, start, stop = stack.pop()
+            if start == 0 and stop == node.length:
+                pieces.append(node)
+            elif node.text is not None:
+                pieces.append(self.atom(node.text[start:stop]))
+            else:
+                left_length = node.left.length
+                if stop > left_length:
+                    stack.append((node.right, max(0, start - left_length), stop - left_length))
+                if start < left_length:
+                    stack.append((node.left, start, min(stop, left_length)))
+        substring = pieces.pop()
+        while pieces:
+            substring = self.concat(pieces.pop(), substring)
+        return substring
+
+    def _slice(self, name, start, stop):
+        chunks = []
+        position = 0
+        for chunk in name._chunks():
+            end = position + len(chunk)
+            if end > start:
+                chunks.append(chunk[max(0, start - position):stop - position])
+            if end >= stop:
+                break
+            position = end
+        return "".join(chunks)
+
+    def __len__(self):
+        return len(self.flat) + sum(len(candidates) for candidates in self.nodes.values())
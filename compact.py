@@ -0,0 +1,18 @@
+import sys
+import argparse
+from chemistryIO.compact_io import expand_compact
+from utils.logger import Logger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Expand a compact generator output to the usual one-line-per-catalyzer format.")
+    parser.add_argument("file_path", help="The compact output (<output>.compact.txt).")
+    parser.add_argument("-o", "--output", required=True, help="The expanded output to write.")
+    args = parser.parse_args()
+
+    try:
+        counts = expand_compact(args.file_path, args.output)
+        Logger.info(f"{args.output} written: {counts['cond']} condensation and {counts['cll']} cleavage lines")
+    except (OSError, ValueError) as e:
+        Logger.error(str(e))
+        sys.exit(1)
@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import copy
+import time
+import socket
+import hashlib
+import argparse
+import itertools
+import socketserver
+import multiprocessing
+from collections import OrderedDict
+from utils.constants import DEFAULT_DAEMON_SOCKET, DEFAULT_OUTPUT_FILE
+from utils.logger import Logger
+
+PARSED_CACHE_SIZE = 64
+
+# Per worker cache of parsed inputs, keyed on the file identity or on the inline content hash
+_parsed_cache = OrderedDict()
+
+
+def _warm_up():
+    # Pay for the heavy imports once per worker instead of once per job
+    import generator
+    import chemistryIO.generator_io
+
+
+def _get_parsed_data(generatorIO, job):
+    if job.get("content") is not None:
+        key = ("inline", hashlib.sha1(job["content"].encode()).hexdigest())
+    else:
+        stat = os.stat(generatorIO.input_file)
+        key = (os.path.abspath(generatorIO.input_file), stat.st_mtime_ns, stat.st_size)
+
+    if key in _parsed_cache:
+        _parsed_cache.move_to_end(key)
+    else:
+        if job.get("content") is not None:
+            parsed_data = generatorIO.parse_lines(job["content"].splitlines())
+        else:
+            with open(generatorIO.input_file, 'r') as file:
+                parsed_data = generatorIO.parse_lines(file)
+        _parsed_cache[key] = parsed_data
+        if len(_parsed_cache) > PARSED_CACHE_SIZE:
+            _parsed_cache.popitem(last=False)
+
+    # The generator mutates species and reaction classes, so every job works on its own copy
+    return copy.deepcopy(_parsed_cache[key])
+
+
+def run_job(job):
+    from generator import create_generator
+    from chemistryIO.generator_io import GeneratorIO
+
+    start_time = time.perf_counter()
+    try:
+        debug = job.get("debug", False)
+        generatorIO = GeneratorIO(input_file=job.get("file_path") or "inline",
+                                  output_file=job["output"],
+                                  debug=debug,
+                                  debug_output_type=job.get("output_type") or "txt")
+        parsed_data = _get_parsed_data(generatorIO, job)
+        generator = create_generator(parsed_data, job.get("seed"), legacy_random=job.get("legacy_random", False))
+        generated_data = generator.run_generation()
+        generatorIO.write_data(generated_data)
+    except BaseException as e:
+        # parse errors may end in sys.exit(), they must not take the worker down with them
+        return {"id": job["id"], "status": "error", "message": str(e) or type(e).__name__}
+
+    return {
+        "id": job["id"],
+        "status": "done",
+        "output_file": os.path.abspath(generatorIO.output_file),
+        "debug_file": os.path.abspath(generatorIO.debug_file) if debug else None,
+        "seed": generated_data["seed"],
+        "n_species": len(generated_data["species"]),
+        "n_cond_reactions": len(generated_data["cond_reactions"]),
+        "n_cll_reactions": len(generated_data["cll_reactions"]),
+        "duration": round(time.perf_counter() - start_time, 4),
+        "worker": os.getpid(),
+    }
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+
+    def send(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode())
+        self.wfile.flush()
+
+    def handle(self):
+        daemon = self.server.generator_daemon
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                self.send({"status": "error", "message": f"Invalid request: {e}"})
+                continue
+
+            command = job.get("command", "generate")
+            if command == "ping":
+                self.send({"status": "ok", "workers": daemon.workers, "jobs": daemon.n_jobs})
+            elif command == "shutdown":
+                self.send({"status": "ok"})
+                daemon.shutdown()
+                return
+            elif command == "generate":
+                if job.get("file_path") is None and job.get("content") is None:
+                    self.send({"status": "error", "message": "A job needs either 'file_path' or 'content'."})
+                    continue
+                job = daemon.prepare_job(job)
+                self.send({"id": job["id"], "status": "accepted", "output": job["output"]})
+                self.send(daemon.pool.apply_async(run_job, (job,)).get())
+            else:
+                self.send({"status": "error", "message": f"Unknown command '{command}'."})
+
+
+class GeneratorDaemon:
+    def __init__(self, socket_path=DEFAULT_DAEMON_SOCKET, workers=None):
+        self.socket_path = socket_path
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = None
+        self.server = None
+        self.n_jobs = 0
+        self._job_ids = itertools.count(1)
+
+    def prepare_job(self, job):
+        job = dict(job)
+        job["id"] = next(self._job_ids)
+        self.n_jobs += 1
+        if not job.get("output"):
+            # concurrent jobs must not overwrite each other's default output
+            job["output"] = f"{DEFAULT_OUTPUT_FILE}_{os.getpid()}_{job['id']}"
+        return job
+
+    def serve_forever(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+        # Workers are forked before the server starts accepting jobs, with all the imports already done
+        self.pool = multiprocessing.get_context("fork").Pool(processes=self.workers, initializer=_warm_up)
+        self.server = socketserver.ThreadingUnixStreamServer(self.socket_path, _JobHandler)
+        self.server.daemon_threads = True
+        self.server.generator_daemon = self
+        Logger.info(f"Generator daemon listening on {self.socket_path} with {self.workers} workers")
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.pool.terminate()
+            self.pool.join()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            Logger.info("Generator daemon stopped")
+
+    def shutdown(self):
+        # serve_forever() is running in another thread, shutdown() would deadlock if called from it
+        import threading
+        threading.Thread(target=self.server.shutdown).start()
+
+
+class GeneratorClient:
+    def __init__(self, socket_path=DEFAULT_DAEMON_SOCKET):
+        self.socket_path = socket_path
+
+    def _request(self, request):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(request) + "\n").encode())
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('r') as stream:
+                for line in stream:
+                    yield json.loads(line)
+
+    def submit(self, file_path=None, content=None, output=None, seed=None, debug=False, output_type=None, legacy_random=False):
+        job = {"command": "generate", "file_path": file_path, "content": content, "output": output,
+               "seed": seed, "debug": debug, "output_type": output_type, "legacy_random": legacy_random}
+        yield from self._request(job)
+
+    def ping(self):
+        return next(self._request({"command": "ping"}))
+
+    def shutdown(self):
+        return next(self._request({"command": "shutdown"}))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the generator as a daemon accepting jobs on a Unix domain socket.")
+    parser.add_argument("-socket", default=DEFAULT_DAEMON_SOCKET, help="Path of the Unix domain socket.")
+    parser.add_argument("-w", "--workers", type=int, help="Number of pre-forked worker processes (default: number of CPUs).")
+    parser.add_argument("-stop", action="store_true", help="Stop the daemon listening on the socket.")
+    args = parser.parse_args()
+
+    if args.stop:
+        try:
+            GeneratorClient(args.socket).shutdown()
+        except OSError as e:
+            Logger.error(f"Could not reach the daemon on {args.socket}: {e}")
+            sys.exit(1)
+        sys.exit(0)
+
+    try:
+        GeneratorDaemon(args.socket, args.workers).serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,24 @@
+import sys
+import argparse
+from chemistryIO.delta_io import write_delta, apply_delta
+from utils.logger import Logger
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write or apply a patch between two generator outputs.")
+    parser.add_argument("old_output", help="The previous output.")
+    parser.add_argument("file_path", help="The patch to apply, or the new output with -diff.")
+    parser.add_argument("-o", "--output", required=True, help="The output to rebuild, or the patch to write with -diff.")
+    parser.add_argument("-diff", action="store_true", help="Write the patch from old_output to file_path instead of applying one.")
+    args = parser.parse_args()
+
+    try:
+        if args.diff:
+            stats = write_delta(args.old_output, args.file_path, args.output)
+            Logger.info(f"Patch written to {args.output}: {stats['kept']} lines kept, {stats['removed']} removed, {stats['added']} added")
+        else:
+            apply_delta(args.old_output, args.file_path, args.output)
+            Logger.info(f"{args.output} rebuilt from {args.old_output} and {args.file_path}")
+    except (OSError, ValueError) as e:
+        Logger.error(str(e))
+        sys.exit(1)
@@ -0,0 +1,215 @@
+import sys
+import json
+import heapq
+import queue
+import socket
+import secrets
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from utils.constants import DEFAULT_DISTRIBUTED_PARTITIONS, DISTRIBUTED_RESULT_TIMEOUT
+from utils.logger import Logger
+from utils.matching import condensation_matches, cleavage_matches, partition_rows
+
+MATCHERS = {"cond": condensation_matches, "cll": cleavage_matches}
+# How often the coordinator checks that its local workers are still alive while waiting for results
+POLL_INTERVAL = 1.0
+
+
+def parse_address(address):
+    host, separator, port = address.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Invalid address '{address}', expected HOST:PORT.")
+    return host or "127.0.0.1", int(port)
+
+
+class _WorkerHandler(socketserver.StreamRequestHandler):
+    # One thread per connected worker: takes work units from the queue, sends each with the names the worker does not
+    # have yet, and puts the matches back. A unit whose worker goes away is queued again for the others.
+
+    def send(self, message):
+        self.wfile.write((json.dumps(message) + "\n").encode())
+        self.wfile.flush()
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        try:
+            hello = json.loads(self.rfile.readline() or "null")
+        except json.JSONDecodeError:
+            hello = None
+        if not isinstance(hello, dict) or hello.get("token") != coordinator.token:
+            self.send({"command": "stop", "message": "Invalid token."})
+            return
+
+        coordinator.worker_connected()
+        known = {}
+        try:
+            while True:
+                unit = coordinator.units.get()
+                if unit is None:
+                    self.send({"command": "stop"})
+                    return
+                generation, names = coordinator.lists[unit["kind"]]
+                known_generation, known_length = known.get(unit["kind"], (None, 0))
+                start = known_length if known_generation == generation else 0
+                try:
+                    self.send({"command": "match", **unit, "start": start, "names": names[start:]})
+                    line = self.rfile.readline()
+                except OSError:
+                    line = None
+                if not line:
+                    coordinator.units.put(unit)
+                    return
+                known[unit["kind"]] = (generation, len(names))
+                coordinator.results.put((unit["round"], unit["partition"], json.loads(line)["matches"]))
+        finally:
+            coordinator.worker_disconnected()
+
+
+class ClosureCoordinator:
+    # Matcher of a distributed closure (see utils.matching.LocalMatcher): every condensation and cleavage enumeration
+    # is split in work units, one per partition of the species by a stable hash of their names, and handed to workers
+    # over a JSON-lines TCP work queue. The workers keep the name lists, only the names added since their last unit are
+    # sent. The matches of every partition come back sorted, so merging them gives the order of the single process
+    # loops, and the generator replays them in that order: the network is the one of a single process run.
+    def __init__(self, address=("127.0.0.1", 0), workers=0, token=None, n_partitions=DEFAULT_DISTRIBUTED_PARTITIONS, timeout=DISTRIBUTED_RESULT_TIMEOUT):
+        self.token = token or secrets.token_hex(16)
+        self.n_partitions = n_partitions
+        self.timeout = timeout
+        self.units = queue.Queue()
+        self.results = queue.Queue()
+        self.lists = {}
+        self.generation = 0
+        self.round = 0
+        self.n_workers = 0
+        self.n_units = 0
+        self.lock = threading.Lock()
+
+        self.server = socketserver.ThreadingTCPServer(address, _WorkerHandler)
+        self.server.daemon_threads = True
+        self.server.coordinator = self
+        self.address = self.server.server_address[:2]
+        # The local workers are started before the server thread, they connect once it accepts
+        context = multiprocessing.get_context("fork")
+        self.processes = [context.Process(target=run_worker, args=(self.address, self.token), daemon=True) for _ in range(workers)]
+        for process in self.processes:
+            process.start()
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def worker_connected(self):
+        with self.lock:
+            self.n_workers += 1
+
+    def worker_disconnected(self):
+        with self.lock:
+            self.n_workers -= 1
+
+    def publish(self, kind, names):
+        # A list that only grew keeps its generation, the workers then only receive the new names
+        names = [str(name) for name in names]
+        previous = self.lists.get(kind)
+        if previous is None or names[:len(previous[1])] != previous[1]:
+            self.generation += 1
+            self.lists[kind] = (self.generation, names)
+        else:
+            self.lists[kind] = (previous[0], names)
+
+    def condensation(self, names, patterns):
+        return self.map("cond", names, patterns)
+
+    def cleavage(self, names, patterns):
+        return self.map("cll", names, patterns)
+
+    def map(self, kind, names, patterns):
+        self.publish(kind, names)
+        self.round += 1
+        for partition in range(self.n_partitions):
+            self.units.put({"kind": kind, "round": self.round, "partition": partition, "n_partitions": self.n_partitions, "patterns": patterns})
+        self.n_units += self.n_partitions
+
+        results = {}
+        waited = 0.0
+        while len(results) < self.n_partitions:
+            try:
+                result_round, partition, matches = self.results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                waited += POLL_INTERVAL
+                if self.processes and self.n_workers == 0 and not any(process.is_alive() for process in self.processes):
+                    raise RuntimeError("Every local worker has exited before the closure was finished.")
+                if waited >= self.timeout:
+                    raise RuntimeError(f"No work unit finished in {self.timeout:.0f} s ({self.n_workers} workers connected).")
+                continue
+            waited = 0.0
+            # A unit queued again after its worker went away may come back twice, and only the current round counts
+            if result_round == self.round:
+                results[partition] = matches
+        return list(heapq.merge(*(map(tuple, results[partition]) for partition in range(self.n_partitions))))
+
+    def close(self):
+        for _ in range(max(self.n_workers, len(self.processes))):
+            self.units.put(None)
+        for process in self.processes:
+            process.join(timeout=POLL_INTERVAL)
+            if process.is_alive():
+                process.terminate()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_worker(address, token):
+    # Matches the work units of a coordinator until it says stop. The name lists grow with the closure, they are kept
+    # between units and only extended (or replaced) with what the coordinator sends
+    lists = {}
+    with socket.create_connection(tuple(address)) as sock, sock.makefile("rw", encoding="utf-8") as stream:
+        stream.write(json.dumps({"token": token}) + "\n")
+        stream.flush()
+        n_units = 0
+        for line in stream:
+            message = json.loads(line)
+            if message["command"] == "stop":
+                if message.get("message"):
+                    raise ConnectionError(message["message"])
+                break
+            names = lists.setdefault(message["kind"], [])
+            del names[message["start"]:]
+            names.extend(message["names"])
+            rows = partition_rows(names, message["partition"], message["n_partitions"])
+            matches = MATCHERS[message["kind"]](names, [tuple(pattern) for pattern in message["patterns"]], rows)
+            stream.write(json.dumps({"matches": matches}) + "\n")
+            stream.flush()
+            n_units += 1
+    return n_units
+
+
+def _run_remote_worker(address, token):
+    try:
+        return run_worker(address, token)
+    except (OSError, ConnectionError) as e:
+        Logger.error(f"Worker stopped: {e}")
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker of a distributed closure: connects to the coordinator started by generator.py --listen.")
+    parser.add_argument("address", help="HOST:PORT of the coordinator.")
+    parser.add_argument("--token", required=True, help="Token printed by the coordinator.")
+    parser.add_argument("-w", "--workers", type=int, default=1, help="Number of worker processes to start on this machine (default: %(default)s).")
+    args = parser.parse_args()
+
+    try:
+        address = parse_address(args.address)
+    except ValueError as e:
+        parser.error(str(e))
+    with multiprocessing.get_context("fork").Pool(processes=args.workers) as pool:
+        n_units = pool.starmap(_run_remote_worker, [(address, args.token)] * args.workers)
+    if None in n_units:
+        sys.exit(1)
+    Logger.info(f"{args.workers} workers matched {sum(n_units)} work units")
@@ -0,0 +1,458 @@
+import time
+import random
+import tracemalloc
+from collections import namedtuple
+from classes import Species, GeneratedReaction, CondReactionClass, CllReactionClass
+from chemistryIO.generator_io import GeneratorIO
+from chemistryIO.config_handler import config
+from generator import create_generator
+from utils.logger import Logger
+from utils.constants import DEFAULT_ESTIMATE_BUDGET
+
+# Share of the time budget given to the pilot closure, the catalyzer replicates get the rest
+PILOT_BUDGET_SHARE = 0.7
+# The pilot stops above this many species even if there is time left, to keep its own memory in check
+MAX_PILOT_SPECIES = 200000
+REPLICATES = 30
+CONFIDENCE = 0.9
+# Characters of a reaction line besides the species names and the speed (" + ", " > ", " ; " and the newline)
+REACTION_LINE_SEPARATORS = 16
+# Bytes of a list slot: every closure iteration appends all the reactions it (re)computes to the generator lists
+POINTER_SIZE = 8
+PROJECTION_MAX_ITERATIONS = 1000
+# The catalyzer replicates replay at most this many new species draws, a uniform sample of them on larger networks
+MAX_REPLICATE_DRAWS = 20000
+
+# generate_new_catalyzers only reads the names of the new species
+PilotSpecies = namedtuple("PilotSpecies", "name")
+
+
+class PilotClosure:
+    # Closure on the species names alone. Every pair and every species is matched once (semi-naive): an iteration
+    # only looks at the species added by the previous one, which yields the species of every generator iteration
+    # without building the network objects nor recomputing the old reactions.
+    def __init__(self, species_names, system, reaction_classes, deadline, max_species):
+        self.ML = int(system.ML)
+        self.cll_ml_active = system.CLL_ML_ACTIVE
+        self.conds = reaction_classes["conds"]
+        self.clls = reaction_classes["clls"]
+        self.deadline = deadline
+        self.max_species = max_species
+        self.species = dict.fromkeys(species_names)
+        # Short species (<= ML) indexed by the patterns they can react with, the later iterations only pair those
+        self.ends = {reaction.generic_reactant_1: [] for reaction in self.conds}
+        self.starts = {reaction.generic_reactant_2: [] for reaction in self.conds}
+        self.cond_keys = set()
+        self.cll_keys = set()
+        # Per reaction class: number of reactions and characters of their names, to size the output lines
+        self.class_stats = {reaction: [0, 0] for reaction in self.conds + self.clls}
+        self.iterations = []
+        self.new_species = []
+        self.n_cleaved = 0
+        self.stop_reason = None
+
+    def _out_of_budget(self, products):
+        if len(self.species) + len(products) > self.max_species:
+            self.stop_reason = f"more than {self.max_species} species"
+        elif time.perf_counter() > self.deadline:
+            self.stop_reason = "time budget exhausted"
+        return self.stop_reason is not None
+
+    def _add_cond(self, reaction, reactant_1, reactant_2, products, merge_reversed=False):
+        # A+B and B+A of a class are the same reaction, but only the first pass drops the product of the second one
+        product = reactant_1 + reactant_2
+        key = (reaction, reactant_1, reactant_2) if reactant_1 <= reactant_2 else (reaction, reactant_2, reactant_1)
+        if key not in self.cond_keys:
+            self.cond_keys.add(key)
+            stats = self.class_stats[reaction]
+            stats[0] += 1
+            stats[1] += 2 * len(product)
+        elif merge_reversed:
+            return
+        if product not in self.species:
+            products[product] = products.get(product, 0) + 1
+
+    def _first_condensations(self, names, products):
+        # First generator pass on every initial species, in the generator order: A+B and B+A of the same class are
+        # merged by the initial deduplication, which keeps the first one and drops the product of the other
+        for reactant_1 in names:
+            if self._out_of_budget(products):
+                return
+            for reactant_2 in names:
+                for reaction in self.conds:
+                    if reactant_1.endswith(reaction.generic_reactant_1) and reactant_2.startswith(reaction.generic_reactant_2):
+                        self._add_cond(reaction, reactant_1, reactant_2, products, merge_reversed=True)
+
+    def _condensations(self, delta, products):
+        for reaction in self.conds:
+            old_left = self.ends[reaction.generic_reactant_1]
+            old_right = self.starts[reaction.generic_reactant_2]
+            delta_left = [name for name in delta if name.endswith(reaction.generic_reactant_1)]
+            delta_right = [name for name in delta if name.startswith(reaction.generic_reactant_2)]
+            for left, right in ((delta_left, old_right + delta_right), (old_left, delta_right)):
+                for reactant_1 in left:
+                    if self._out_of_budget(products):
+                        return
+                    for reactant_2 in right:
+                        self._add_cond(reaction, reactant_1, reactant_2, products)
+
+    def _cleavages(self, names, products):
+        for name in names:
+            if self._out_of_budget(products):
+                return
+            self.n_cleaved += 1
+            for reaction in self.clls:
+                core = reaction.generic_reactant
+                n_split = int(reaction.n_split)
+                if len(core) < n_split:
+                    continue
+                start_index = name.find(core)
+                while start_index != -1:
+                    cleavage_1 = name[:start_index + n_split]
+                    cleavage_2 = name[start_index + n_split:]
+                    key = (reaction, name) + tuple(sorted((cleavage_1, cleavage_2)))
+                    if key not in self.cll_keys:
+                        self.cll_keys.add(key)
+                        stats = self.class_stats[reaction]
+                        stats[0] += 1
+                        stats[1] += 2 * len(name)
+                    for product in (cleavage_1, cleavage_2):
+                        if product not in self.species:
+                            products[product] = products.get(product, 0) + 1
+                    start_index = name.find(core, start_index + 1)
+
+    def _index(self, names):
+        for name in names:
+            if len(name) > self.ML:
+                continue
+            for pattern, indexed in self.ends.items():
+                if name.endswith(pattern):
+                    indexed.append(name)
+            for pattern, indexed in self.starts.items():
+                if name.startswith(pattern):
+                    indexed.append(name)
+
+    def short_pairs(self):
+        # Condensations among the short species known so far, the pairs of a stopped iteration included
+        short = [name for name in self.species if len(name) <= self.ML]
+        return sum(sum(1 for name in short if name.endswith(reaction.generic_reactant_1))
+                   * sum(1 for name in short if name.startswith(reaction.generic_reactant_2)) for reaction in self.conds)
+
+    def run(self):
+        delta = list(self.species)
+        while True:
+            # New product names with the number of Species objects the generator creates for them, every one of
+            # those is a draw of generate_new_catalyzers
+            products = {}
+            if not self.iterations:
+                self._first_condensations(delta, products)
+                cll_delta = delta
+            else:
+                short_delta = [name for name in delta if len(name) <= self.ML]
+                self._condensations(short_delta, products)
+                cll_delta = short_delta if self.cll_ml_active else delta
+            if self.stop_reason is None:
+                self._cleavages(cll_delta, products)
+            self._index(delta)
+
+            new_species = list(products)
+            self.species.update(dict.fromkeys(products))
+            self.new_species.append(products)
+            self.iterations.append({
+                "iteration": len(self.iterations),
+                "species": len(self.species),
+                "short_species": sum(1 for name in self.species if len(name) <= self.ML),
+                "new_species": len(new_species),
+                "cond_reactions": len(self.cond_keys),
+                "cll_reactions": len(self.cll_keys),
+                "projected": False,
+            })
+            if not new_species or self.stop_reason is not None:
+                return self
+            delta = new_species
+
+
+def combinatorial_bounds(names, ML, cll_ml_active, conds, clls):
+    # Upper bounds from the alphabet alone: condensations only pair species up to ML long, so every species is
+    # either at most 2*ML long or a substring of a longer initial species
+    alphabet = len({char for name in names for char in name}) or 1
+    max_length = 2 * ML
+    long_substrings = {name[i:j] for name in names if len(name) > max_length
+                       for i in range(len(name)) for j in range(i + max_length + 1, len(name) + 1)}
+    short_species = sum(alphabet ** length for length in range(1, ML + 1))
+    long_initial = [name for name in names if len(name) > ML]
+
+    def n_strings_with_pattern(pattern, check):
+        # Strings up to ML long ending (or starting) with the pattern, plus the long initial species of the first pass
+        return (sum(alphabet ** (length - len(pattern)) for length in range(max(len(pattern), 1), ML + 1))
+                + sum(1 for name in long_initial if check(name, pattern)))
+
+    cond_reactions = sum(n_strings_with_pattern(reaction.generic_reactant_1, str.endswith)
+                         * n_strings_with_pattern(reaction.generic_reactant_2, str.startswith) for reaction in conds)
+
+    # A species longer than ML is a substring of a condensation product (at most 2*ML long) or of a long initial species
+    long_per_product = ML * (ML + 1) // 2
+    long_species = min(sum(alphabet ** length for length in range(ML + 1, max_length + 1)), cond_reactions * long_per_product)
+    species = short_species + long_species + len(long_substrings)
+
+    cll_max_length = ML if cll_ml_active else max_length
+    cll_reactions = 0
+    for reaction in clls:
+        pattern = reaction.generic_reactant
+        cll_reactions += sum((length - len(pattern) + 1) * alphabet ** (length - len(pattern))
+                             for length in range(max(len(pattern), 1), cll_max_length + 1))
+        cll_reactions += sum(name.count(pattern) for name in set(names) | long_substrings if len(name) > cll_max_length)
+
+    return {"species": species, "short_species": short_species, "cond_reactions": cond_reactions, "cll_reactions": cll_reactions}
+
+
+def project_growth(observed, new_per_iteration, cap):
+    # Logistic projection of the closure: the last growth ratio, damped as the species fill up the combinatorial cap
+    complete = [n for n in new_per_iteration if n > 0]
+    if not complete:
+        return []
+    ratio = complete[-1] / complete[-2] if len(complete) > 1 else 2.0
+    total = float(observed)
+    new = float(complete[-1])
+    projected = []
+    while len(projected) < PROJECTION_MAX_ITERATIONS:
+        new = min(new * ratio * max(0.0, 1 - total / cap), cap - total)
+        if new < 1:
+            break
+        total += new
+        projected.append(new)
+    return projected
+
+
+def calibrate_sizes(mean_length, n=2000):
+    # Bytes of a species and of a generated reaction as the generator builds them, measured on a small sample
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        reaction_class = CondReactionClass("A", "A", 0.1)
+        before = tracemalloc.get_traced_memory()[0]
+        species = [Species(format(i, "x").rjust(mean_length, "A"), config.default_concentration, config.default_contribution)
+                   for i in range(n)]
+        species_size = (tracemalloc.get_traced_memory()[0] - before) / n
+
+        before = tracemalloc.get_traced_memory()[0]
+        reactions = []
+        for i in range(n):
+            reaction = GeneratedReaction(reactants=[species[i].name, species[-i].name], reaction_class=reaction_class, product=[species[i]])
+            species[i].add_generator_reaction(reaction)
+            reaction_class.add_generated_reaction(reaction)
+            reactions.append(reaction)
+        reaction_size = (tracemalloc.get_traced_memory()[0] - before) / n
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+    return species_size, reaction_size
+
+
+def catalyzer_replicates(parsed_data, new_species, class_stats, replicates, deadline):
+    # The network does not depend on the seed, the catalyzers do: replay the generator catalyzer assignment on the
+    # pilot species with several seeds and size the expanded reaction lines of each replicate
+    reaction_classes = parsed_data["reactions"]
+    original_classes = reaction_classes["conds"] + reaction_classes["clls"]
+    draws = [[PilotSpecies(name) for name, n_objects in products.items() for _ in range(n_objects)] for products in new_species if products]
+
+    # Every new species is a draw, on large networks only a uniform sample of them is replayed and the catalyzers
+    # they add are scaled back up
+    n_draws = sum(len(names) for names in draws)
+    fraction = min(1.0, MAX_REPLICATE_DRAWS / n_draws) if n_draws else 1.0
+    if fraction < 1:
+        rng = random.Random(0)
+        draws = [rng.sample(names, max(1, round(len(names) * fraction))) for names in draws]
+
+    results = []
+    for seed in range(replicates):
+        if results and time.perf_counter() > deadline:
+            break
+        fresh_classes = {
+            "conds": [CondReactionClass(r.generic_reactant_1, r.generic_reactant_2, r.reaction_speed) for r in reaction_classes["conds"]],
+            "clls": [CllReactionClass(r.generic_reactant, r.n_split, r.reaction_speed) for r in reaction_classes["clls"]],
+        }
+        fresh = fresh_classes["conds"] + fresh_classes["clls"]
+        generator = create_generator({**parsed_data, "reactions": fresh_classes}, seed=seed)
+        generator.generate_catalyzers()
+        initial = [(len(r.catalyzers), sum(len(c.species) for c in r.catalyzers)) for r in fresh]
+        n_initial_catalyzers = len(generator.catalyzers)
+        for names in draws:
+            generator.generate_new_catalyzers(names)
+
+        lines = {"cond": 0, "cll": 0}
+        chars = {"cond": 0, "cll": 0}
+        for original, reaction, (n_initial, initial_chars) in zip(original_classes, fresh, initial):
+            n_reactions, name_chars = class_stats[original]
+            kind = "cond" if isinstance(original, CondReactionClass) else "cll"
+            n_catalyzers = n_initial + (len(reaction.catalyzers) - n_initial) / fraction
+            catalyzer_chars = initial_chars + (sum(len(c.species) for c in reaction.catalyzers) - initial_chars) / fraction
+            line_chars = name_chars + n_reactions * (len(str(original.reaction_speed)) + REACTION_LINE_SEPARATORS)
+            lines[kind] += n_reactions * n_catalyzers
+            chars[kind] += line_chars * n_catalyzers + n_reactions * 2 * catalyzer_chars
+        n_catalyzers = n_initial_catalyzers + (len(generator.catalyzers) - n_initial_catalyzers) / fraction
+        results.append({"catalyzers": n_catalyzers, "lines": lines, "chars": chars})
+    return results, fraction
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[round(q * (len(values) - 1))]
+
+
+def _bounds(estimate, low, high):
+    return {"estimate": round(estimate), "low": round(low), "high": round(high)}
+
+
+def _interval(estimates, lows, highs):
+    # Mean of the replicates, with the percentiles of the replicate lows and highs as the confidence interval
+    tail = (1 - CONFIDENCE) / 2
+    return _bounds(sum(estimates) / len(estimates), _percentile(lows, tail), _percentile(highs, 1 - tail))
+
+
+def species_section_size(initial_species, names):
+    # Species lines as write_data pads them, plus the membrane lines of the initial species that can cross it
+    initial = {species.name: species for species in initial_species}
+    concentrations = [str(species.concentration) for species in initial_species]
+    max_name_length = max(len(name) for name in names)
+    max_concentration_length = max(len(concentration) for concentration in concentrations + [str(config.default_concentration)])
+    line = max_name_length + max_concentration_length + 7
+    size = len(names) * line + sum(len(str(species.contrib)) for species in initial_species)
+    size += (len(names) - len(initial)) * len(str(config.default_contribution))
+    for species in initial_species:
+        if species.can_cross_membrane:
+            external_concentration = species.external_concentration or config.external_concentration
+            diffusion_constant = species.diffusion_constant or config.diffusion_constant
+            size += len(f"{external_concentration} > {species.name} ; {diffusion_constant:.2E}\n")
+    return size
+
+
+def estimate_generation(parsed_data, budget=DEFAULT_ESTIMATE_BUDGET, max_species=MAX_PILOT_SPECIES, replicates=REPLICATES):
+    start_time = time.perf_counter()
+    system = parsed_data["system"]
+    initial_species = parsed_data["species"]
+    container = initial_species[0]
+    names = [species.name for species in initial_species if species.name != container.name]
+    reaction_classes = parsed_data["reactions"]
+
+    pilot = PilotClosure(names, system, reaction_classes, start_time + budget * PILOT_BUDGET_SHARE, max_species).run()
+    pilot_time = time.perf_counter() - start_time
+    exact = pilot.stop_reason is None
+    last = pilot.iterations[-1]
+    caps = combinatorial_bounds(names, int(system.ML), system.CLL_ML_ACTIVE, reaction_classes["conds"], reaction_classes["clls"])
+
+    iterations = list(pilot.iterations)
+    counts = {key: (last[key], last[key], last[key]) for key in ("species", "short_species", "cond_reactions", "cll_reactions")}
+    if not exact:
+        # The pilot counts are lower bounds (the closure only grows) and the combinatorial caps upper bounds. The
+        # short species drive everything else: the condensations pair them and produce the long species, so the
+        # estimate projects their growth and scales the rest by it.
+        short_per_iteration = [last["short_species"] if i == 0 else b["short_species"] - a["short_species"]
+                               for i, (a, b) in enumerate(zip([pilot.iterations[0]] + pilot.iterations, pilot.iterations))]
+        short_projected = project_growth(last["short_species"], short_per_iteration, caps["short_species"])
+        short_point = min(last["short_species"] + sum(short_projected), caps["short_species"])
+
+        short_pairs = pilot.short_pairs()
+        cond_point = min(max(short_pairs * (short_point / max(last["short_species"], 1)) ** 2, last["cond_reactions"]), caps["cond_reactions"])
+        long_per_cond = (last["species"] - last["short_species"]) / max(last["cond_reactions"], 1)
+        species_point = min(short_point + long_per_cond * cond_point, caps["species"])
+        cll_per_species = last["cll_reactions"] / max(pilot.n_cleaved, 1)
+        cll_point = min(max(cll_per_species * species_point, last["cll_reactions"]), caps["cll_reactions"])
+        counts = {
+            "species": (species_point, last["species"], caps["species"]),
+            "short_species": (short_point, last["short_species"], caps["short_species"]),
+            "cond_reactions": (cond_point, last["cond_reactions"], caps["cond_reactions"]),
+            "cll_reactions": (cll_point, last["cll_reactions"], caps["cll_reactions"]),
+        }
+        # One row per projected iteration of the short species, at least one when only the long species are left
+        short_total = last["short_species"]
+        previous_species = last["species"]
+        steps = short_projected or [0.0]
+        for i, new in enumerate(steps):
+            short_total += new
+            fraction = 1.0 if i == len(steps) - 1 else (short_total - last["short_species"]) / max(short_point - last["short_species"], 1)
+            projected = {key: round(last[key] + fraction * (counts[key][0] - last[key])) for key in counts}
+            iterations.append({
+                "iteration": last["iteration"] + i + 1,
+                **projected,
+                "new_species": projected["species"] - previous_species,
+                "projected": True,
+            })
+            previous_species = projected["species"]
+
+    remaining = max(budget - (time.perf_counter() - start_time), 0)
+    samples, sampled_fraction = catalyzer_replicates(parsed_data, pilot.new_species, pilot.class_stats, replicates, time.perf_counter() + remaining)
+
+    # The replicates only cover the pilot species: the estimate scales them to the projected network, the low
+    # keeps them as they are and the high scales them to the combinatorial bounds
+    def ratios(i):
+        return {"species": counts["species"][i] / max(last["species"], 1),
+                "cond": counts["cond_reactions"][i] / max(last["cond_reactions"], 1),
+                "cll": counts["cll_reactions"][i] / max(last["cll_reactions"], 1)}
+
+    species_chars = species_section_size(initial_species, [container.name] + list(pilot.species))
+    catalyzers, lines, output_bytes = [], [], []
+    for i in range(3):
+        ratio = ratios(i)
+        catalyzers.append([sample["catalyzers"] * ratio["species"] for sample in samples])
+        lines.append([sample["lines"]["cond"] * ratio["cond"] + sample["lines"]["cll"] * ratio["cll"] for sample in samples])
+        output_bytes.append([species_chars * ratio["species"] + sample["chars"]["cond"] * ratio["cond"] + sample["chars"]["cll"] * ratio["cll"] + 2
+                             for sample in samples])
+
+    mean_length = max(1, round(sum(len(name) for name in pilot.species) / max(len(pilot.species), 1)))
+    species_size, reaction_size = calibrate_sizes(mean_length)
+
+    def memory(n_species, n_reactions):
+        # Every iteration appends all the reactions it computes to the generator lists until the final deduplication
+        return n_species * species_size + n_reactions * (reaction_size + POINTER_SIZE * len(iterations))
+
+    n_reactions = [counts["cond_reactions"][i] + counts["cll_reactions"][i] for i in range(3)]
+    estimate = {
+        "exact": exact,
+        "stop_reason": pilot.stop_reason,
+        "confidence": CONFIDENCE,
+        "pilot": {"time": pilot_time, "iterations": len(pilot.iterations), "species": last["species"]},
+        "replicates": len(samples),
+        "sampled_draws": sampled_fraction,
+        "iterations": iterations,
+        "species": _bounds(*counts["species"]),
+        "cond_reactions": _bounds(*counts["cond_reactions"]),
+        "cll_reactions": _bounds(*counts["cll_reactions"]),
+        "catalyzers": _interval(*catalyzers),
+        "output_lines": _interval(*lines),
+        "output_bytes": _interval(*output_bytes),
+        "memory_bytes": _bounds(memory(counts["species"][0], n_reactions[0]), memory(counts["species"][1], n_reactions[1]),
+                                memory(counts["species"][2], n_reactions[2])),
+        "duration": time.perf_counter() - start_time,
+    }
+    return estimate
+
+
+def estimate_report(estimate):
+    if estimate["exact"]:
+        lines = [f"Exact closure in {estimate['pilot']['time']:.2f}s, the catalyzer figures are a "
+                 f"{estimate['confidence'] * 100:.0f}% interval over {estimate['replicates']} seeds"]
+    else:
+        lines = [f"Pilot closure stopped ({estimate['stop_reason']}) after {estimate['pilot']['iterations']} iterations and "
+                 f"{estimate['pilot']['species']} species, the rest is projected: low is what the pilot found, high the combinatorial bound"]
+    lines.append(f"{'Iteration':<10} {'Species':>12} {'New':>12} {'Cond':>12} {'Cll':>12}")
+    for iteration in estimate["iterations"]:
+        mark = " (projected)" if iteration["projected"] else ""
+        lines.append(f"{iteration['iteration']:<10} {iteration['species']:>12} {iteration['new_species']:>12} "
+                     f"{iteration['cond_reactions']:>12} {iteration['cll_reactions']:>12}{mark}")
+    lines.append("")
+    lines.append(f"{'Quantity':<16} {'Estimate':>14} {'Low':>14} {'High':>14}")
+    for name in ("species", "catalyzers", "cond_reactions", "cll_reactions", "output_lines", "output_bytes", "memory_bytes"):
+        values = estimate[name]
+        lines.append(f"{name:<16} {values['estimate']:>14.4g} {values['low']:>14.4g} {values['high']:>14.4g}")
+    return "\n".join(lines)
+
+
+def run_estimate(file_path, output_file=None, budget=DEFAULT_ESTIMATE_BUDGET):
+    generatorIO = GeneratorIO(input_file=file_path, output_file=output_file)
+    parsed_data = generatorIO.parse_data()
+    estimate = estimate_generation(parsed_data, budget)
+    generatorIO.write_estimate(estimate)
+    Logger.info("Size estimate:\n" + estimate_report(estimate))
+    return estimate
@@ -1,57 +1,66 @@
 import sys
-from io.generator_io import GenToolIO
+import argparse
+from collections import defaultdict
+from chemistryIO.gentool_io import GenToolIO
+from utils.kmers import iter_kmers
 
-def generate_condensation_reactions(data):
 
-    
-    species = data["species"][1:]
-    n_s, n_d, v = map(float, data["conds"])
-    condensation_reactions = {'reactions': [], 'v': v}
-    for i in range(len(species)):
-        for j in range(len(species)):
-            reagent_1 = species[i][0]  # Reimpostiamo il prefisso R-
-            reagent_2 = species[j][0]
-            if len(reagent_1) == n_s and len(reagent_2) == n_d:
-                condensation_reactions['reactions'].append([reagent_1, reagent_2])  # "V" rappresenta la velocità associata alla reazione
+def group_species_by_length(data):
+    # Species names (container excluded) grouped by length, in input order
+    buckets = defaultdict(list)
+    for specie in data["species"][1:]:
+        buckets[len(specie[0])].append(specie[0])
+    return buckets
+
+
+def _condensation_pairs(left_species, right_species):
+    for reagent_1 in left_species:
+        for reagent_2 in right_species:
+            yield reagent_1, reagent_2
 
-    return condensation_reactions
 
+def generate_condensation_reactions(data, buckets=None):
+    if buckets is None:
+        buckets = group_species_by_length(data)
+    n_s, n_d, v = map(float, data["conds"])
+
+    # Only the n_s and n_d buckets can take part, every pair between them is a template
+    left_species = buckets.get(int(n_s), []) if n_s.is_integer() else []
+    right_species = buckets.get(int(n_d), []) if n_d.is_integer() else []
+    return {'reactions': _condensation_pairs(left_species, right_species), 'v': v}
 
-def generate_cleavage_reactions(data):
 
-    species = data["species"][1:]
+def generate_cleavage_reactions(data, buckets=None):
+    if buckets is None:
+        buckets = group_species_by_length(data)
     Nts = list(map(int, [nt for nt in data["clls"][0]]))
-    v = float(data["conds"][1])
-    cleavage_reactions = {'reactions': [], 'v': v}
-    for nt in Nts:
-        for specie in species:
-            specie_name = specie[0]
-            subspecies = [specie_name[i:i+nt] for i in range(0, len(specie_name)) if len(specie_name[i:i+nt]) == nt]
-            cleavage_reactions['reactions'] += subspecies  # Concatena i risultati alla lista cleavage_reactions
+    v = float(data["clls"][1])
 
-    #flat
-    cleavage_reactions_set = set(cleavage_reactions['reactions'])
-    cleavage_reactions['reactions'] = list(cleavage_reactions_set)
+    # Only species long enough to contain a window take part
+    names = [name for length, names in buckets.items() if length >= min(Nts, default=0) for name in names]
+    # Streamed to the writer like the condensation pairs, by length then in string order
+    return {'reactions': iter_kmers(names, Nts), 'v': v}
 
-    return cleavage_reactions
 
+def run_gentool(file_path, output_file=None):
+    genTool = GenToolIO(file_path, output_file)
+    parsed_data = genTool.parse_data()
+    buckets = group_species_by_length(parsed_data)
+    parsed_data["gen-conds"] = generate_condensation_reactions(parsed_data, buckets)
+    parsed_data["gen-clls"] = generate_cleavage_reactions(parsed_data, buckets)
+
+    genTool.write_data(parsed_data)
+    return parsed_data
 
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Error!")
-        print("Correct usage: python3 basic_gen.py <file-name.txt>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Generate an input chemistry for the generator.")
+    parser.add_argument("file_path", help="The path to the input file.")
+    parser.add_argument("-o", "--output", help="The name of the output file.")
+    args = parser.parse_args()
 
-    file_path = sys.argv[1]
-    genTool = GenToolIO(file_path)
     try:
-        parsed_data = genTool.parse_data()
-        parsed_data["gen-conds"] = generate_condensation_reactions(parsed_data)
-        parsed_data["gen-clls"] = generate_cleavage_reactions(parsed_data)
-
-        genTool.write_data(parsed_data)
-        
+        run_gentool(args.file_path, args.output)
     except Exception as e:
         print("An error occurred:", str(e))
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
@@ -1,54 +1,95 @@
+import os
 import sys
 import random
 import argparse
-from classes import SystemParameters, Species, Catalyzer, GeneratedReaction
+from collections import Counter
+from classes import SystemParameters, Species, Catalyzer, GeneratedReaction, NameTable
 from chemistryIO.generator_io import GeneratorIO
-from chemistryIO.config_handler import config_handler
+from chemistryIO.config_handler import config
 from utils.logger import Logger
-from utils.utils import are_reactions_same_no_cata, flatten_species_list, are_reactions_same
+from utils.metrics import Metrics, current_rss
+from utils.streams import RandomStreams, binomial
+from utils.utils import flatten_species_list, reaction_key_no_cata
+from utils.sampling import group_by_length, sample_indices, pair_at
+from utils.arguments import add_generator_arguments, generator_options
+from utils.matching import LocalMatcher
 import traceback
 from utils.decorators import timing_decorator, species_involved_decorator
 
 
+# Exit status of a run stopped early (i.e. by the memory limit) that still wrote a partial network
+PARTIAL_EXIT_CODE = 2
+
+
 class ReactionGenerator:
-    def __init__(self, system, species, reaction_classes, catalyzer_params, len_classes, seed=None):
+    def __init__(self, system, species, reaction_classes, catalyzer_params, len_classes, seed=None, metrics=None, memory_limit=None, legacy_random=False, sample_rate=None, dag_names=False, matcher=None):
         self.species = species
         self.reaction_classes = reaction_classes
         self.catalyzer_params = catalyzer_params
         self.container = species[0]
         self.catalyzers = []
+        self.catalyzers_by_species = {}
         self.cond_reactions = []
         self.cll_reactions = []
         self.system = system
         self.len_classes = len_classes
         self.both_on = catalyzer_params[3] == 'ON'
         self.seed = seed if seed is not None else random.getrandbits(32)
-        random.seed(self.seed)
-
-    def assign_catalyzers(self, eligible_species, reactions, limit=-1):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.memory_limit = memory_limit
+        self.stop_reason = None
+        # Legacy: every decision draws from the global stream, so the result depends on the order of all the draws
+        self.legacy_random = legacy_random
+        self.streams = RandomStreams(self.seed)
+        if legacy_random:
+            random.seed(self.seed)
+        # Sampling mode: pairs and cleavage sites are kept with probability sample_rate instead of all enumerated
+        self.sample_rate = sample_rate
+        self.sampled_names = {"cond": set(), "cll": set()}
+        self.sampled_reactions = {}
+        self.sample_rounds = {"cond": 0, "cll": 0}
+        self.sample_strata = []
+        self.sample_weights = {}
+        # Where the pattern matching of the enumeration runs: in this process, or split among workers (see distributed.py)
+        self.matcher = matcher if matcher is not None else LocalMatcher()
+        # Optional hash-consed names: products point to their parents instead of holding their characters
+        self.names = None
+        if dag_names:
+            self.names = NameTable(boundary=self.pattern_boundary())
+            for specie in species:
+                specie.name = self.names.atom(specie.name)
+
+    def pattern_boundary(self):
+        # Longest pattern matched at either end of a name
+        patterns = [pattern for reaction in self.reaction_classes["conds"] for pattern in (reaction.generic_reactant_1, reaction.generic_reactant_2)]
+        patterns += [reaction.generic_reactant for reaction in self.reaction_classes["clls"]]
+        return max(map(len, patterns), default=0)
+
+    def rng(self, *key):
+        return random if self.legacy_random else self.streams.stream(*key)
+
+    def assign_catalyzers(self, eligible_species, reactions, limit=-1, rng=random):
         species_pool = eligible_species[:]
         new_catalyzer_list = []
-        used_species = set([c.species for c in self.catalyzers])  
 
-        
         for reaction in reactions:
             if len(new_catalyzer_list) == limit:
                 return new_catalyzer_list
 
             if not species_pool:
-                species_pool = [s for s in eligible_species if s not in used_species]  
+                species_pool = [s for s in eligible_species if s not in self.catalyzers_by_species]  
                 if not species_pool:  
                     species_pool = eligible_species[:]  
 
-            chosen = random.choice(species_pool)
-            catalyzer = next((c for c in self.catalyzers if c.species == chosen), None)
+            chosen = rng.choice(species_pool)
+            catalyzer = self.catalyzers_by_species.get(chosen)
 
             if catalyzer is None:
                 catalyzer = Catalyzer(chosen)
                 new_catalyzer_list.append(catalyzer)
-                used_species.add(chosen)
                 self.catalyzers.append(catalyzer)
-            if reaction not in catalyzer.reactions:        
+                self.catalyzers_by_species[chosen] = catalyzer
+            if reaction not in catalyzer.reactions:
                 catalyzer.add_reaction_class(reaction)
                 reaction.add_catalyzer(catalyzer)
 
@@ -69,128 +110,273 @@ class ReactionGenerator:
 
         eligible_species = [species.name for species in species[1:] if min_length <= len(species.name) <= max_length]
         
-        eligible_cond_species = random.choices(eligible_species, k=num_cond_catalyzers)
+        rng = self.rng("catalyzers", "cond")
+        eligible_cond_species = rng.choices(eligible_species, k=num_cond_catalyzers)
         if len(eligible_cond_species) < num_cond_catalyzers :
             raise ValueError("Error! Not enough eligible species to satisfy the cond catalyzer requirements.")
 
         
-        self.assign_catalyzers(eligible_cond_species, cond_reactions)
+        self.assign_catalyzers(eligible_cond_species, cond_reactions, rng=rng)
+        rng = self.rng("catalyzers", "cll")
         if self.both_on:
-            eligible_cll_species = random.choices(eligible_species, k=num_cll_catalyzers)
+            eligible_cll_species = rng.choices(eligible_species, k=num_cll_catalyzers)
         else:
-            eligible_species = [species for species in eligible_species if species not in [catalyzer.species for catalyzer in self.catalyzers]]
-            eligible_cll_species = random.choices(eligible_species, k=num_cll_catalyzers)
+            eligible_species = [species for species in eligible_species if species not in self.catalyzers_by_species]
+            eligible_cll_species = rng.choices(eligible_species, k=num_cll_catalyzers)
             if len(eligible_cll_species) < num_cll_catalyzers :
                 raise ValueError("Error! Not enough eligible species to satisfy the cll catalyzer requirements.")
 
-        self.assign_catalyzers(eligible_cll_species, cll_reactions)
+        self.assign_catalyzers(eligible_cll_species, cll_reactions, rng=rng)
+
+    def new_catalyzer_draws(self, new_species):
+        # As many draws with replacement as new species (objects, a name can have several)
+        if self.legacy_random:
+            for i in range(len(new_species)):
+                yield random.choice(new_species), random
+            return
+        # Keyed: the multinomial of the draws is split in conditional binomials, one per name on its own stream, names
+        # taken in the output order, so the catalyzers do not depend on the order in which the species were found
+        remaining = remaining_mass = len(new_species)
+        multiplicity = Counter(new_species)
+        for name in sorted(multiplicity, key=lambda name: (len(name), name)):
+            rng = self.streams.stream("new_catalyzers", name)
+            n_draws = binomial(rng, remaining, multiplicity[name] / remaining_mass)
+            remaining -= n_draws
+            remaining_mass -= multiplicity[name]
+            for i in range(n_draws):
+                yield name, rng
 
 
     @species_involved_decorator
     @timing_decorator
     def generate_condensation_reactions(self, species):
+        if self.sample_rate is not None:
+            return self.sample_condensation_reactions(species)
         reactions = self.reaction_classes["conds"]
         condensation_reactions = []
         species = [species.name for species in species if species.name != self.container.name]
-
-
-        for i in range(len(species)):
-            for j in range(len(species)):
-                reactant_1 = species[i]
-                reactant_2 = species[j]
-                for reaction in reactions:
-                    if reactant_1.endswith(reaction.generic_reactant_1) and reactant_2.startswith(reaction.generic_reactant_2):
-                        product_species = reactant_1 + reactant_2
-                        
-                        product = Species(product_species, config_handler.default_concentration, config_handler.default_contribution)
-
-                        for species_prod in self.species:
-                            if species_prod.name == product.name:
-                                product = species_prod
-                                break
-                        
-                        new_reaction = GeneratedReaction(reactants=[reactant_1, reactant_2], reaction_class=reaction, product=[product])
-                        for r in self.cond_reactions:
-                            if are_reactions_same_no_cata(r, new_reaction):
-                                new_reaction = r
-                                break
-
-                        if new_reaction not in condensation_reactions:
-                            condensation_reactions.append(new_reaction)
-                            product.add_generator_reaction(new_reaction)
-                            reaction.add_generated_reaction(new_reaction)
-
+        default_concentration = config.default_concentration
+        default_contribution = config.default_contribution
+        n_matches = 0
+        n_products_reused = 0
+        n_reactions_reused = 0
+        # The products and reactions already known, looked up by name and by key instead of scanned for every match
+        species_by_name = self.find_species()
+        known_reactions = self.find_reactions(self.cond_reactions)
+        added = set()
+
+        # The matches come in the order of the nested loops on (reactant 1, reactant 2, class), wherever they were found
+        patterns = [(reaction.generic_reactant_1, reaction.generic_reactant_2) for reaction in reactions]
+        for i, j, class_index in self.matcher.condensation(species, patterns):
+            reactant_1 = species[i]
+            reactant_2 = species[j]
+            reaction = reactions[class_index]
+            n_matches += 1
+            product_species = reactant_1 + reactant_2
+
+            product = species_by_name.get(product_species)
+            if product is None:
+                product = Species(product_species, default_concentration, default_contribution)
+            else:
+                n_products_reused += 1
+
+            new_reaction = GeneratedReaction(reactants=[reactant_1, reactant_2], reaction_class=reaction, product=[product])
+            known_reaction = known_reactions.get(reaction_key_no_cata(new_reaction))
+            if known_reaction is not None:
+                new_reaction = known_reaction
+                n_reactions_reused += 1
+
+            if id(new_reaction) not in added:
+                added.add(id(new_reaction))
+                condensation_reactions.append(new_reaction)
+                product.add_generator_reaction(new_reaction)
+                reaction.add_generated_reaction(new_reaction)
+
+        self.metrics.count("cond_pairs_examined", len(species) * len(species))
+        self.metrics.count("cond_pattern_matches", n_matches)
+        self.metrics.count("cond_products_created", n_matches - n_products_reused)
+        self.metrics.count("cond_products_reused", n_products_reused)
+        self.metrics.count("cond_reactions_reused", n_reactions_reused)
         return condensation_reactions
 
     @species_involved_decorator
     @timing_decorator
     def generate_cleavage_reactions(self, species):
+        if self.sample_rate is not None:
+            return self.sample_cleavage_reactions(species)
         reactions = self.reaction_classes["clls"]
         cleavage_reactions = []
         species = [species.name for species in species if species.name != self.container.name]
+        default_concentration = config.default_concentration
+        default_contribution = config.default_contribution
+        n_matches = 0
+        n_products_created = 0
+        n_reactions_reused = 0
+        species_by_name = self.find_species()
+        known_reactions = self.find_reactions(self.cll_reactions)
+
+        # Names are searched as strings and cut as names: with hash-consed names the cleavages share the parents.
+        # The matches come in the order of the loops on (species, class, occurrence of the pattern)
+        patterns = [(reaction.generic_reactant, int(reaction.n_split)) for reaction in reactions]
+        for i, class_index, start_index in self.matcher.cleavage(species, patterns):
+            specie_name = species[i]
+            reaction = reactions[class_index]
+            reactant_core, n_split = patterns[class_index]
+            cleavage_1 = specie_name[:start_index + n_split]
+            cleavage_2 = specie_name[start_index + n_split:]
+
+            if (cleavage_1.endswith(reactant_core[:n_split]) and
+                cleavage_2.startswith(reactant_core[n_split:])):
+                n_matches += 1
+                product_species1 = species_by_name.get(cleavage_1)
+                if product_species1 is None:
+                    product_species1 = Species(cleavage_1, default_concentration, default_contribution)
+                    n_products_created += 1
+
+                product_species2 = species_by_name.get(cleavage_2)
+                if product_species2 is None:
+                    product_species2 = Species(cleavage_2, default_concentration, default_contribution)
+                    n_products_created += 1
+
+                new_reaction = GeneratedReaction(
+                    reactants=[specie_name],
+                    reaction_class=reaction,
+                    product=[product_species1, product_species2]
+                )
+
+                known_reaction = known_reactions.get(reaction_key_no_cata(new_reaction))
+                if known_reaction is not None:
+                    new_reaction = known_reaction
+                    n_reactions_reused += 1
+
+
+                cleavage_reactions.append(new_reaction)
+                product_species1.add_generator_reaction(new_reaction)
+                product_species2.add_generator_reaction(new_reaction)
+                reaction.add_generated_reaction(new_reaction)
+
+        self.metrics.count("cll_species_examined", len(species) * len(reactions))
+        self.metrics.count("cll_pattern_matches", n_matches)
+        self.metrics.count("cll_products_created", n_products_created)
+        self.metrics.count("cll_products_reused", 2 * n_matches - n_products_created)
+        self.metrics.count("cll_reactions_reused", n_reactions_reused)
+        return cleavage_reactions
 
-        for specie_name in species:
-            for reaction in reactions:
-                reactant_core = reaction.generic_reactant
-                n_split = int(reaction.n_split)
-                reactant_core_len = len(reactant_core)
+    def add_sampled_reaction(self, new_reaction, weight):
+        # The reactions found again (i.e. the reversed pair of an old one) keep their first weight
+        key = reaction_key_no_cata(new_reaction)
+        if key in self.sampled_reactions:
+            return False
+        self.sampled_reactions[key] = new_reaction
+        self.sample_weights[new_reaction] = weight
+        for product in new_reaction.product:
+            product.add_generator_reaction(new_reaction)
+        new_reaction.reaction_class.add_generated_reaction(new_reaction)
+        return True
+
+    def sample_stratum(self, kind, class_index, lengths, population):
+        rng = self.rng("sample", kind, class_index, *lengths, self.sample_rounds[kind])
+        indices = sample_indices(rng, population, self.sample_rate)
+        # Horvitz-Thompson weight: every sampled reaction stands for population / sampled reactions of its stratum
+        weight = population / len(indices) if indices else 0.0
+        self.sample_strata.append({"type": kind, "round": self.sample_rounds[kind], "class": class_index, "lengths": list(lengths),
+                                   "population": population, "sampled": len(indices), "weight": weight})
+        return indices, weight
+
+    def find_species(self):
+        # First species of each name, as the linear lookups of the enumeration find them
+        return {species.name: species for species in reversed(self.species)}
+
+    @staticmethod
+    def find_reactions(reactions):
+        # First reaction of each key, as are_reactions_same_no_cata would find it scanning the list
+        known_reactions = {}
+        for reaction in reactions:
+            known_reactions.setdefault(reaction_key_no_cata(reaction), reaction)
+        known_reactions.pop(None, None)
+        return known_reactions
 
-                start_index = specie_name.find(reactant_core)
-                while start_index != -1:
-                    if reactant_core_len >= n_split:
-                        cleavage_1 = specie_name[:start_index + n_split]
-                        cleavage_2 = specie_name[start_index + n_split:]
-
-                        
-                        if (cleavage_1.endswith(reactant_core[:n_split]) and
-                            cleavage_2.startswith(reactant_core[n_split:])):
-                            
-                            product_species1 = None
-                            product_species2 = None
-                            found = False
-
-                            for species_prod in self.species:
-                                if species_prod.name == cleavage_1:
-                                    product_species1 = species_prod
-                                    found = True
-                                    break
-                           
-                            if not found:
-                                product_species1 = Species(cleavage_1, config_handler.default_concentration, config_handler.default_contribution)
-
-                            found = False
-
-                            for species_prod in self.species:
-                                if species_prod.name == cleavage_2:
-                                    product_species2 = species_prod
-                                    found = True
-                                    break
-
-                            if not found:
-                                product_species2 = Species(cleavage_2, config_handler.default_concentration, config_handler.default_contribution)
-
-
-                            new_reaction = GeneratedReaction(
-                                reactants=[specie_name],
-                                reaction_class=reaction,
-                                product=[product_species1, product_species2]
-                            )
-
-                            found = False
-                            for r in self.cll_reactions:
-                                if found:
-                                    break
-                                if are_reactions_same_no_cata(r, new_reaction):                                   
-                                    new_reaction = r
-                                    found = True
-
-
-                            cleavage_reactions.append(new_reaction)
-                            product_species1.add_generator_reaction(new_reaction)
-                            product_species2.add_generator_reaction(new_reaction)
-                            reaction.add_generated_reaction(new_reaction)
-                    start_index = specie_name.find(reactant_core, start_index + 1)
+    @timing_decorator
+    def sample_condensation_reactions(self, species):
+        # Only the pairs with a species not offered before are new (the others were drawn in an earlier round),
+        # stratified by reaction class and by the lengths of the two reactants
+        names = [species.name for species in species if species.name != self.container.name]
+        seen = self.sampled_names["cond"]
+        species_by_name = self.find_species()
+        default_concentration = config.default_concentration
+        default_contribution = config.default_contribution
+        condensation_reactions = []
+        n_population = 0
+
+        for class_index, reaction in enumerate(self.reaction_classes["conds"]):
+            left = group_by_length(name for name in names if name.endswith(reaction.generic_reactant_1))
+            right = group_by_length(name for name in names if name.startswith(reaction.generic_reactant_2))
+            for left_length in sorted(left):
+                left_new = [name for name in left[left_length] if name not in seen]
+                left_old = [name for name in left[left_length] if name in seen]
+                for right_length in sorted(right):
+                    right_all = right[right_length]
+                    right_new = [name for name in right_all if name not in seen]
+                    population = len(left_new) * len(right_all) + len(left_old) * len(right_new)
+                    if not population:
+                        continue
+                    n_population += population
+                    indices, weight = self.sample_stratum("cond", class_index, (left_length, right_length), population)
+                    for index in indices:
+                        reactant_1, reactant_2 = pair_at(index, left_new, left_old, right_all, right_new)
+                        product_species = reactant_1 + reactant_2
+                        product = species_by_name.get(product_species) or Species(product_species, default_concentration, default_contribution)
+                        new_reaction = GeneratedReaction(reactants=[reactant_1, reactant_2], reaction_class=reaction, product=[product])
+                        if self.add_sampled_reaction(new_reaction, weight):
+                            condensation_reactions.append(new_reaction)
+
+        seen.update(names)
+        self.sample_rounds["cond"] += 1
+        self.metrics.count("cond_pairs_population", n_population)
+        self.metrics.count("cond_pairs_sampled", len(condensation_reactions))
+        return condensation_reactions
 
+    @timing_decorator
+    def sample_cleavage_reactions(self, species):
+        # A cleavage only depends on its species, so only the species not offered before are cut,
+        # stratified by reaction class and by species length
+        seen = self.sampled_names["cll"]
+        names = [species.name for species in species if species.name != self.container.name and species.name not in seen]
+        species_by_name = self.find_species()
+        default_concentration = config.default_concentration
+        default_contribution = config.default_contribution
+        cleavage_reactions = []
+        n_population = 0
+
+        for class_index, reaction in enumerate(self.reaction_classes["clls"]):
+            reactant_core = reaction.generic_reactant
+            n_split = int(reaction.n_split)
+            if len(reactant_core) < n_split:
+                continue
+            sites = {}
+            for name in names:
+                text = str(name)
+                start_index = text.find(reactant_core)
+                while start_index != -1:
+                    sites.setdefault(len(name), []).append((name, start_index + n_split))
+                    start_index = text.find(reactant_core, start_index + 1)
+
+            for length in sorted(sites):
+                n_population += len(sites[length])
+                indices, weight = self.sample_stratum("cll", class_index, (length,), len(sites[length]))
+                for index in indices:
+                    specie_name, split = sites[length][index]
+                    cleavage_1, cleavage_2 = specie_name[:split], specie_name[split:]
+                    product_species1 = species_by_name.get(cleavage_1) or Species(cleavage_1, default_concentration, default_contribution)
+                    product_species2 = species_by_name.get(cleavage_2) or Species(cleavage_2, default_concentration, default_contribution)
+                    new_reaction = GeneratedReaction(reactants=[specie_name], reaction_class=reaction, product=[product_species1, product_species2])
+                    if self.add_sampled_reaction(new_reaction, weight):
+                        cleavage_reactions.append(new_reaction)
+
+        seen.update(names)
+        self.sample_rounds["cll"] += 1
+        self.metrics.count("cll_sites_population", n_population)
+        self.metrics.count("cll_sites_sampled", len(cleavage_reactions))
         return cleavage_reactions
 
     @species_involved_decorator
@@ -200,15 +386,14 @@ class ReactionGenerator:
         cond_reactions = self.reaction_classes["conds"]
         cll_reactions = self.reaction_classes["clls"]
 
-        for i in range(len(new_species)):
-            extracted_specie = random.choice(new_species)
+        for extracted_specie, rng in self.new_catalyzer_draws(new_species):
             len_extracted_specie = str(len(extracted_specie))
             if len_extracted_specie in self.len_classes:   
                 extracted_specie_class = self.len_classes[len_extracted_specie]
-                is_cond_catalyzer = random.random() <= float(extracted_specie_class.p_cond)
-                is_cll_catalyzer = random.random() <= float(extracted_specie_class.p_cll)
+                is_cond_catalyzer = rng.random() <= float(extracted_specie_class.p_cond)
+                is_cll_catalyzer = rng.random() <= float(extracted_specie_class.p_cll)
                 if not self.both_on and is_cond_catalyzer and is_cll_catalyzer:
-                    if random.random() <= 0.5:
+                    if rng.random() <= 0.5:
                         is_cond_catalyzer = False
                     else:
                         is_cll_catalyzer = False
@@ -224,57 +409,112 @@ class ReactionGenerator:
                 ]
 
                 if is_cond_catalyzer:
-                    self.assign_catalyzers([extracted_specie], filtered_cond_reactions, limit=1)
+                    self.assign_catalyzers([extracted_specie], filtered_cond_reactions, limit=1, rng=rng)
                 if is_cll_catalyzer:
-                    self.assign_catalyzers([extracted_specie], filtered_cll_reactions, limit=1)
+                    self.assign_catalyzers([extracted_specie], filtered_cll_reactions, limit=1, rng=rng)
 
 
     @timing_decorator
     def generate_new_species(self):
-        new_cond_species = {reaction.product[0] for reaction in self.cond_reactions if reaction.product[0].name not in [species.name for species in self.species[:]]}
-        new_cll_species = {product for reaction in self.cll_reactions for product in reaction.product if product.name not in [species.name for species in self.species[:]]}
-        new_species = list(new_cond_species | new_cll_species)
-        self.generate_new_catalyzers(new_species)
-        self.species.extend(new_species)
-        self.species = flatten_species_list(self.species)
-        while True:
-
-            current_species = flatten_species_list([species for species in self.species if species.name != self.container.name])
-            new_species_short = [species for species in current_species if len(species.name) <= int(self.system.ML)]
-            
-            new_condensation_products = self.generate_condensation_reactions(new_species_short)
-            new_cleavage_products = [] 
-
-            if self.system.CLL_ML_ACTIVE:
-                new_cleavage_products = self.generate_cleavage_reactions(new_species_short)
-            else:
-                new_cleavage_products = self.generate_cleavage_reactions(current_species)
-
-            new_species_set = set([reaction.product[0] for reaction in new_condensation_products])
-            new_species_set.update([reaction.product[0] for reaction in new_cleavage_products])
-            new_species_set.update([reaction.product[1] for reaction in new_cleavage_products])
-
-            new_species_list = list(new_species_set)
-            new_species_list = [specie for specie in new_species_list if specie.name not in [species.name for species in current_species]]
-
-            self.generate_new_catalyzers(new_species_list)
-
-            self.cond_reactions.extend(new_condensation_products)
-            self.cll_reactions.extend(new_cleavage_products)
-            if not new_species_list:
-                break
-            self.species.extend(new_species_list)
-
+        metrics = self.metrics
+        with metrics.iteration():
+            n_catalyzers = len(self.catalyzers)
+            # dicts instead of sets: same species, in the order the reactions found them whatever the hash seed
+            known_names = {species.name for species in self.species}
+            new_cond_species = dict.fromkeys(reaction.product[0] for reaction in self.cond_reactions if reaction.product[0].name not in known_names)
+            new_cll_species = dict.fromkeys(product for reaction in self.cll_reactions for product in reaction.product if product.name not in known_names)
+            new_species = list(new_cond_species | new_cll_species)
+            with metrics.phase("new_catalyzers"):
+                self.generate_new_catalyzers(new_species)
+            self.species.extend(new_species)
             self.species = flatten_species_list(self.species)
-
-        self.cond_reactions = self.eliminate_duplicate_reactions(self.cond_reactions)
-        self.cll_reactions = self.eliminate_duplicate_reactions(self.cll_reactions)
+            metrics.count("new_species", len({species.name for species in new_species}))
+            metrics.count("new_catalyzers", len(self.catalyzers) - n_catalyzers)
+            self.record_structure_sizes()
+
+        with metrics.phase("closure"):
+            while not self.memory_limit_exceeded():
+                with metrics.iteration():
+                    n_catalyzers = len(self.catalyzers)
+                    current_species = flatten_species_list([species for species in self.species if species.name != self.container.name])
+                    new_species_short = [species for species in current_species if len(species.name) <= int(self.system.ML)]
+
+                    with metrics.phase("condensation"):
+                        new_condensation_products = self.generate_condensation_reactions(new_species_short)
+                    new_cleavage_products = [] 
+
+                    with metrics.phase("cleavage"):
+                        if self.system.CLL_ML_ACTIVE:
+                            new_cleavage_products = self.generate_cleavage_reactions(new_species_short)
+                        else:
+                            new_cleavage_products = self.generate_cleavage_reactions(current_species)
+
+                    new_species_set = dict.fromkeys([reaction.product[0] for reaction in new_condensation_products])
+                    new_species_set.update(dict.fromkeys([reaction.product[0] for reaction in new_cleavage_products]))
+                    new_species_set.update(dict.fromkeys([reaction.product[1] for reaction in new_cleavage_products]))
+
+                    new_species_list = list(new_species_set)
+                    current_names = {species.name for species in current_species}
+                    new_species_list = [specie for specie in new_species_list if specie.name not in current_names]
+
+                    with metrics.phase("new_catalyzers"):
+                        self.generate_new_catalyzers(new_species_list)
+
+                    self.cond_reactions.extend(new_condensation_products)
+                    self.cll_reactions.extend(new_cleavage_products)
+                    metrics.count("new_species", len({species.name for species in new_species_list}))
+                    metrics.count("new_catalyzers", len(self.catalyzers) - n_catalyzers)
+                    if not new_species_list:
+                        self.record_structure_sizes()
+                        break
+                    self.species.extend(new_species_list)
+
+                    self.species = flatten_species_list(self.species)
+                    self.record_structure_sizes()
+
+        with metrics.phase("final_dedup"):
+            self.cond_reactions = self.eliminate_duplicate_reactions(self.cond_reactions)
+            self.cll_reactions = self.eliminate_duplicate_reactions(self.cll_reactions)
+
+    def record_structure_sizes(self):
+        # Sizes of the structures that grow with the closure, to see which one is responsible for the memory usage
+        if not self.metrics.track_memory and self.memory_limit is None:
+            return
+        reaction_classes = self.reaction_classes["conds"] + self.reaction_classes["clls"]
+        self.metrics.record("rss", current_rss())
+        self.metrics.record("species", len(self.species))
+        self.metrics.record("catalyzers", len(self.catalyzers))
+        self.metrics.record("cond_reactions", len(self.cond_reactions))
+        self.metrics.record("cll_reactions", len(self.cll_reactions))
+        self.metrics.record("generator_reactions", sum(len(species.generator_reactions) for species in self.species))
+        self.metrics.record("generated_reactions", sum(len(reaction.generated_reactions) for reaction in reaction_classes))
+
+    def memory_limit_exceeded(self):
+        if self.memory_limit is None:
+            return False
+        rss = current_rss()
+        if rss <= self.memory_limit:
+            return False
+        self.stop_reason = (f"Memory limit of {self.memory_limit / 2**20:.1f} MiB exceeded ({rss / 2**20:.1f} MiB in use) "
+                            f"after {len(self.metrics.iterations)} closure iterations, the network is partial.")
+        return True
 
     def eliminate_duplicate_reactions(self, reactions):
+        if self.sample_rate is not None:
+            # Sampled reactions are unique by construction, there is nothing to compare
+            return reactions
+        # Same reaction and same catalyzer set as are_reactions_same, as one key per reaction
         unique_reactions = []
+        seen = set()
         for reaction in reactions:
-            if not any(are_reactions_same(r, reaction) for r in unique_reactions):
-                unique_reactions.append(reaction)
+            key = reaction_key_no_cata(reaction)
+            if key is not None:
+                key = (key, tuple(sorted(catalyzer.species for catalyzer in reaction.reaction_class.catalyzers)))
+                if key in seen:
+                    continue
+                seen.add(key)
+            unique_reactions.append(reaction)
+        self.metrics.count("duplicates_eliminated", len(reactions) - len(unique_reactions))
         return unique_reactions
 
     def sort_species (self):
@@ -283,16 +523,23 @@ class ReactionGenerator:
 
     @timing_decorator
     def run_generation(self):
-        
-        self.generate_catalyzers()
-        self.cond_reactions = self.generate_condensation_reactions(self.species)
-        self.cll_reactions = self.generate_cleavage_reactions(self.species)
+        metrics = self.metrics
+
+        with metrics.phase("generate_catalyzers"):
+            self.generate_catalyzers()
+        metrics.count("initial_catalyzers", len(self.catalyzers))
+        with metrics.phase("initial_condensation"):
+            self.cond_reactions = self.generate_condensation_reactions(self.species)
+        with metrics.phase("initial_cleavage"):
+            self.cll_reactions = self.generate_cleavage_reactions(self.species)
 
-        self.cond_reactions = self.eliminate_duplicate_reactions(self.cond_reactions)
-        self.cll_reactions = self.eliminate_duplicate_reactions(self.cll_reactions)
+        with metrics.phase("initial_dedup"):
+            self.cond_reactions = self.eliminate_duplicate_reactions(self.cond_reactions)
+            self.cll_reactions = self.eliminate_duplicate_reactions(self.cll_reactions)
 
         self.generate_new_species()
-        self.sort_species()
+        with metrics.phase("sort_species"):
+            self.sort_species()
 
 
         generated_data = {
@@ -301,12 +548,142 @@ class ReactionGenerator:
             "cll_reactions": self.cll_reactions,
             "species": self.species,
             "reaction_classes": self.reaction_classes["conds"] + self.reaction_classes["clls"],
-            "seed": self.seed
+            "seed": self.seed,
+            "stop_reason": self.stop_reason
         }
+        if self.sample_rate is not None:
+            generated_data["sampling"] = {
+                "rate": self.sample_rate,
+                "strata": self.sample_strata,
+                # One weight per reaction, in output order: each line of a reaction expanded on its catalyzers has its weight
+                "weights": {"cond": [self.sample_weights[reaction] for reaction in self.cond_reactions],
+                            "cll": [self.sample_weights[reaction] for reaction in self.cll_reactions]},
+            }
 
         return generated_data
 
 
+def create_generator(parsed_data, seed=None, metrics=None, memory_limit=None, legacy_random=False, sample_rate=None, dag_names=False, matcher=None):
+    system = parsed_data.get("system", SystemParameters())
+    species = parsed_data.get("species", [])
+    len_classes = parsed_data.get("len_classes", [])
+    len_dict = {}
+    for length_class in len_classes:
+        for length in length_class.len:
+            len_dict[str(length)] = length_class
+
+    catalyzer_params = parsed_data.get("catalyzer_params", [])
+    reaction_classes = parsed_data.get("reactions", {})
+
+    return ReactionGenerator(system=system,
+                             species=species,
+                             reaction_classes=reaction_classes,
+                             catalyzer_params=catalyzer_params,
+                             len_classes=len_dict,
+                             seed=seed,
+                             metrics=metrics,
+                             memory_limit=memory_limit,
+                             legacy_random=legacy_random,
+                             sample_rate=sample_rate,
+                             dag_names=dag_names,
+                             matcher=matcher
+                             )
+
+
+def run_generator(file_path, output_file=None, debug=False, output_type="txt", seed=None, options=None):
+    # options: see utils.arguments, the defaults of the command line when None
+    if options is None:
+        options = generator_options()
+    metrics = Metrics(track_memory=options.memory)
+    generatorIO = GeneratorIO(input_file=file_path, output_file=output_file, debug=debug, debug_output_type=output_type)
+
+    def run():
+        if options.diff_against is not None and os.path.abspath(options.diff_against) == os.path.abspath(generatorIO.output_file):
+            raise ValueError(f"The new output would overwrite {options.diff_against}, choose another name with -o.")
+        if options.diff_against is not None and options.compact:
+            raise ValueError("Patches are written between expanded outputs, --diff-against cannot be used with --compact.")
+        if (options.workers is not None or options.listen is not None) and options.sample is not None:
+            raise ValueError("Sampling draws its pairs in the coordinator, --sample cannot be used with --workers or --listen.")
+        with metrics.phase("parse"):
+            parsed_data = generatorIO.parse_data()
+        coordinator = None
+        if options.workers is not None or options.listen is not None:
+            from distributed import ClosureCoordinator, parse_address
+            coordinator = ClosureCoordinator(parse_address(options.listen) if options.listen else ("127.0.0.1", 0), options.workers or 0)
+            if options.listen:
+                Logger.info(f"Waiting for workers: python distributed.py {options.listen} --token {coordinator.token}")
+        generator = create_generator(parsed_data, seed, metrics, options.memory_limit, options.legacy_random, options.sample, options.dag_names, coordinator)
+        try:
+            with metrics.phase("generation"):
+                generated_data = generator.run_generation()
+        finally:
+            if coordinator is not None:
+                coordinator.close()
+                Logger.info(f"Distributed closure: {coordinator.round} rounds of {coordinator.n_partitions} work units")
+        with metrics.phase("write"):
+            if options.compact:
+                generatorIO.write_compact(generated_data)
+            else:
+                generatorIO.write_data(generated_data)
+            if options.sample is not None:
+                generatorIO.write_sampling(generated_data["sampling"])
+        if options.diff_against is not None:
+            with metrics.phase("diff"):
+                generatorIO.write_delta(options.diff_against)
+        if options.raf:
+            from utils.raf import find_generated_raf
+            with metrics.phase("raf"):
+                generated_data["raf"] = find_generated_raf(generated_data)
+            generatorIO.write_raf(generated_data["raf"])
+        if options.matrices:
+            from utils.matrices import build_network_matrices
+            with metrics.phase("matrices"):
+                matrices = build_network_matrices(generated_data)
+                generatorIO.write_matrices(matrices)
+
+        if options.simulate is not None:
+            from utils.mass_action import compile_network, simulate as simulate_network
+            with metrics.phase("simulation"):
+                result = simulate_network(compile_network(generated_data), options.simulate, options.samples)
+            generatorIO.write_simulation(result)
+        if options.ssa is not None:
+            from utils.gillespie import compile_channels, simulate_stochastic
+            with metrics.phase("stochastic"):
+                # Seeded from the generation seed: the same command gives the same trajectory
+                result = simulate_stochastic(compile_channels(generated_data, options.copies), options.ssa, options.samples, seed=generated_data["seed"])
+            generatorIO.write_stochastic(result)
+
+        if options.metrics:
+            generatorIO.write_metrics(metrics, generated_data)
+        if options.memory or generated_data["stop_reason"]:
+            Logger.info("Memory report:\n" + metrics.memory_report())
+        if generated_data["stop_reason"]:
+            Logger.warning(generated_data["stop_reason"])
+            Logger.warning(f"The partial network has been written to {generatorIO.compact_file if options.compact else generatorIO.output_file}")
+        return generated_data
+
+    if options.profile is None:
+        return run()
+    from utils.profiler import RunProfiler
+    profiler = RunProfiler(options.profile, options.profile_interval)
+    try:
+        # Profiled as one call, the root of every stack
+        return profiler.runcall(run)
+    finally:
+        # Also written when the run fails or is interrupted, that is often when the profile is wanted
+        generatorIO.write_profile(profiler, options.profile_top)
+
+
+def print_exception(e):
+    exc_type, exc_value, exc_traceback = sys.exc_info()
+    traceback_details = traceback.extract_tb(exc_traceback)
+
+    Logger.flush()
+    print("An error occurred:", str(e))
+    for tb in traceback_details:
+        print(f"File: {tb.filename}, Line: {tb.lineno}, Function: {tb.name}")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Generate species and reactions.")
     parser.add_argument("file_path", help="The path to the input file.")
@@ -314,44 +691,22 @@ if __name__ == "__main__":
     parser.add_argument("-debug", action="store_true", help="Enable debug mode.", default=False)
     parser.add_argument("-ot", "--output-type", choices=["txt", "txt-verbose", "excel"], default="txt", help="Specify the output type. Choices are 'txt', 'txt-verbose', or 'excel'.")
     parser.add_argument("-s", "--seed", type=int, help="Seed for random generation.")
+    add_generator_arguments(parser)
     args = parser.parse_args()
-    debug = args.debug
-    output_type = args.output_type
-    file_path = args.file_path
-    output_file = args.output
-    seed = args.seed
-    
-    generatorIO = GeneratorIO(input_file=file_path, output_file=output_file, debug=debug, debug_output_type=output_type)
+
+    if args.estimate is not None:
+        from estimator import run_estimate
+        try:
+            run_estimate(args.file_path, output_file=args.output, budget=args.estimate)
+        except Exception as e:
+            print_exception(e)
+            sys.exit(1)
+        sys.exit(0)
+
     try:
-        parsed_data = generatorIO.parse_data()
-        system = parsed_data.get("system", SystemParameters())
-        species = parsed_data.get("species", [])
-        len_classes = parsed_data.get("len_classes", [])
-        len_dict = {}
-        for length_class in len_classes:
-            for length in length_class.len:
-                len_dict[str(length)] = length_class
-
-        catalyzer_params = parsed_data.get("catalyzer_params", [])
-        reaction_classes = parsed_data.get("reactions", {})
-
-
-        generator = ReactionGenerator(system=system,
-                                      species=species,
-                                      reaction_classes=reaction_classes,
-                                      catalyzer_params=catalyzer_params,
-                                      len_classes=len_dict,
-                                      seed=seed
-                                      )
-
-        generated_data = generator.run_generation()
-        
-        generatorIO.write_data(generated_data)
+        generated_data = run_generator(args.file_path, output_file=args.output, debug=args.debug, output_type=args.output_type, seed=args.seed, options=args)
     except Exception as e:
-        exc_type, exc_value, exc_traceback = sys.exc_info()
-        traceback_details = traceback.extract_tb(exc_traceback)
-
-        print("An error occurred:", str(e))
-        for tb in traceback_details:
-            print(f"File: {tb.filename}, Line: {tb.lineno}, Function: {tb.name}")
-        sys.exit(1)
\ No newline at end of file
+        print_exception(e)
+        sys.exit(1)
+    if generated_data["stop_reason"]:
+        sys.exit(PARTIAL_EXIT_CODE)
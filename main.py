@@ -1,9 +1,28 @@
 import sys
-import time
-import subprocess
 import argparse
 from utils.decorators import timing_decorator
 from utils.logger import Logger
+from utils.constants import DEFAULT_DAEMON_SOCKET
+from utils.arguments import GENERATOR_ONLY_FLAGS, add_generator_arguments, flags_given
+
+def submit_to_daemon(socket_path, file_path, output_file, debug, output_type, seed, legacy_random=False):
+    from daemon import GeneratorClient
+    try:
+        for message in GeneratorClient(socket_path).submit(file_path=file_path, output=output_file, seed=seed, debug=debug, output_type=output_type, legacy_random=legacy_random):
+            if message["status"] == "accepted":
+                Logger.info(f"Job {message['id']} accepted by the daemon")
+            elif message["status"] == "done":
+                Logger.info(f"Job {message['id']} completed in {message['duration']}s, output written to {message['output_file']}")
+                if message["debug_file"]:
+                    Logger.info(f"Debug info written to {message['debug_file']}")
+                Logger.info(f'Seed {message["seed"]} has been used for the generation.')
+            else:
+                Logger.error(message.get("message", "Unknown error"))
+                sys.exit(1)
+    except OSError as e:
+        Logger.error(f"Could not reach the generator daemon on {socket_path}: {e}")
+        sys.exit(1)
+
 @timing_decorator
 def main():
     parser = argparse.ArgumentParser(description="Run Generator or AutoTool based on the provided flag.")
@@ -15,6 +34,8 @@ def main():
     parser.add_argument("-debug", action="store_true", help="Enable debug mode.", default=False)
     parser.add_argument("-ot", "--output-type", choices=["txt", "txt-verbose", "excel"], help="Specify the output type. Choices are 'txt', 'txt-verbose', or 'excel'.")
     parser.add_argument("-s", "--seed", type=int, help="Seed for random generation.")
+    add_generator_arguments(parser)
+    parser.add_argument("-daemon", nargs="?", const=DEFAULT_DAEMON_SOCKET, metavar="SOCKET", help="Submit the job to a running generator daemon (default socket: %(const)s).")
 
     args = parser.parse_args()
 
@@ -30,44 +51,59 @@ def main():
     Logger.set_debug_mode(debug)
     Logger.get_logger()
     if args.generator:
-        command = ["python3", "generator.py", file_path]
-        if seed:
-            command += ["-s", str(seed)]
-        if output_file:
-            command += ["-o", output_file]
-        if debug:
-            command.append("-debug")
-            if output_type:
-                command += ["-ot", output_type]
-            else:
-                parser.error("-ot/--output-type is required when -debug is specified.")
-        elif output_type:
+        if debug and not output_type:
+            parser.error("-ot/--output-type is required when -debug is specified.")
+        elif output_type and not debug:
             parser.error("-ot/--output-type cannot be used without -debug.")
-    
-    elif args.gentool:
-        Logger.error("Currently under maintenance!")
-        sys.exit(1)
-        print("\nRunning tool process!")
-        command = ["python3", "gen_tool.py", file_path]
-        if output_file:
-            command += ["-o", output_file]
-        if debug:
-            command.append("-debug")
-            if output_type:
-                command += ["-ot", output_type]
-            else:
-                parser.error("-ot/--output-type is required when -debug is specified.")
-        elif output_type:
-            parser.error("-ot/--output-type cannot be used without -debug.")
-    
-    try:
-        Logger.info("Running generation process...")
-        subprocess.run(command, check=True)
+
+        if args.estimate is not None:
+            from estimator import run_estimate
+            from generator import print_exception
+            try:
+                run_estimate(file_path, output_file=output_file, budget=args.estimate)
+            except Exception as e:
+                print_exception(e)
+                sys.exit(1)
+            return
+
+        if args.daemon:
+            # --estimate has already returned, --legacy-random is sent with the job
+            unsupported = flags_given(parser, args, [flag for flag in GENERATOR_ONLY_FLAGS if flag not in ("--estimate", "--legacy-random")])
+            if unsupported:
+                parser.error(f"{', '.join(unsupported)} cannot be used with -daemon, the daemon only runs the job with -o, -s, -debug, -ot and --legacy-random.")
+            submit_to_daemon(args.daemon, file_path, output_file, debug, output_type, seed, args.legacy_random)
+            return
+
+        # Run the generator in this interpreter instead of starting a second one
+        from generator import run_generator, print_exception, PARTIAL_EXIT_CODE
+        try:
+            Logger.info("Running generation process...")
+            generated_data = run_generator(file_path, output_file=output_file, debug=debug, output_type=output_type or "txt", seed=seed, options=args)
+        except Exception as e:
+            print_exception(e)
+            sys.exit(1)
+        if generated_data["stop_reason"]:
+            sys.exit(PARTIAL_EXIT_CODE)
         Logger.info("Generation process completed!")
+        return
 
-    except subprocess.CalledProcessError as e:
-        print(f"An error occurred while running the script: {e}")
-        sys.exit(1)
+    elif args.gentool:
+        if debug or output_type:
+            parser.error("-debug and -ot/--output-type are only available in generator mode.")
+        given = flags_given(parser, args, GENERATOR_ONLY_FLAGS)
+        if given:
+            parser.error(f"{', '.join(given)} are only available in generator mode.")
+        if args.daemon:
+            parser.error("-daemon is only available in generator mode.")
+
+        from gen_tool import run_gentool
+        try:
+            Logger.info("Running tool process...")
+            run_gentool(file_path, output_file)
+            Logger.info("Tool process completed!")
+        except Exception as e:
+            print(f"An error occurred: {e}")
+            sys.exit(1)
 
 if __name__ == "__main__":
     main()
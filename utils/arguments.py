@@ -0,0 +1,55 @@
+import argparse
+from utils.constants import DEFAULT_ESTIMATE_BUDGET, DEFAULT_SIMULATION_SAMPLES, DEFAULT_SSA_COPIES, DEFAULT_PROFILE_TOP, DEFAULT_PROFILE_INTERVAL, PROFILE_MODES
+from utils.metrics import parse_memory_size
+from utils.sampling import parse_sample_rate
+
+# Every flag added by add_generator_arguments, none of them is used by gentool
+GENERATOR_ONLY_FLAGS = ["--sample", "--compact", "--diff-against", "--dag-names", "--legacy-random", "--metrics", "--memory", "--memory-limit", "--raf",
+                        "--matrices", "--simulate", "--ssa", "--copies", "--samples", "--workers", "--listen", "--profile", "--profile-top",
+                        "--profile-interval", "--estimate"]
+
+
+def add_generator_arguments(parser):
+    # The options of a generation shared by generator.py and main.py -generator, see run_generator
+    parser.add_argument("--sample", type=parse_sample_rate, metavar="RATE", help="Sampling mode: keep every condensation pair and cleavage site with this probability (0 < RATE <= 1) instead of enumerating them all.")
+    parser.add_argument("--compact", action="store_true", help="Write every reaction once with its catalyzer set instead of once per catalyzer, to <output>.compact.txt (see compact.py).", default=False)
+    parser.add_argument("--diff-against", metavar="PREVIOUS", help="Also write a patch from this previous output to the new one, see delta.py.")
+    parser.add_argument("--dag-names", action="store_true", help="Keep the generated species names as hash-consed concatenations of their parents, only materialized when written.", default=False)
+    parser.add_argument("--legacy-random", action="store_true", help="Draw every random decision from the global stream seeded once, as older versions did, instead of one stream per decision.", default=False)
+    parser.add_argument("--metrics", action="store_true", help="Write per-phase and per-iteration metrics as JSON next to the output.", default=False)
+    parser.add_argument("--memory", action="store_true", help="Report the tracemalloc peak and RSS of every phase and closure iteration.", default=False)
+    parser.add_argument("--memory-limit", type=parse_memory_size, metavar="SIZE", help="Stop the closure at the first iteration boundary above this RSS (i.e. 512M, 4G; a bare number is in MiB, 4096B in bytes) and write the partial network.")
+    parser.add_argument("--raf", action="store_true", help="Find the maximal RAF set of the generated network (food set: the initial species) and write it next to the output.", default=False)
+    parser.add_argument("--matrices", action="store_true", help="Export the sparse stoichiometry and catalysis matrices and the rate constants as memory-mappable .npy files next to the output.", default=False)
+    parser.add_argument("--simulate", type=float, metavar="T_END", help="Integrate the mass-action kinetics of the generated network from 0 to T_END and write the concentrations to <output>.simulation.tsv.")
+    parser.add_argument("--ssa", type=float, metavar="T_END", help="Run a stochastic (Gillespie next reaction) simulation of the generated network from 0 to T_END, seeded from the generation seed, and write the molecule counts to <output>.ssa.tsv.")
+    parser.add_argument("--copies", type=int, default=DEFAULT_SSA_COPIES, help="Molecules of a species at the default concentration in --ssa, the other counts are scaled from it (default: %(default)s).")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SIMULATION_SAMPLES, help="Number of evenly spaced times written by --simulate and --ssa (default: %(default)s).")
+    parser.add_argument("--workers", type=int, metavar="N", help="Distributed closure: split the pattern matching of every closure iteration among N local worker processes, the network is the same.")
+    parser.add_argument("--listen", metavar="HOST:PORT", help="Distributed closure: also accept workers from other machines on this address (python distributed.py HOST:PORT --token TOKEN).")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES, help="Profile the whole run (parse, generation, outputs): write <output>.pstats and flamegraph-ready collapsed stacks to <output>.collapsed.txt, and log the hottest functions. 'sample' only samples the stacks, for long runs (default: %(const)s).")
+    parser.add_argument("--profile-top", type=int, default=DEFAULT_PROFILE_TOP, metavar="N", help="Number of functions logged by --profile (default: %(default)s).")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_PROFILE_INTERVAL, metavar="SECONDS", help="Sampling interval of --profile sample (default: %(default)s).")
+    parser.add_argument("--estimate", nargs="?", type=float, const=DEFAULT_ESTIMATE_BUDGET, metavar="SECONDS", help="Only estimate the size of the network, output and memory within this time budget (default: %(const)ss), without generating it.")
+
+
+def generator_options(**values):
+    # The defaults of the command line, overridden by values (named after the flags: sample, raf, ssa...)
+    parser = argparse.ArgumentParser(add_help=False)
+    add_generator_arguments(parser)
+    options = parser.parse_args([])
+    for name, value in values.items():
+        if not hasattr(options, name):
+            raise TypeError(f"Unknown generator option '{name}'")
+        setattr(options, name, value)
+    return options
+
+
+def flags_given(parser, args, flags):
+    # The flags whose value differs from their default
+    given = []
+    for flag in flags:
+        dest = flag.lstrip("-").replace("-", "_")
+        if getattr(args, dest) != parser.get_default(dest):
+            given.append(flag)
+    return given
@@ -14,6 +14,16 @@ SPECIES_INPUT_FORM = ['<speciename>', '<concentration>', '<contribution>', '<can
 
 CONFIG_FILE = 'config/config.ini'
 DEFAULT_OUTPUT_FILE='output'
+DEFAULT_DAEMON_SOCKET='/tmp/chemical_generator.sock'
+DEFAULT_ESTIMATE_BUDGET=5.0
+LOG_SUMMARY_NAMES=10
+DEFAULT_SIMULATION_SAMPLES=101
+DEFAULT_SSA_COPIES=100
+DEFAULT_DISTRIBUTED_PARTITIONS=16
+DISTRIBUTED_RESULT_TIMEOUT=3600.0
+DEFAULT_PROFILE_TOP=20
+DEFAULT_PROFILE_INTERVAL=0.005
+PROFILE_MODES=["cprofile", "sample"]
 
 CONTAINER='Cont'
 CLL_ML_ACTIVE='CLL_ML_ACTIVE'
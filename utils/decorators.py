@@ -1,30 +1,31 @@
 import time
 from .logger import Logger
-from chemistryIO.config_handler import config_handler
+from chemistryIO.config_handler import config
 from functools import wraps
 
+# The debug flags are read once, when a function is decorated: a disabled decorator returns the bare function
+
 def timing_decorator(func):
+    if not config.print_function_time:
+        return func
+
     @wraps(func)
     def wrapper(*args, **kwargs):
-        if not config_handler.print_function_time:
-            return func(*args, **kwargs)
-        start_time = time.time()
+        start_time = time.perf_counter()
         result = func(*args, **kwargs)
-        end_time = time.time()
+        end_time = time.perf_counter()
         duration = end_time - start_time
-        Logger.debug(f"Function '{func.__name__}' took {duration:.4f} seconds to complete.")
+        Logger.debug("Function '%s' took %.4f seconds to complete.", func.__name__, duration)
         return result
     return wrapper
 
 def species_involved_decorator(func):
+    if not config.print_species_involved:
+        return func
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
-        if not config_handler.print_species_involved:
-            return func(*args, **kwargs)
-        self = args[0]
-        species = args[1]
-        species_names = [sp.name for sp in species]
-        Logger.debug(f"Function '{func.__name__}' species involved: {species_names}")
+        # Count and first names only, built when the record is emitted
+        Logger.debug("Function '%s' species involved: %s", func.__name__, Logger.summary(args[1], "name"))
         return func(*args, **kwargs)
     return wrapper
-
-
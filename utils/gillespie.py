@@ -0,0 +1,204 @@
+import math
+from collections import Counter
+from chemistryIO.config_handler import config
+from utils.constants import DEFAULT_SIMULATION_SAMPLES, DEFAULT_SSA_COPIES
+from utils.mass_action import expanded_reactions
+from utils.streams import RandomStreams
+
+INFINITY = math.inf
+
+
+def compile_channels(data, copies=DEFAULT_SSA_COPIES):
+    # Reaction channels of the stochastic simulation: one per expanded reaction, in the order of the output lines, then
+    # an inflow and an outflow channel per membrane species. Molecule counts are concentrations times `molecules`, chosen
+    # so that a species at the default concentration has `copies` molecules, and the deterministic rate constant k of a
+    # reaction of order n becomes k / molecules^(n - 1): at high copy numbers the mean follows the mass-action kinetics
+    species = data["species"]
+    species_index = {specie.name: i for i, specie in enumerate(species)}
+    molecules = copies / config.default_concentration
+
+    factors, rates, changes = [], [], []
+    for reactants, products, catalyzer, speed in expanded_reactions(data, species_index):
+        consumed = Counter(reactants + [catalyzer])
+        # (species, offset) pairs, the propensity is the rate times the counts minus their offsets: a species consumed
+        # m times contributes the falling factorial count (count - 1) ... (count - m + 1)
+        factors.append(tuple((species_id, offset) for species_id, multiplicity in consumed.items() for offset in range(multiplicity)))
+        rates.append(speed / molecules ** (len(reactants)))
+        net = Counter(products)
+        net.update({catalyzer: 1})
+        net.subtract(consumed)
+        changes.append(tuple((species_id, change) for species_id, change in net.items() if change))
+
+    for i, specie in enumerate(species):
+        if not specie.can_cross_membrane:
+            continue
+        external = float(specie.external_concentration or config.external_concentration)
+        diffusion = float(specie.diffusion_constant or config.diffusion_constant)
+        factors += [(), ((i, 0),)]
+        rates += [diffusion * external * molecules, diffusion]
+        changes += [((i, 1),), ((i, -1),)]
+
+    # Dependency graph, kept factored: the channels whose propensity reads a species, the species a channel changes.
+    # The channels to update after an event are the union over its changed species, which is as large as the expanded
+    # graph would be per event but does not store it once per channel
+    dependents = [[] for _ in species]
+    for channel, channel_factors in enumerate(factors):
+        for species_id in dict.fromkeys(species_id for species_id, _ in channel_factors):
+            dependents[species_id].append(channel)
+
+    return {
+        "species": [str(specie.name) for specie in species],
+        "initial": [round(float(specie.concentration) * molecules) for specie in species],
+        "molecules": molecules,
+        "factors": factors,
+        "rates": rates,
+        "changes": changes,
+        "dependents": [tuple(channels) for channels in dependents],
+        "n_reactions": len(factors) - 2 * sum(1 for specie in species if specie.can_cross_membrane),
+    }
+
+
+class IndexedPriorityQueue:
+    # Binary min-heap of the channels on their next firing time, with the heap position of every channel so that a
+    # changed time is moved up or down in O(log n) instead of being pushed again
+    def __init__(self, keys):
+        self.keys = keys
+        self.heap = sorted(range(len(keys)), key=keys.__getitem__)
+        self.position = [0] * len(keys)
+        for position, item in enumerate(self.heap):
+            self.position[item] = position
+
+    def top(self):
+        return self.heap[0]
+
+    def update(self, item, key):
+        old = self.keys[item]
+        self.keys[item] = key
+        if key < old:
+            self._sift_up(self.position[item])
+        elif key > old:
+            self._sift_down(self.position[item])
+
+    def _sift_up(self, position):
+        heap, keys, positions = self.heap, self.keys, self.position
+        item = heap[position]
+        key = keys[item]
+        while position:
+            parent = (position - 1) >> 1
+            parent_item = heap[parent]
+            if keys[parent_item] <= key:
+                break
+            heap[position] = parent_item
+            positions[parent_item] = position
+            position = parent
+        heap[position] = item
+        positions[item] = position
+
+    def _sift_down(self, position):
+        heap, keys, positions = self.heap, self.keys, self.position
+        size = len(heap)
+        item = heap[position]
+        key = keys[item]
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            child_item = heap[child]
+            if keys[child_item] >= key:
+                break
+            heap[position] = child_item
+            positions[child_item] = position
+            position = child
+        heap[position] = item
+        positions[item] = position
+
+
+def propensity(rate, channel_factors, counts):
+    for species_id, offset in channel_factors:
+        rate *= counts[species_id] - offset
+    return rate
+
+
+def simulate_stochastic(network, t_end, n_samples=DEFAULT_SIMULATION_SAMPLES, seed=0, initial=None, max_events=None):
+    # Gibson-Bruck next reaction method: every channel keeps an absolute firing time in the indexed queue, an event
+    # only recomputes the propensities of its dependent channels and rescales their times, one draw per event
+    rng = RandomStreams(seed).stream("gillespie")
+    expovariate = rng.expovariate
+    factors, rates, changes, dependents = network["factors"], network["rates"], network["changes"], network["dependents"]
+    counts = list(network["initial"] if initial is None else initial)
+    n_channels = len(factors)
+
+    propensities = [propensity(rates[channel], factors[channel], counts) for channel in range(n_channels)]
+    queue = IndexedPriorityQueue([expovariate(1.0) / a if a > 0 else INFINITY for a in propensities])
+    keys = queue.keys
+    updated = [-1] * n_channels
+
+    n_samples = max(n_samples, 2)
+    times = [t_end * i / (n_samples - 1) for i in range(n_samples)]
+    samples = []
+    n_events = n_updates = 0
+    stop_reason = None
+    while True:
+        channel = queue.top() if n_channels else None
+        t = keys[channel] if n_channels else INFINITY
+        # The counts are constant between events: a sample time before this event sees the current ones
+        while len(samples) < n_samples and times[len(samples)] < t:
+            samples.append(counts[:])
+        if len(samples) == n_samples:
+            break
+        if max_events is not None and n_events >= max_events:
+            stop_reason = f"Stopped at t={t:.6g} after {max_events} events."
+            break
+
+        n_events += 1
+        for species_id, change in changes[channel]:
+            counts[species_id] += change
+        a = propensities[channel] = propensity(rates[channel], factors[channel], counts)
+        queue.update(channel, t + expovariate(1.0) / a if a > 0 else INFINITY)
+        updated[channel] = n_events
+        for species_id, _ in changes[channel]:
+            for dependent in dependents[species_id]:
+                if updated[dependent] == n_events:
+                    continue
+                updated[dependent] = n_events
+                n_updates += 1
+                old = propensities[dependent]
+                # propensity(), inlined: this is the inner loop of the simulation
+                a = rates[dependent]
+                for species_id, offset in factors[dependent]:
+                    a *= counts[species_id] - offset
+                if a == old:
+                    continue
+                propensities[dependent] = a
+                if a <= 0:
+                    queue.update(dependent, INFINITY)
+                elif old > 0:
+                    queue.update(dependent, t + old / a * (keys[dependent] - t))
+                else:
+                    # A channel that was disabled gets a fresh draw, the exponential time is memoryless
+                    queue.update(dependent, t + expovariate(1.0) / a)
+
+    return {
+        "species": network["species"],
+        "times": times[:len(samples)],
+        "counts": samples,
+        "final": counts,
+        "t_final": min(t, t_end),
+        "seed": seed,
+        "molecules": network["molecules"],
+        "n_reactions": network["n_reactions"],
+        "n_channels": n_channels,
+        "n_events": n_events,
+        "n_propensity_updates": n_updates,
+        "stop_reason": stop_reason,
+    }
+
+
+def write_trajectory(result, path):
+    # One row per sampled time, one column per species, in molecules
+    with open(path, 'w') as file:
+        file.write("\t".join(["time", *result["species"]]) + "\n")
+        for t, counts in zip(result["times"], result["counts"]):
+            file.write("\t".join([f"{t:.10g}", *map(str, counts)]) + "\n")
@@ -0,0 +1,98 @@
+# Below this many characters the NumPy setup costs more than the plain Python extraction
+NUMPY_MIN_CHARS = 4096
+# Distinct windows decoded back to strings at a time by the NumPy engine
+DECODE_BLOCK = 1 << 16
+
+
+def _numpy():
+    # numpy is optional and slow to import, only load it when the vectorized engine is used
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def iter_kmers_python(names, nts):
+    for nt in sorted(set(nts)):
+        if nt <= 0:
+            continue
+        kmers = set()
+        for name in names:
+            kmers.update(name[i:i + nt] for i in range(len(name) - nt + 1))
+        yield from sorted(kmers)
+
+
+def _sorted_unique(np, values):
+    # Sort based: np.unique may pick a hash table, much slower than a sort on plain int64 keys
+    values = np.sort(values)
+    keep = np.empty(len(values), dtype=bool)
+    keep[:1] = True
+    np.not_equal(values[1:], values[:-1], out=keep[1:])
+    return values[keep]
+
+
+def _decode(np, alphabet, digits, nt):
+    # One buffer cut every nt characters
+    decoded = alphabet[digits].tobytes().decode("ascii")
+    return (decoded[i:i + nt] for i in range(0, len(decoded), nt))
+
+
+def iter_kmers_numpy(names, nts, np):
+    text = "".join(names).encode("ascii")
+    codes = np.frombuffer(text, dtype=np.uint8)
+    lengths = np.fromiter((len(name) for name in names), dtype=np.int64, count=len(names))
+    offsets = np.cumsum(lengths) - lengths
+
+    # Encode every character on the alphabet actually used, so windows pack into as few bits as possible
+    alphabet = np.unique(codes)
+    base = len(alphabet)
+    lookup = np.zeros(256, dtype=np.int64)
+    lookup[alphabet] = np.arange(base)
+    symbols = lookup[codes]
+
+    # Characters left in the species from each position, a window of nt fits if at least nt are left
+    remaining = np.repeat(lengths, lengths) - (np.arange(len(codes)) - np.repeat(offsets, lengths))
+
+    for nt in sorted(set(nts)):
+        if nt <= 0 or nt > len(codes):
+            continue
+        n_windows = len(codes) - nt + 1
+        starts = np.flatnonzero(remaining[:n_windows] >= nt)
+        if not len(starts):
+            continue
+
+        # The distinct windows come out sorted on the codes of the (sorted) alphabet, i.e. in string order, and
+        # only a block of them is decoded back to strings at a time
+        if max(base, 2) ** nt < 2**63:
+            # Rolling polynomial hash, exact (no collisions) because it is the base-`base` number of the window
+            hashes = np.zeros(n_windows, dtype=np.int64)
+            for k in range(nt):
+                hashes = hashes * base + symbols[k:k + n_windows]
+            unique_hashes = _sorted_unique(np, hashes[starts])
+            powers = base ** np.arange(nt - 1, -1, -1, dtype=np.int64)
+            for block in range(0, len(unique_hashes), DECODE_BLOCK):
+                yield from _decode(np, alphabet, (unique_hashes[block:block + DECODE_BLOCK, None] // powers) % base, nt)
+        else:
+            windows = np.lib.stride_tricks.sliding_window_view(symbols, nt)[starts]
+            digits = np.unique(windows, axis=0)
+            for block in range(0, len(digits), DECODE_BLOCK):
+                yield from _decode(np, alphabet, digits[block:block + DECODE_BLOCK], nt)
+
+
+def iter_kmers(names, nts, use_numpy=None):
+    # Every distinct substring of length nt (for every nt) of the given names, by length then in string order,
+    # produced as they are consumed
+    names = list(names)
+    nts = list(nts)
+    if use_numpy is None:
+        use_numpy = sum(len(name) for name in names) >= NUMPY_MIN_CHARS
+    np = _numpy() if use_numpy else None
+    if np is None or not names or not all(name.isascii() for name in names):
+        return iter_kmers_python(names, nts)
+    return iter_kmers_numpy(names, nts, np)
+
+
+def extract_kmers(names, nts, use_numpy=None):
+    # Set of all the distinct substrings of length nt (for every nt) of the given names
+    return set(iter_kmers(names, nts, use_numpy))
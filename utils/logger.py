@@ -1,5 +1,29 @@
+import os
+import queue
+import atexit
 import logging
+from itertools import islice
 import colorlog
+from .constants import LOG_SUMMARY_NAMES
+
+
+class Summary:
+    # Count and first names of a collection, only built if the record is actually emitted
+    def __init__(self, items, attribute=None, limit=LOG_SUMMARY_NAMES):
+        self.items = items
+        self.attribute = attribute
+        self.limit = limit
+
+    def __str__(self):
+        names = islice(self.items, self.limit)
+        if self.attribute is not None:
+            names = (getattr(item, self.attribute) for item in names)
+        names = ", ".join(map(str, names))
+        hidden = len(self.items) - self.limit
+        if hidden > 0:
+            names += f", ... (+{hidden} more)"
+        return f"{len(self.items)} [{names}]"
+
 
 class Logger:
     _instance = None
@@ -15,10 +39,16 @@ class Logger:
             return
         self._initialized = True
         self.debug_mode = debug_mode
+        self.listener = None
+        self.background = True
         self.logger = colorlog.getLogger()
         self._configure_logger()
+        atexit.register(self._stop_listener)
+        # A forked worker may leave without running atexit, it writes its records itself
+        os.register_at_fork(after_in_child=self._after_fork)
 
     def _configure_logger(self):
+        self._stop_listener()
         # Clear existing handlers to avoid duplicate logs
         if self.logger.hasHandlers():
             self.logger.handlers.clear()
@@ -38,9 +68,28 @@ class Logger:
 
         handler = colorlog.StreamHandler()
         handler.setFormatter(formatter)
+        if self.background:
+            # The caller only formats the message and queues it, the terminal is written by the listener thread
+            from logging.handlers import QueueHandler, QueueListener
+            records = queue.SimpleQueue()
+            self.listener = QueueListener(records, handler)
+            self.listener.start()
+            handler = QueueHandler(records)
         self.logger.addHandler(handler)
         self.logger.setLevel(logging.DEBUG if self.debug_mode else logging.INFO)
 
+    def _stop_listener(self):
+        # Writes the records still queued
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _after_fork(self):
+        # The listener thread does not survive a fork
+        self.listener = None
+        self.background = False
+        self._configure_logger()
+
     @staticmethod
     def get_logger():
         if Logger._instance is None:
@@ -56,21 +105,38 @@ class Logger:
             Logger._instance._configure_logger()
 
     @staticmethod
-    def debug(message):
-        Logger.get_logger().debug(message)
+    def is_debug():
+        return Logger.get_logger().isEnabledFor(logging.DEBUG)
+
+    @staticmethod
+    def summary(items, attribute=None, limit=LOG_SUMMARY_NAMES):
+        return Summary(items, attribute, limit)
+
+    @staticmethod
+    def flush():
+        # Waits for the listener to write everything queued so far, i.e. before printing to the terminal directly
+        instance = Logger._instance
+        if instance is not None and instance.listener is not None:
+            instance.listener.stop()
+            instance.listener.start()
+
+    # %-style arguments are only merged into the message when the level is enabled
+    @staticmethod
+    def debug(message, *args):
+        Logger.get_logger().debug(message, *args)
 
     @staticmethod
-    def info(message):
-        Logger.get_logger().info(message)
+    def info(message, *args):
+        Logger.get_logger().info(message, *args)
 
     @staticmethod
-    def warning(message):
-        Logger.get_logger().warning(message)
+    def warning(message, *args):
+        Logger.get_logger().warning(message, *args)
 
     @staticmethod
-    def error(message):
-        Logger.get_logger().error(message)
+    def error(message, *args):
+        Logger.get_logger().error(message, *args)
 
     @staticmethod
-    def critical(message):
-        Logger.get_logger().critical(message)
+    def critical(message, *args):
+        Logger.get_logger().critical(message, *args)
@@ -0,0 +1,228 @@
+from chemistryIO.config_handler import config
+from utils.constants import DEFAULT_SIMULATION_SAMPLES
+
+# Reactant slots of an expanded reaction: two reactants and the catalyzer for a condensation, one reactant and the
+# catalyzer for a cleavage. Unused slots point to a constant 1 appended to the state, so every rate is one product
+N_SLOTS = 3
+INTEGRATORS = ["auto", "BDF", "LSODA", "Radau", "builtin"]
+DEFAULT_RTOL = 1e-6
+# Absolute tolerance relative to the largest initial concentration (the concentrations can be ~1e-15)
+DEFAULT_ATOL_SCALE = 1e-9
+BUILTIN_MAX_STEPS = 1_000_000
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("The simulator needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def _scipy_integrate():
+    # scipy is optional, without it the built-in linearly implicit integrator is used
+    try:
+        from scipy import integrate, sparse
+    except ImportError:
+        return None, None
+    return integrate, sparse
+
+
+def expanded_reactions(data, species_index):
+    # (reactant ids, product ids, catalyzer id, speed) of the expanded reactions, in the order of the output lines:
+    # condensations, then cleavages, each one once per catalyzer of its class
+    for reactions, n_reactants in ((data["cond_reactions"], 2), (data["cll_reactions"], 1)):
+        for reaction in reactions:
+            reactants = [species_index[name] for name in reaction.reactants[:n_reactants]]
+            products = [species_index[product.name] for product in reaction.product]
+            speed = float(reaction.reaction_class.reaction_speed)
+            for catalyzer in reaction.reaction_class.catalyzers:
+                yield reactants, products, species_index[catalyzer.species], speed
+
+
+def compile_network(data):
+    # Index arrays of the expanded reactions and of the membrane diffusion lines
+    np = _numpy()
+    species = data["species"]
+    species_index = {specie.name: i for i, specie in enumerate(species)}
+    unit = len(species)
+
+    slots, speeds, rows, columns, values = [], [], [], [], []
+    for reactants, products, catalyzer, speed in expanded_reactions(data, species_index):
+        # The catalyzer is on both sides: it scales the rate and its net change is zero
+        column = len(speeds)
+        slots.append(reactants + [catalyzer] + [unit] * (N_SLOTS - 1 - len(reactants)))
+        speeds.append(speed)
+        for species_id, value in [(reactant, -1.0) for reactant in reactants] + [(product, 1.0) for product in products]:
+            rows.append(species_id)
+            columns.append(column)
+            values.append(value)
+
+    membrane = [i for i, specie in enumerate(species) if specie.can_cross_membrane]
+    return {
+        "species": [str(specie.name) for specie in species],
+        "initial": np.array([float(specie.concentration) for specie in species], dtype=np.float64),
+        "slots": np.array(slots, dtype=np.int64).reshape(-1, N_SLOTS),
+        "speeds": np.array(speeds, dtype=np.float64),
+        "rows": np.array(rows, dtype=np.int64),
+        "columns": np.array(columns, dtype=np.int64),
+        "values": np.array(values, dtype=np.float64),
+        # Same defaults as the membrane lines of the output
+        "membrane": np.array(membrane, dtype=np.int64),
+        "external": np.array([float(species[i].external_concentration or config.external_concentration) for i in membrane], dtype=np.float64),
+        "diffusion": np.array([float(species[i].diffusion_constant or config.diffusion_constant) for i in membrane], dtype=np.float64),
+    }
+
+
+class MassActionSystem:
+    # dx/dt = S r(x) + D (x_ext - x), with r_j = k_j x_a x_b x_c over the reactant slots of reaction j
+    def __init__(self, network):
+        np = self.np = _numpy()
+        self.network = network
+        self.n_species = len(network["species"])
+        self.slots = network["slots"]
+        self.speeds = network["speeds"]
+        self.rows = network["rows"]
+        self.columns = network["columns"]
+        self.values = network["values"]
+        self.membrane = network["membrane"]
+        self.external = network["external"]
+        self.diffusion = network["diffusion"]
+        self.n_derivatives = 0
+        self.n_jacobians = 0
+
+        # Jacobian pattern, computed once: stoichiometry entry (i, j) x reactant slot s of j gives d(dx_i)/dx_slot
+        n_entries = len(self.rows)
+        entry = np.repeat(np.arange(n_entries), N_SLOTS)
+        slot = np.tile(np.arange(N_SLOTS), n_entries)
+        wrt = self.slots[self.columns[entry], slot] if n_entries else np.zeros(0, dtype=np.int64)
+        used = wrt != self.n_species
+        self.jacobian_entry, self.jacobian_slot = entry[used], slot[used]
+        keys = np.concatenate([self.rows[self.jacobian_entry] * self.n_species + wrt[used],
+                               self.membrane * (self.n_species + 1)])
+        keys, self.jacobian_position = np.unique(keys, return_inverse=True)
+        self.jacobian_rows, self.jacobian_columns = np.divmod(keys, self.n_species)
+        self.jacobian_indptr = np.zeros(self.n_species + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.jacobian_rows, minlength=self.n_species), out=self.jacobian_indptr[1:])
+
+    def _reactant_values(self, x):
+        return self.np.append(x, 1.0)[self.slots]
+
+    def rates(self, x):
+        return self.speeds * self._reactant_values(x).prod(axis=1)
+
+    def derivatives(self, t, x):
+        self.n_derivatives += 1
+        np = self.np
+        flux = self.values * self.rates(x)[self.columns]
+        dx = np.bincount(self.rows, weights=flux, minlength=self.n_species)
+        dx[self.membrane] += self.diffusion * (self.external - x[self.membrane])
+        return dx
+
+    def jacobian_values(self, x):
+        # dr_j/dx_s is the product of the other slots: prefix and suffix products of the slot values
+        self.n_jacobians += 1
+        np = self.np
+        values = self._reactant_values(x)
+        before = np.ones_like(values)
+        after = np.ones_like(values)
+        for slot in range(1, N_SLOTS):
+            before[:, slot] = before[:, slot - 1] * values[:, slot - 1]
+            after[:, N_SLOTS - 1 - slot] = after[:, N_SLOTS - slot] * values[:, N_SLOTS - slot]
+        partial = self.speeds[:, None] * before * after
+        entries = self.values[self.jacobian_entry] * partial[self.columns[self.jacobian_entry], self.jacobian_slot]
+        entries = np.concatenate([entries, -self.diffusion])
+        return np.bincount(self.jacobian_position, weights=entries, minlength=len(self.jacobian_rows))
+
+    def jacobian(self, t, x):
+        # scipy.sparse CSR matrix when scipy is there, dense array otherwise
+        _, sparse = _scipy_integrate()
+        values = self.jacobian_values(x)
+        if sparse is not None:
+            return sparse.csr_matrix((values, self.jacobian_columns, self.jacobian_indptr), shape=(self.n_species, self.n_species))
+        return self.dense_jacobian(values)
+
+    def dense_jacobian(self, values):
+        matrix = self.np.zeros((self.n_species, self.n_species))
+        matrix[self.jacobian_rows, self.jacobian_columns] = values
+        return matrix
+
+
+def _builtin_integrate(system, x0, times, rtol, atol, max_steps=BUILTIN_MAX_STEPS):
+    # Linearly implicit (Rosenbrock) Euler, (I - hJ) dx = h f(x), stable on stiff systems. The step is controlled by
+    # comparing one step with two half steps, and the result is their Richardson extrapolation
+    np = _numpy()
+    identity = np.eye(system.n_species)
+
+    def step(x, h, jacobian):
+        return x + np.linalg.solve(identity - h * jacobian, h * system.derivatives(None, x))
+
+    states = [x0]
+    x, t = x0, times[0]
+    h = (times[-1] - times[0]) / 1000 or 1.0
+    n_steps = 0
+    for target in times[1:]:
+        while t < target:
+            n_steps += 1
+            if n_steps > max_steps:
+                raise RuntimeError(f"The built-in integrator did not reach t={target} in {max_steps} steps.")
+            h = min(h, target - t)
+            jacobian = system.dense_jacobian(system.jacobian_values(x))
+            full = step(x, h, jacobian)
+            half = step(step(x, h / 2, jacobian), h / 2, jacobian)
+            error = np.max(np.abs(full - half) / (atol + rtol * np.abs(half)), initial=0.0)
+            if error <= 1.0:
+                x, t = 2 * half - full, t + h
+            h *= min(4.0, max(0.2, 0.9 / np.sqrt(error))) if error > 0 else 4.0
+        states.append(x)
+    return np.array(states), {"steps": n_steps}
+
+
+def simulate(network, t_end, n_samples=DEFAULT_SIMULATION_SAMPLES, method="auto", rtol=DEFAULT_RTOL, atol=None, initial=None):
+    # Concentrations at n_samples evenly spaced times from 0 to t_end
+    np = _numpy()
+    if method not in INTEGRATORS:
+        raise ValueError(f"Unknown integrator {method}, choose one of {INTEGRATORS}.")
+    system = MassActionSystem(network)
+    x0 = np.array(network["initial"] if initial is None else initial, dtype=np.float64)
+    if atol is None:
+        atol = DEFAULT_ATOL_SCALE * (np.max(np.abs(x0), initial=0.0) or 1.0)
+    times = np.linspace(0.0, t_end, max(n_samples, 2))
+
+    integrate, _ = _scipy_integrate()
+    if method == "auto":
+        method = "BDF" if integrate is not None else "builtin"
+    if method == "builtin":
+        states, stats = _builtin_integrate(system, x0, times, rtol, atol)
+        success, message = True, "built-in integrator finished"
+    else:
+        if integrate is None:
+            raise ImportError(f"The {method} integrator needs scipy (pip install scipy), use 'builtin' without it")
+        # LSODA only takes a dense Jacobian
+        jacobian = (lambda t, x: system.jacobian(t, x).toarray()) if method == "LSODA" else system.jacobian
+        solution = integrate.solve_ivp(system.derivatives, (0.0, t_end), x0, method=method, t_eval=times,
+                                       jac=jacobian, rtol=rtol, atol=atol)
+        states, success, message = solution.y.T, solution.success, solution.message
+        stats = {"lu_decompositions": int(solution.nlu)}
+        times = solution.t
+
+    return {
+        "species": network["species"],
+        "times": times,
+        "concentrations": states,
+        "method": method,
+        "success": bool(success),
+        "message": str(message),
+        "n_reactions": len(network["speeds"]),
+        "n_derivatives": system.n_derivatives,
+        "n_jacobians": system.n_jacobians,
+        **stats,
+    }
+
+
+def write_simulation(result, path):
+    # One row per sampled time, one column per species
+    with open(path, 'w') as file:
+        file.write("\t".join(["time", *result["species"]]) + "\n")
+        for t, concentrations in zip(result["times"], result["concentrations"]):
+            file.write("\t".join(f"{value:.10g}" for value in (t, *concentrations)) + "\n")
@@ -0,0 +1,56 @@
+import zlib
+
+# Pattern matching of the closure, as indices into the name list it is given, in the order of the nested loops of the
+# enumeration: condensations as (left, right, class), cleavages as (species, class, start of the pattern).
+# Only names and patterns go in, so the matching can run anywhere and be merged back by sorting.
+
+
+def partition_of(name, n_partitions):
+    # Stable across processes and machines, unlike hash() of a str
+    return zlib.crc32(str(name).encode()) % n_partitions
+
+
+def partition_rows(names, partition, n_partitions):
+    if n_partitions == 1:
+        return range(len(names))
+    return [i for i, name in enumerate(names) if partition_of(name, n_partitions) == partition]
+
+
+def condensation_matches(names, patterns, rows=None):
+    # patterns: (generic_reactant_1, generic_reactant_2) of every condensation class
+    right_classes = [[c for c, (_, right) in enumerate(patterns) if name.startswith(right)] for name in names]
+    matches = []
+    for i in range(len(names)) if rows is None else rows:
+        name = names[i]
+        left_classes = {c for c, (left, _) in enumerate(patterns) if name.endswith(left)}
+        if not left_classes:
+            continue
+        for j, classes in enumerate(right_classes):
+            for c in classes:
+                if c in left_classes:
+                    matches.append((i, j, c))
+    return matches
+
+
+def cleavage_matches(names, patterns, rows=None):
+    # patterns: (generic_reactant, n_split) of every cleavage class
+    matches = []
+    for i in range(len(names)) if rows is None else rows:
+        text = str(names[i])
+        for c, (core, n_split) in enumerate(patterns):
+            if len(core) < n_split:
+                continue
+            start_index = text.find(core)
+            while start_index != -1:
+                matches.append((i, c, start_index))
+                start_index = text.find(core, start_index + 1)
+    return matches
+
+
+class LocalMatcher:
+    # The matcher of a single process run, see distributed.ClosureCoordinator for the distributed one
+    def condensation(self, names, patterns):
+        return condensation_matches(names, patterns)
+
+    def cleavage(self, names, patterns):
+        return cleavage_matches(names, patterns)
@@ -0,0 +1,146 @@
+import os
+import json
+
+# Files of an exported network, every array is a plain .npy that np.load can memory-map
+MATRICES = ["reactants", "products", "stoichiometry", "catalysis"]
+CSR_PARTS = ["indptr", "indices", "data"]
+VECTORS = ["rates", "reaction_type", "reaction_class", "reaction_catalyzer", "catalyzer_species"]
+COND, CLL = 0, 1
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("The matrix export needs numpy (pip install numpy)") from None
+    return numpy
+
+
+def _scipy_sparse():
+    # scipy is optional, without it the matrices stay plain CSR index arrays
+    try:
+        from scipy import sparse
+    except ImportError:
+        return None
+    return sparse
+
+
+def coo_to_csr(np, rows, cols, values, shape):
+    # Sum the duplicated entries (A + A, a catalyzer that is also a reactant) and drop the zeros, rows sorted by column
+    keys = rows.astype(np.int64) * shape[1] + cols
+    keys, inverse = np.unique(keys, return_inverse=True)
+    values = np.bincount(inverse, weights=values, minlength=len(keys))
+    nonzero = values != 0
+    keys, values = keys[nonzero], values[nonzero]
+    rows, cols = np.divmod(keys, shape[1])
+    indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+    return {"indptr": indptr, "indices": cols.astype(np.int64), "data": values, "shape": shape}
+
+
+def as_sparse(matrix):
+    # scipy.sparse.csr_matrix when scipy is there, the CSR dict itself otherwise
+    sparse = _scipy_sparse()
+    if sparse is None:
+        return matrix
+    return sparse.csr_matrix((matrix["data"], matrix["indices"], matrix["indptr"]), shape=matrix["shape"])
+
+
+def _expand(np, reactions, class_index, catalyzer_index):
+    # Base reactions in output order, repeated once per catalyzer of their class exactly as write_data does
+    classes = list(class_index)
+    class_catalyzers = [[catalyzer_index[catalyzer] for catalyzer in reaction_class.catalyzers] for reaction_class in classes]
+    counts = np.array([len(catalyzers) for catalyzers in class_catalyzers], dtype=np.int64)
+    offsets = np.zeros(len(classes) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    flat_catalyzers = np.fromiter((catalyzer for catalyzers in class_catalyzers for catalyzer in catalyzers), dtype=np.int64, count=int(offsets[-1]))
+
+    base_class = np.fromiter((class_index[reaction.reaction_class] for reaction in reactions), dtype=np.int64, count=len(reactions))
+    repeats = counts[base_class] if len(classes) else np.zeros(0, dtype=np.int64)
+    base = np.repeat(np.arange(len(reactions)), repeats)
+    position = np.arange(len(base)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+    return base, base_class[base], flat_catalyzers[offsets[base_class[base]] + position]
+
+
+def build_network_matrices(data):
+    np = _numpy()
+    species = [species.name for species in data["species"]]
+    species_index = {name: i for i, name in enumerate(species)}
+    catalyzers = data["catalyzers"]
+    catalyzer_index = {catalyzer: i for i, catalyzer in enumerate(catalyzers)}
+    catalyzer_species = np.array([species_index.get(catalyzer.species, -1) for catalyzer in catalyzers], dtype=np.int64)
+    class_index = {reaction_class: i for i, reaction_class in enumerate(data["reaction_classes"])}
+    speeds = np.array([float(reaction_class.reaction_speed) for reaction_class in data["reaction_classes"]], dtype=np.float64)
+
+    reactant_rows, product_rows, reaction_ids, product_ids = [], [], [], []
+    vectors = {"reaction_type": [], "reaction_class": [], "reaction_catalyzer": []}
+    n_reactions = 0
+    for reaction_type, reactions, n_reactants, n_products in ((COND, data["cond_reactions"], 2, 1), (CLL, data["cll_reactions"], 1, 2)):
+        base, reaction_class, reaction_catalyzer = _expand(np, reactions, class_index, catalyzer_index)
+        reactants = np.fromiter((species_index[name] for reaction in reactions for name in reaction.reactants[:n_reactants]),
+                                dtype=np.int64, count=len(reactions) * n_reactants).reshape(-1, n_reactants)
+        products = np.fromiter((species_index[product.name] for reaction in reactions for product in reaction.product[:n_products]),
+                               dtype=np.int64, count=len(reactions) * n_products).reshape(-1, n_products)
+        columns = n_reactions + np.arange(len(base))
+        catalyzer_rows = catalyzer_species[reaction_catalyzer]
+
+        # The catalyzer is written on both sides of the reaction, like in the output
+        reactant_rows.append(np.concatenate([reactants[base].ravel(), catalyzer_rows]))
+        reaction_ids.append(np.concatenate([np.repeat(columns, n_reactants), columns]))
+        product_rows.append(np.concatenate([products[base].ravel(), catalyzer_rows]))
+        product_ids.append(np.concatenate([np.repeat(columns, n_products), columns]))
+
+        vectors["reaction_type"].append(np.full(len(base), reaction_type, dtype=np.int8))
+        vectors["reaction_class"].append(reaction_class)
+        vectors["reaction_catalyzer"].append(reaction_catalyzer)
+        n_reactions += len(base)
+
+    vectors = {name: np.concatenate(parts) for name, parts in vectors.items()}
+    shape = (len(species), n_reactions)
+    reactant_rows, reaction_ids = np.concatenate(reactant_rows), np.concatenate(reaction_ids)
+    product_rows, product_ids = np.concatenate(product_rows), np.concatenate(product_ids)
+
+    return {
+        "species": [str(name) for name in species],
+        "catalyzers": [str(catalyzer.species) for catalyzer in catalyzers],
+        "catalyzer_species": catalyzer_species,
+        "rates": speeds[vectors["reaction_class"]],
+        **vectors,
+        "reactants": coo_to_csr(np, reactant_rows, reaction_ids, np.ones(len(reactant_rows)), shape),
+        "products": coo_to_csr(np, product_rows, product_ids, np.ones(len(product_rows)), shape),
+        "stoichiometry": coo_to_csr(np, np.concatenate([product_rows, reactant_rows]), np.concatenate([product_ids, reaction_ids]),
+                                    np.concatenate([np.ones(len(product_rows)), -np.ones(len(reactant_rows))]), shape),
+        "catalysis": coo_to_csr(np, vectors["reaction_catalyzer"], np.arange(n_reactions), np.ones(n_reactions), (len(catalyzers), n_reactions)),
+    }
+
+
+def write_network_matrices(matrices, directory):
+    np = _numpy()
+    os.makedirs(directory, exist_ok=True)
+    for name in MATRICES:
+        for part in CSR_PARTS:
+            np.save(os.path.join(directory, f"{name}_{part}.npy"), matrices[name][part])
+    for name in VECTORS:
+        np.save(os.path.join(directory, f"{name}.npy"), matrices[name])
+    with open(os.path.join(directory, "network.json"), 'w') as file:
+        json.dump({
+            "species": matrices["species"],
+            "catalyzers": matrices["catalyzers"],
+            "shapes": {name: list(matrices[name]["shape"]) for name in MATRICES},
+            "reaction_types": {"cond": COND, "cll": CLL},
+        }, file)
+
+
+def load_network_matrices(directory, mmap_mode="r"):
+    # The arrays are memory-mapped by default, the matrices are scipy.sparse ones when scipy is there
+    np = _numpy()
+    with open(os.path.join(directory, "network.json")) as file:
+        network = json.load(file)
+    matrices = {"species": network["species"], "catalyzers": network["catalyzers"]}
+    for name in VECTORS:
+        matrices[name] = np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+    for name in MATRICES:
+        matrix = {part: np.load(os.path.join(directory, f"{name}_{part}.npy"), mmap_mode=mmap_mode) for part in CSR_PARTS}
+        matrix["shape"] = tuple(network["shapes"][name])
+        matrices[name] = as_sparse(matrix)
+    return matrices
@@ -0,0 +1,137 @@
+import os
+import json
+import time
+import resource
+import tracemalloc
+from contextlib import contextmanager
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss():
+    # Resident set size in bytes, /proc is only there on Linux: elsewhere fall back to the peak RSS
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def parse_memory_size(value):
+    # "512M", "2G", "1.5GiB", "4096B" for bytes; a bare number is in MiB, a limit in bytes is never what is meant
+    units = {"K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+    text = str(value).strip().upper()
+    if text.endswith("B") and not text[:-1].endswith(tuple(units)) and not text[:-1].endswith("I"):
+        return int(float(text[:-1]))
+    text = text.removesuffix("B").removesuffix("I")
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(float(text) * units["M"])
+
+
+class Metrics:
+    def __init__(self, track_memory=False):
+        self.phases = {}
+        self.counters = {}
+        self.memory = {}
+        self.iterations = []
+        self.track_memory = track_memory
+        self._current_iteration = None
+        # tracemalloc has a single peak, the peaks of the enclosing phases are carried here while a nested one runs
+        self._carried_peaks = []
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _scopes(self):
+        # Counters always go to the run totals, and to the closure iteration running at the moment if any
+        if self._current_iteration is None:
+            return (self.counters,)
+        return (self.counters, self._current_iteration["counters"])
+
+    def count(self, name, value=1):
+        for counters in self._scopes():
+            counters[name] = counters.get(name, 0) + value
+
+    def record(self, name, value):
+        if self._current_iteration is not None:
+            self._current_iteration["sizes"][name] = value
+
+    def _memory_enter(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        if self._carried_peaks:
+            self._carried_peaks[-1] = max(self._carried_peaks[-1], peak)
+        self._carried_peaks.append(0)
+        tracemalloc.reset_peak()
+
+    def _memory_exit(self):
+        peak = max(tracemalloc.get_traced_memory()[1], self._carried_peaks.pop())
+        if self._carried_peaks:
+            self._carried_peaks[-1] = max(self._carried_peaks[-1], peak)
+        return {"peak": peak, "rss": current_rss()}
+
+    @contextmanager
+    def phase(self, name):
+        in_iteration = self._current_iteration is not None
+        phases = self._current_iteration["phases"] if in_iteration else self.phases
+        memory = self._current_iteration["memory"] if in_iteration else self.memory
+        if self.track_memory:
+            self._memory_enter()
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start_time
+            if self.track_memory:
+                usage = self._memory_exit()
+                if name in memory:
+                    usage["peak"] = max(usage["peak"], memory[name]["peak"])
+                memory[name] = usage
+
+    @contextmanager
+    def iteration(self):
+        self._current_iteration = {"iteration": len(self.iterations), "duration": 0.0, "phases": {}, "counters": {}, "sizes": {}, "memory": {}}
+        if self.track_memory:
+            self._memory_enter()
+        start_time = time.perf_counter()
+        try:
+            yield self._current_iteration
+        finally:
+            self._current_iteration["duration"] = time.perf_counter() - start_time
+            if self.track_memory:
+                self._current_iteration["memory"]["iteration"] = self._memory_exit()
+            self.iterations.append(self._current_iteration)
+            self._current_iteration = None
+
+    def to_dict(self, **extra):
+        return {
+            **extra,
+            "clock": "perf_counter",
+            "phases": self.phases,
+            "counters": self.counters,
+            "memory": self.memory,
+            "n_iterations": len(self.iterations),
+            "iterations": self.iterations,
+        }
+
+    def write(self, path, **extra):
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(**extra), file, indent=2)
+
+    def memory_report(self):
+        mib = 2**20
+        lines = [f"{'Phase':<24} {'Peak (MiB)':>12} {'RSS (MiB)':>12}"]
+        for name, usage in self.memory.items():
+            lines.append(f"{name:<24} {usage['peak'] / mib:>12.2f} {usage['rss'] / mib:>12.2f}")
+
+        lines.append("")
+        lines.append(f"{'Iteration':<10} {'Peak (MiB)':>12} {'RSS (MiB)':>12} {'Species':>10} {'Cond':>10} {'Cll':>10} "
+                     f"{'Generator r.':>14} {'Generated r.':>14}")
+        for iteration in self.iterations:
+            sizes = iteration["sizes"]
+            usage = iteration["memory"].get("iteration", {"peak": None, "rss": sizes.get("rss")})
+            peak = f"{usage['peak'] / mib:.2f}" if usage["peak"] is not None else "-"
+            rss = f"{usage['rss'] / mib:.2f}" if usage["rss"] is not None else "-"
+            lines.append(f"{iteration['iteration']:<10} {peak:>12} {rss:>12} "
+                         f"{sizes.get('species', '-'):>10} {sizes.get('cond_reactions', '-'):>10} {sizes.get('cll_reactions', '-'):>10} "
+                         f"{sizes.get('generator_reactions', '-'):>14} {sizes.get('generated_reactions', '-'):>14}")
+        return "\n".join(lines)
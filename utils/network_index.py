@@ -0,0 +1,64 @@
+from collections import defaultdict
+
+EMPTY = ()
+
+
+class NetworkIndex:
+    # Inverted indices of a generated network, built in one pass over the generated reactions of every class so
+    # that each lookup is a dict access instead of a scan. Reactions are listed once, in class then generation order.
+    # Keyed by str(name), so a plain string finds a species whatever the names are (SpeciesName under --dag-names)
+    def __init__(self, data):
+        self.species = {}
+        for species in data["species"]:
+            self.species.setdefault(str(species.name), species)
+        self.catalyzers = {str(catalyzer.species): catalyzer for catalyzer in data["catalyzers"]}
+
+        self.by_length = defaultdict(list)
+        for species in data["species"]:
+            self.by_length[len(species.name)].append(species)
+
+        self.producing_reactions = defaultdict(list)
+        self.consuming_reactions = defaultdict(list)
+        self.catalyzed_reactions = defaultdict(list)
+        self.catalyzed_species = defaultdict(dict)
+        self.class_catalyzers = {}
+        for reaction_class in data["reaction_classes"]:
+            catalyzers = tuple(reaction_class.catalyzers)
+            self.class_catalyzers[reaction_class] = catalyzers
+            for reaction in reaction_class.generated_reactions:
+                products = [str(product.name) for product in reaction.product]
+                reactants = [str(name) for name in reaction.reactants]
+                # Consumed: more times among the reactants than among the products
+                for name in dict.fromkeys(reactants):
+                    if reactants.count(name) > products.count(name):
+                        self.consuming_reactions[name].append(reaction)
+                for name in dict.fromkeys(products):
+                    if products.count(name) > reactants.count(name):
+                        self.producing_reactions[name].append(reaction)
+                for catalyzer in catalyzers:
+                    catalyzer_name = str(catalyzer.species)
+                    self.catalyzed_reactions[catalyzer_name].append(reaction)
+                    for name in products:
+                        self.catalyzed_species[catalyzer_name].setdefault(name)
+
+    def get_species(self, name):
+        return self.species.get(str(name))
+
+    def producing(self, name):
+        return self.producing_reactions.get(str(name), EMPTY)
+
+    def consuming(self, name):
+        return self.consuming_reactions.get(str(name), EMPTY)
+
+    def catalyzed_by(self, catalyzer_name):
+        return self.catalyzed_reactions.get(str(catalyzer_name), EMPTY)
+
+    def species_catalyzed_by(self, catalyzer_name):
+        # Names of the species produced by the reactions of the catalyzer, in order of first production
+        return list(self.catalyzed_species.get(str(catalyzer_name), EMPTY))
+
+    def species_of_length(self, length):
+        return self.by_length.get(length, EMPTY)
+
+    def catalyzers_of(self, reaction_class):
+        return self.class_catalyzers.get(reaction_class, EMPTY)
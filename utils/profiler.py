@@ -0,0 +1,174 @@
+import sys
+import time
+import marshal
+import threading
+from collections import Counter, defaultdict
+from utils.constants import DEFAULT_PROFILE_INTERVAL, DEFAULT_PROFILE_TOP, PROFILE_MODES
+
+# Branches of the reconstructed cProfile stacks below this share of the total time are cut
+MIN_STACK_SHARE = 1e-5
+# Collapsed stack values of the cProfile mode are in microseconds
+STACK_UNIT = 1e6
+
+
+def _label(func):
+    filename, line, name = func
+    # Built-ins are ('~', 0, '<built-in method ...>')
+    label = name if filename == "~" else f"{name} ({filename}:{line})"
+    return label.replace(";", ",")
+
+
+class _StackSampler(threading.Thread):
+    # Takes the stack of one thread every interval (wall clock) from another thread: the profiled code runs untouched,
+    # the cost is one stack walk per sample
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            if stack:
+                self.samples[tuple(reversed(stack))] += 1
+
+
+class RunProfiler:
+    # Profile of a whole run in the pstats format, whatever the mode: "cprofile" records every call, "sample" only
+    # samples the stacks (calls are then sample counts and times are samples x interval), for multi-hour runs
+    def __init__(self, mode="cprofile", interval=DEFAULT_PROFILE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode}, choose one of {PROFILE_MODES}.")
+        self.mode = mode
+        self.interval = interval
+        self.stats = {}
+        self.stacks = Counter()
+        self.duration = 0.0
+        self._profiler = None
+        self._sampler = None
+        self._start_time = None
+
+    def start(self):
+        self._start_time = time.perf_counter()
+        if self.mode == "cprofile":
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._sampler = _StackSampler(threading.get_ident(), self.interval)
+            self._sampler.start()
+
+    def stop(self):
+        if self._start_time is None:
+            return
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.create_stats()
+            self.stats = self._profiler.stats
+            self.stacks = self.reconstruct_stacks(self.stats)
+        else:
+            self._sampler.stopped.set()
+            self._sampler.join()
+            self.stats, self.stacks = self.sampled_stats(self._sampler.samples, self.interval)
+        self.duration = time.perf_counter() - self._start_time
+        self._start_time = None
+
+    def runcall(self, func, *args, **kwargs):
+        self.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    @staticmethod
+    def sampled_stats(samples, interval):
+        # pstats entries from the sampled stacks: a function is counted once per sample it is in (recursion included),
+        # its own time is the samples where it is the innermost frame
+        own, total = Counter(), Counter()
+        edges_own, edges_total = Counter(), Counter()
+        stacks = Counter()
+        for codes, count in samples.items():
+            funcs = [(code.co_filename, code.co_firstlineno, code.co_name) for code in codes]
+            stacks[tuple(map(_label, funcs))] += count
+            own[funcs[-1]] += count
+            if len(funcs) > 1:
+                edges_own[funcs[-2], funcs[-1]] += count
+            for func in set(funcs):
+                total[func] += count
+            for edge in set(zip(funcs, funcs[1:])):
+                edges_total[edge] += count
+
+        callers = defaultdict(dict)
+        for (caller, callee), count in edges_total.items():
+            callers[callee][caller] = (count, count, edges_own[caller, callee] * interval, count * interval)
+        stats = {func: (count, count, own[func] * interval, count * interval, callers[func]) for func, count in total.items()}
+        return stats, stacks
+
+    @staticmethod
+    def reconstruct_stacks(stats):
+        # cProfile only keeps caller -> callee times: every call path from the roots is weighted by the share of the
+        # callee's time that comes from its caller on this path (the flameprof approximation)
+        callees = defaultdict(list)
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees[caller].append((func, edge[3]))
+        total_time = sum(tt for _, _, tt, _, _ in stats.values())
+        min_time = total_time * MIN_STACK_SHARE
+
+        # Roots are the calls made from outside of the profile: with runcall(), the profiled function
+        stacks = Counter()
+        pending = [(func, (), 1.0) for func, (_, _, _, _, callers) in stats.items() if not callers and func[0] != __file__]
+        while pending:
+            func, path, share = pending.pop()
+            tt, ct = stats[func][2], stats[func][3]
+            path_funcs = path + (func,)
+            stacks[path_funcs] += tt * share
+            for callee, edge_time in callees[func]:
+                callee_time = stats[callee][3]
+                # A recursive call is already counted in the time of the outer one
+                if callee in path_funcs or callee_time <= 0 or edge_time * share < min_time:
+                    continue
+                pending.append((callee, path_funcs, share * edge_time / callee_time))
+
+        labelled = Counter()
+        for path, seconds in stacks.items():
+            value = round(seconds * STACK_UNIT)
+            if value:
+                labelled[tuple(map(_label, path))] += value
+        return labelled
+
+    def write_pstats(self, path):
+        # Same format as cProfile.Profile.dump_stats, readable with pstats.Stats(path) or snakeviz
+        with open(path, 'wb') as file:
+            marshal.dump(self.stats, file)
+
+    def write_collapsed(self, path):
+        # One "frame;frame;...;frame value" line per stack, as flamegraph.pl, speedscope or inferno read them
+        with open(path, 'w') as file:
+            for stack, value in sorted(self.stacks.items()):
+                file.write(f"{';'.join(stack)} {value}\n")
+
+    def top(self, n=DEFAULT_PROFILE_TOP):
+        return sorted(self.stats.items(), key=lambda item: item[1][2], reverse=True)[:n]
+
+    def report(self, n=DEFAULT_PROFILE_TOP):
+        calls = "Calls" if self.mode == "cprofile" else "Samples"
+        lines = [f"Top {n} functions by own time ({self.mode}, {self.duration:.3f} s):",
+                 f"{'Own (s)':>10} {'Own %':>7} {'Total (s)':>10} {calls:>10}  Function"]
+        total_time = sum(tt for _, _, tt, _, _ in self.stats.values()) or 1.0
+        for func, (_, nc, tt, ct, _) in self.top(n):
+            lines.append(f"{tt:>10.3f} {100 * tt / total_time:>6.1f}% {ct:>10.3f} {nc:>10}  {_label(func)}")
+        return "\n".join(lines)
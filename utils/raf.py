@@ -0,0 +1,96 @@
+from itertools import chain
+
+
+def _closure(food, spontaneous, alive, n_reactants, products, consumers, n_species):
+    # Species reachable from the food with the alive reactions: every reaction counts its reactants still missing,
+    # a species is expanded once from the worklist and a reaction fires when its counter reaches zero
+    available = bytearray(n_species)
+    missing = n_reactants[:]
+    worklist = []
+    sources = chain(food, chain.from_iterable(products[reaction] for reaction in spontaneous if alive[reaction]))
+    for species in sources:
+        if not available[species]:
+            available[species] = 1
+            worklist.append(species)
+
+    while worklist:
+        species = worklist.pop()
+        for reaction in consumers[species]:
+            if not alive[reaction]:
+                continue
+            missing[reaction] -= 1
+            if missing[reaction] == 0:
+                for product in products[reaction]:
+                    if not available[product]:
+                        available[product] = 1
+                        worklist.append(product)
+    return available, missing
+
+
+def find_max_raf(reactions, food):
+    # Maximal RAF set (Hordijk-Steel reduction): keep only the reactions whose reactants are all in the closure of
+    # the food and that are catalyzed by at least one species of it, until nothing is removed.
+    # reactions are (reactants, products, catalysts) tuples of species names, the result has their indices.
+    reactions = list(reactions)
+    food = list(food)
+    names = dict.fromkeys(chain(food, chain.from_iterable(chain.from_iterable(reactions))))
+    to_id = {name: species for species, name in enumerate(names)}.__getitem__
+
+    # A species listed twice (A + A) is harmless: it is also twice in the consumers, so both counts go down together
+    food_ids = tuple(map(to_id, food))
+    reactants = [tuple(map(to_id, reaction[0])) for reaction in reactions]
+    products = [tuple(map(to_id, reaction[1])) for reaction in reactions]
+    catalysts = [tuple(map(to_id, reaction[2])) for reaction in reactions]
+
+    n_species = len(names)
+    consumers = [[] for _ in range(n_species)]
+    for reaction, reaction_reactants in enumerate(reactants):
+        for species in reaction_reactants:
+            consumers[species].append(reaction)
+
+    n_reactants = [len(reaction_reactants) for reaction_reactants in reactants]
+    spontaneous = [reaction for reaction, n in enumerate(n_reactants) if n == 0]
+    # Uncatalyzed reactions can never be part of a RAF
+    alive = bytearray(1 if reaction_catalysts else 0 for reaction_catalysts in catalysts)
+    candidates = [reaction for reaction in range(len(reactants)) if alive[reaction]]
+
+    n_rounds = 0
+    while True:
+        n_rounds += 1
+        available, missing = _closure(food_ids, spontaneous, alive, n_reactants, products, consumers, n_species)
+        kept = []
+        for reaction in candidates:
+            if missing[reaction] == 0:
+                for catalyst in catalysts[reaction]:
+                    if available[catalyst]:
+                        kept.append(reaction)
+                        break
+                else:
+                    alive[reaction] = 0
+            else:
+                alive[reaction] = 0
+        if len(kept) == len(candidates):
+            break
+        candidates = kept
+
+    names = list(names)
+    return {
+        "reactions": candidates,
+        "species": [names[species] for species in range(n_species) if available[species]],
+        "catalysts": {reaction: [names[catalyst] for catalyst in catalysts[reaction] if available[catalyst]] for reaction in candidates},
+        "food": food,
+        "rounds": n_rounds,
+    }
+
+
+def find_generated_raf(data):
+    # Food set: the initial species of the input, catalysis: the catalyzers of the reaction class of each reaction
+    container = data["species"][0].name
+    food = [species.name for species in data["species"] if species.is_in_initial_set and species.name != container]
+    generated_reactions = data["cond_reactions"] + data["cll_reactions"]
+    raf = find_max_raf(((reaction.reactants, [product.name for product in reaction.product],
+                         [catalyzer.species for catalyzer in reaction.reaction_class.catalyzers]) for reaction in generated_reactions), food)
+    raf["catalysts"] = {generated_reactions[reaction]: raf["catalysts"][reaction] for reaction in raf["reactions"]}
+    raf["reactions"] = [generated_reactions[reaction] for reaction in raf["reactions"]]
+    raf["species"].sort(key=lambda name: (len(name), name))
+    return raf
@@ -0,0 +1,32 @@
+import argparse
+from collections import defaultdict
+from utils.streams import binomial
+
+
+def group_by_length(names):
+    groups = defaultdict(list)
+    for name in names:
+        groups[len(name)].append(name)
+    return groups
+
+
+def sample_indices(rng, population, rate):
+    # Every item of the stratum is kept with probability rate: binomial size, then that many distinct indices
+    n_sampled = binomial(rng, population, rate)
+    return sorted(rng.sample(range(population), n_sampled))
+
+
+def pair_at(index, left_new, left_old, right_all, right_new):
+    # New pairs of a stratum, numbered without building them: new left x every right, then old left x new right
+    n_left_new_pairs = len(left_new) * len(right_all)
+    if index < n_left_new_pairs:
+        return left_new[index // len(right_all)], right_all[index % len(right_all)]
+    index -= n_left_new_pairs
+    return left_old[index // len(right_new)], right_new[index % len(right_new)]
+
+
+def parse_sample_rate(value):
+    rate = float(value)
+    if not 0 < rate <= 1:
+        raise argparse.ArgumentTypeError(f"the sampling rate must be in (0, 1], got {value}")
+    return rate
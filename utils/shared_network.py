@@ -0,0 +1,313 @@
+import sys
+import json
+import math
+import struct
+from array import array
+from multiprocessing import shared_memory, resource_tracker
+from classes import CondReactionClass
+
+# A finished network frozen in one shared memory block: a JSON header (seed, counts and where every array is),
+# then flat typed arrays. Other processes attach to the block by name and read it through views, nothing is copied
+# or unpickled: values are read from the arrays when a field is accessed, strings decoded the first time.
+MAGIC = b"CGNET001"
+PREAMBLE = struct.Struct("<8sQ")
+ALIGNMENT = 8
+COND, CLL = 0, 1
+CROSS_MEMBRANE, INITIAL_SET = 1, 2
+
+
+class _Sequence:
+    # Read-only list of the views of a table, built on access
+    __slots__ = ('length', 'view')
+
+    def __init__(self, length, view):
+        self.length = length
+        self.view = view
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.view(i) for i in range(*index.indices(self.length))]
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("shared network index out of range")
+        return self.view(index)
+
+    def __iter__(self):
+        return map(self.view, range(self.length))
+
+
+class _View:
+    __slots__ = ('network', 'index')
+
+    def __init__(self, network, index):
+        self.network = network
+        self.index = index
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.network is self.network and other.index == self.index
+
+    def __hash__(self):
+        return hash((type(self), self.index))
+
+
+class SpeciesView(_View):
+    __slots__ = ()
+
+    @property
+    def name(self):
+        return self.network.text(self.network.arrays["species_name"][self.index])
+
+    @property
+    def concentration(self):
+        return self.network.arrays["species_concentration"][self.index]
+
+    @property
+    def contrib(self):
+        return self.network.arrays["species_contrib"][self.index]
+
+    @property
+    def can_cross_membrane(self):
+        return bool(self.network.arrays["species_flags"][self.index] & CROSS_MEMBRANE)
+
+    @property
+    def is_in_initial_set(self):
+        return bool(self.network.arrays["species_flags"][self.index] & INITIAL_SET)
+
+    @property
+    def external_concentration(self):
+        return _optional(self.network.arrays["species_external"][self.index])
+
+    @property
+    def diffusion_constant(self):
+        return _optional(self.network.arrays["species_diffusion"][self.index])
+
+
+class CatalyzerView(_View):
+    __slots__ = ()
+
+    @property
+    def species(self):
+        return self.network.text(self.network.arrays["catalyzer_species"][self.index])
+
+
+class ReactionClassView(_View):
+    __slots__ = ()
+
+    @property
+    def reaction_type(self):
+        return self.network.arrays["class_type"][self.index]
+
+    @property
+    def reaction_speed(self):
+        return self.network.arrays["class_speed"][self.index]
+
+    @property
+    def catalyzers(self):
+        indptr = self.network.arrays["class_catalyzers_indptr"]
+        catalyzers = self.network.arrays["class_catalyzers"][indptr[self.index]:indptr[self.index + 1]]
+        return tuple(CatalyzerView(self.network, catalyzer) for catalyzer in catalyzers)
+
+
+class _ReactionView(_View):
+    __slots__ = ()
+
+    @property
+    def reaction_class(self):
+        return ReactionClassView(self.network, self.network.arrays[self.CLASSES][self.index])
+
+    @property
+    def reactants(self):
+        start = self.index * self.N_REACTANTS
+        return tuple(map(self.network.text, self.network.arrays[self.REACTANTS][start:start + self.N_REACTANTS]))
+
+    @property
+    def product(self):
+        start = self.index * self.N_PRODUCTS
+        return tuple(SpeciesView(self.network, species) for species in self.network.arrays[self.PRODUCTS][start:start + self.N_PRODUCTS])
+
+
+class CondReactionView(_ReactionView):
+    __slots__ = ()
+    CLASSES, REACTANTS, PRODUCTS = "cond_class", "cond_reactants", "cond_products"
+    N_REACTANTS, N_PRODUCTS = 2, 1
+
+
+class CllReactionView(_ReactionView):
+    __slots__ = ()
+    CLASSES, REACTANTS, PRODUCTS = "cll_class", "cll_reactants", "cll_products"
+    N_REACTANTS, N_PRODUCTS = 1, 2
+
+
+def _optional(value):
+    return None if math.isnan(value) else value
+
+
+def _nan_if_none(value):
+    return math.nan if value is None else float(value)
+
+
+def _flatten(data):
+    # The arrays of the network, strings as indices in one table of UTF-8 text
+    strings = {}
+
+    def intern(text):
+        text = str(text)
+        index = strings.get(text)
+        if index is None:
+            index = strings[text] = len(strings)
+        return index
+
+    species = data["species"]
+    species_index = {str(specie.name): i for i, specie in enumerate(species)}
+    catalyzer_index = {catalyzer: i for i, catalyzer in enumerate(data["catalyzers"])}
+    class_index = {reaction_class: i for i, reaction_class in enumerate(data["reaction_classes"])}
+
+    arrays = {
+        "species_name": array('q', (intern(specie.name) for specie in species)),
+        "species_concentration": array('d', (float(specie.concentration) for specie in species)),
+        "species_contrib": array('d', (float(specie.contrib) for specie in species)),
+        "species_external": array('d', (_nan_if_none(specie.external_concentration) for specie in species)),
+        "species_diffusion": array('d', (_nan_if_none(specie.diffusion_constant) for specie in species)),
+        "species_flags": array('b', (CROSS_MEMBRANE * bool(specie.can_cross_membrane) + INITIAL_SET * bool(specie.is_in_initial_set)
+                                     for specie in species)),
+        "catalyzer_species": array('q', (intern(catalyzer.species) for catalyzer in data["catalyzers"])),
+        "class_type": array('b', (COND if isinstance(reaction_class, CondReactionClass) else CLL for reaction_class in class_index)),
+        "class_speed": array('d', (float(reaction_class.reaction_speed) for reaction_class in class_index)),
+        "class_catalyzers_indptr": array('q', [0]),
+        "class_catalyzers": array('q'),
+    }
+    for reaction_class in class_index:
+        arrays["class_catalyzers"].extend(catalyzer_index[catalyzer] for catalyzer in reaction_class.catalyzers)
+        arrays["class_catalyzers_indptr"].append(len(arrays["class_catalyzers"]))
+
+    for part, n_reactants, n_products in (("cond", 2, 1), ("cll", 1, 2)):
+        reactions = data[f"{part}_reactions"]
+        arrays[f"{part}_class"] = array('q', (class_index[reaction.reaction_class] for reaction in reactions))
+        arrays[f"{part}_reactants"] = array('q', (intern(name) for reaction in reactions for name in reaction.reactants[:n_reactants]))
+        arrays[f"{part}_products"] = array('q', (species_index[str(product.name)] for reaction in reactions
+                                                 for product in reaction.product[:n_products]))
+
+    encoded = [text.encode("utf-8") for text in strings]
+    arrays["text_offsets"] = array('q', [0])
+    for text in encoded:
+        arrays["text_offsets"].append(arrays["text_offsets"][-1] + len(text))
+    arrays["text"] = array('B', b"".join(encoded))
+    return arrays
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+class SharedNetwork:
+    # freeze() writes a network and owns the block (close() then unlink() it when done), attach() maps it read-only
+    def __init__(self, memory, owner):
+        self.memory = memory
+        self.owner = owner
+        self.buffer = memory.buf.toreadonly()
+        magic, header_size = PREAMBLE.unpack_from(self.buffer)
+        if magic != MAGIC:
+            self.buffer.release()
+            raise ValueError(f"The shared memory block {memory.name} is not a frozen network.")
+        self.header = json.loads(bytes(self.buffer[PREAMBLE.size:PREAMBLE.size + header_size]))
+        self.arrays = {name: self.buffer[offset:offset + size].cast(typecode)
+                       for name, (typecode, offset, size) in self.header["arrays"].items()}
+        self.strings = [None] * (len(self.arrays["text_offsets"]) - 1)
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    @staticmethod
+    def freeze(data, name=None):
+        arrays = _flatten(data)
+        counts = {"species": len(data["species"]), "catalyzers": len(data["catalyzers"]),
+                  "reaction_classes": len(arrays["class_speed"]),
+                  "cond_reactions": len(data["cond_reactions"]), "cll_reactions": len(data["cll_reactions"])}
+
+        # The header size depends on the offsets it lists: they are computed from a generous upper bound of it
+        layout = {}
+        offset = _aligned(PREAMBLE.size + 64 * (len(arrays) + 4) + len(json.dumps({"seed": data["seed"], "counts": counts})))
+        for array_name, values in arrays.items():
+            size = len(values) * values.itemsize
+            layout[array_name] = (values.typecode, offset, size)
+            offset = _aligned(offset + size)
+        header = json.dumps({"seed": data["seed"], "counts": counts, "arrays": layout}).encode("utf-8")
+        if PREAMBLE.size + len(header) > layout["species_name"][1]:
+            raise ValueError("The shared network header does not fit before its arrays.")
+
+        memory = shared_memory.SharedMemory(name=name, create=True, size=max(offset, 1))
+        try:
+            PREAMBLE.pack_into(memory.buf, 0, MAGIC, len(header))
+            memory.buf[PREAMBLE.size:PREAMBLE.size + len(header)] = header
+            for array_name, values in arrays.items():
+                _, start, size = layout[array_name]
+                memory.buf[start:start + size] = memoryview(values).cast('B')
+            return SharedNetwork(memory, owner=True)
+        except BaseException:
+            memory.close()
+            memory.unlink()
+            raise
+
+    @staticmethod
+    def attach(name):
+        # Only the owner unlinks the block: registered with the resource tracker of a worker, it would be unlinked
+        # when the worker exits (track=False does not register it from Python 3.13)
+        if sys.version_info >= (3, 13):
+            return SharedNetwork(shared_memory.SharedMemory(name=name, track=False), owner=False)
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            memory = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+        return SharedNetwork(memory, owner=False)
+
+    def text(self, index):
+        text = self.strings[index]
+        if text is None:
+            offsets = self.arrays["text_offsets"]
+            text = self.strings[index] = str(self.arrays["text"][offsets[index]:offsets[index + 1]], "utf-8")
+        return text
+
+    def data(self):
+        # Same keys and fields as the generated_data that GeneratorIO.write_data and write_metrics read
+        counts = self.header["counts"]
+        return {
+            "seed": self.header["seed"],
+            "species": _Sequence(counts["species"], lambda i: SpeciesView(self, i)),
+            "catalyzers": _Sequence(counts["catalyzers"], lambda i: CatalyzerView(self, i)),
+            "reaction_classes": _Sequence(counts["reaction_classes"], lambda i: ReactionClassView(self, i)),
+            "cond_reactions": _Sequence(counts["cond_reactions"], lambda i: CondReactionView(self, i)),
+            "cll_reactions": _Sequence(counts["cll_reactions"], lambda i: CllReactionView(self, i)),
+        }
+
+    def close(self):
+        # The views must not be used after this
+        if self.buffer is None:
+            return
+        for values in self.arrays.values():
+            values.release()
+        self.arrays = {}
+        self.buffer.release()
+        self.buffer = None
+        self.memory.close()
+
+    def __del__(self):
+        if getattr(self, "buffer", None) is not None:
+            self.close()
+
+    def unlink(self):
+        if self.owner:
+            self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
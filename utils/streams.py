@@ -0,0 +1,44 @@
+import random
+import hashlib
+
+# Above this mean the binomial is drawn as a sum of smaller ones, so the inversion never underflows
+INVERSION_MAX_MEAN = 25
+
+
+class RandomStreams:
+    # Independent random streams derived from the master seed, one per stable key (phase, species name, ...):
+    # a decision only depends on its own key, not on how many draws were made before it
+    def __init__(self, seed):
+        self.seed = seed
+
+    def stream(self, *key):
+        material = "\x1f".join(str(part) for part in (self.seed, *key)).encode()
+        return random.Random(int.from_bytes(hashlib.blake2b(material, digest_size=32).digest(), "big"))
+
+
+def _binomial_inversion(rng, n, p):
+    q = 1 - p
+    u = rng.random()
+    probability = q ** n
+    k = 0
+    while u > probability and k < n:
+        u -= probability
+        probability *= (n - k) / (k + 1) * p / q
+        k += 1
+    return k
+
+
+def binomial(rng, n, p):
+    # Number of successes out of n trials of probability p, O(n * p) draws instead of n
+    if n <= 0 or p <= 0:
+        return 0
+    if p >= 1:
+        return n
+    if p > 0.5:
+        return n - binomial(rng, n, 1 - p)
+    chunk = max(1, int(INVERSION_MAX_MEAN / p))
+    successes = 0
+    while n > 0:
+        successes += _binomial_inversion(rng, min(n, chunk), p)
+        n -= chunk
+    return successes
@@ -1,5 +1,4 @@
 from classes import CondReactionClass, CllReactionClass
-from termcolor import colored
 
 def flatten_species_list(lst):
     seen = set()
@@ -10,20 +9,23 @@ def flatten_species_list(lst):
             unique_list.append(item)
     return unique_list
 
+def reaction_key_no_cata(reaction):
+    # Two reactions of the same kind are the same when they have the same reactants and products, in any order
+    if isinstance(reaction.reaction_class, CondReactionClass):
+        return (CondReactionClass, tuple(sorted(reaction.reactants)), tuple(sorted(reaction.product[0].name)))
+    elif isinstance(reaction.reaction_class, CllReactionClass):
+        return (CllReactionClass, tuple(sorted(reaction.reactants)), tuple(sorted([product.name for product in reaction.product])))
+    return None
+
 def are_reactions_same_no_cata(reaction1, reaction2):
     if type(reaction1.reaction_class) != type(reaction2.reaction_class):
         return False
 
-    if isinstance(reaction1.reaction_class, CondReactionClass):
-        key1 = (tuple(sorted(reaction1.reactants)), tuple(sorted(reaction1.product[0].name)))
-        key2 = (tuple(sorted(reaction2.reactants)), tuple(sorted(reaction2.product[0].name)))
-    elif isinstance(reaction1.reaction_class, CllReactionClass):
-        key1 = (tuple(sorted(reaction1.reactants)), tuple(sorted([product.name for product in reaction1.product])))
-        key2 = (tuple(sorted(reaction2.reactants)), tuple(sorted([product.name for product in reaction2.product])))
-    else:
+    key1 = reaction_key_no_cata(reaction1)
+    if key1 is None:
         return False
 
-    return key1 == key2
+    return key1 == reaction_key_no_cata(reaction2)
 
 def are_reactions_same(reaction1, reaction2):
     catalyzers_key1 = tuple(sorted(c.species for c in reaction1.reaction_class.catalyzers))
@@ -35,6 +37,8 @@ def are_reactions_same(reaction1, reaction2):
 
 
 def print_debug_message(message, type):
+    from termcolor import colored
+
     match type:
         case 'INFO':
             print(f"{colored('[INFO] ', 'green')}{message}")